@@ -0,0 +1,200 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional
+import time
+
+from core.recibir_datos import RecibirDatos
+from core.procesar_datos import ProcesaDatosTAR
+from core.pipeline import PipelineDecodificacion
+from core.metricas import RegistroMetricas
+from core.contenedor import ContenedorEnsayo
+from core.sincronizacion import SincronizadorTAR
+from core.coincidencias import MotorCoincidencias
+
+BASE_DATA_DIR = Path.home() / "Documents" / "TAR_GUI"
+ENSAYOS_DIR = BASE_DATA_DIR / "ensayos"
+
+# Memoria máxima de eventos en RAM; al superarla, lo más viejo de la parte en curso se vuelca a disco
+MEMORIA_MAX_BYTES = 256 << 20
+
+# Separación máxima entre un pulso A y uno B para considerarlos coincidentes
+VENTANA_COINCIDENCIA_NS = 1000
+
+# Período del autoguardado durante un ensayo (s)
+PERIODO_AUTOGUARDADO_SEG = 15
+
+
+# ====================================================================
+#           SESIÓN DE ADQUISICIÓN: PUERTO → COLA → PROCESADOR
+# ====================================================================
+class SesionAdquisicion:
+    """
+    Todo el camino de adquisición sin interfaz: el puerto serie (RecibirDatos), la cola y el
+    hilo decodificador (PipelineDecodificacion), el procesador con autoguardado y el ensayo
+    en curso. La usa la ventana cuando adquiere en su propio proceso y el demonio
+    (core.demonio) cuando la adquisición corre aparte de la interfaz.
+    """
+
+    remota = False
+
+    def __init__(self, carpeta_ensayos: Path = ENSAYOS_DIR,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.carpeta_ensayos = Path(carpeta_ensayos)
+
+        # Métricas del camino de adquisición (panel de estadísticas y JSON al finalizar)
+        self.metricas = RegistroMetricas()
+
+        # Procesador TAR con auto-guardado (carpetas se reasignan al iniciar un ensayo)
+        self.process = ProcesaDatosTAR(
+            carpeta_bin=None,
+            carpeta_csv=None,
+            auto_periodo_seg=None,
+            auto_prefix="tar",
+            metricas=self.metricas,
+            memoria_max_bytes=MEMORIA_MAX_BYTES,
+            sincronizador=SincronizadorTAR(),   # header/footer aprendidos del flujo
+            coincidencias=MotorCoincidencias(VENTANA_COINCIDENCIA_NS),
+        )
+
+        # El hilo serie solo encola chunks; la decodificación corre en su propio hilo
+        self.pipeline = PipelineDecodificacion(self.process, max_chunks=1024)
+        self.pipeline.iniciar()
+
+        self.serial_handler = RecibirDatos(
+            on_data_callback=self.pipeline.encolar,
+            on_error_callback=on_error or (lambda msg: print(f"[ERROR] {msg}")),
+        )
+
+        # Contadores que ya llevan el lector y la cola: se leen solo al mostrar / volcar
+        self.metricas.registrar_indicador("serie.bytes", lambda: self.serial_handler.bytes_recibidos)
+        self.metricas.registrar_indicador("serie.lecturas", lambda: self.serial_handler.lecturas)
+        self.metricas.registrar_indicador("serie.bytes_s", lambda: self.serial_handler.estadisticas()["bytes_s"])
+        self.metricas.registrar_indicador("cola.profundidad", lambda: self.pipeline.estadisticas()["profundidad"])
+        self.metricas.registrar_indicador("cola.descartados", lambda: self.pipeline.descartados)
+        self.metricas.registrar_indicador("cola.bytes_descartados", lambda: self.pipeline.bytes_descartados)
+        self.metricas.registrar_indicador("memoria.bytes", self.process.memoria_en_uso)
+        self.metricas.registrar_indicador("sync.resincronizaciones", lambda: self.process.sincronizador.resincronizaciones)
+        self.metricas.registrar_indicador("sync.bytes_descartados", lambda: self.process.sincronizador.bytes_descartados)
+        self.metricas.registrar_indicador("coincidencias.pares", self.process.pares_coincidentes)
+
+        self.puerto: Optional[str] = None
+        self.umbrales: Optional[Dict[str, int]] = None     # últimos umbrales enviados al TAR
+        self.ensayo_activo = False
+        self.ensayo_dir: Optional[Path] = None
+        self.ensayo_duracion = 0
+        self._fin_ensayo = 0.0                              # time.monotonic() al cumplirse la duración
+
+    # -------------------------
+    # Puerto serie
+    # -------------------------
+    def conectar(self, puerto: str) -> bool:
+        print(f"[Adquisición] Intentando conectar a {puerto}")
+        ok = self.serial_handler.open(puerto)
+        if ok:
+            self.puerto = puerto
+            print(f"[Adquisición] Conectado correctamente a {puerto}")
+        else:
+            print("[Adquisición] Error al conectar")
+        return ok
+
+    def desconectar(self):
+        print("[Adquisición] Desconectando...")
+        self.serial_handler.close()
+        self.puerto = None
+
+    def conectado(self) -> bool:
+        return self.serial_handler.is_connected()
+
+    def aplicar_umbrales(self, params: Dict[str, int]):
+        """Envía los umbrales de ambos canales al firmware (ASCII simple)."""
+        print(f"[Adquisición] Aplicando parámetros: {params}")
+        self.serial_handler.send(f"UMBRAL CHA_MIN {params['umbral_cha_min']}\n".encode())
+        self.serial_handler.send(f"UMBRAL CHA_MAX {params['umbral_cha_max']}\n".encode())
+        self.serial_handler.send(f"UMBRAL CHB_MIN {params['umbral_chb_min']}\n".encode())
+        self.serial_handler.send(f"UMBRAL CHB_MAX {params['umbral_chb_max']}\n".encode())
+        self.umbrales = dict(params)
+        print("[Adquisición] Parámetros enviados correctamente al TAR.")
+
+    # -------------------------
+    # Ensayo
+    # -------------------------
+    def iniciar_ensayo(self, duracion_seg: int, columnar: bool = False, contenedor: bool = False) -> Path:
+        """Crea la carpeta del ensayo, limpia lo acumulado, activa el autoguardado y ordena START."""
+        fecha = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        base = self.carpeta_ensayos / f"ensayo_{fecha}"
+        ruta_csv = base / "csv"
+        ruta_bin = base / "bin"
+        self.ensayo_dir = base
+
+        # ProcesaDatosTAR guardará automáticamente ahí
+        self.process.set_output_folders(
+            carpeta_csv=str(ruta_csv),
+            carpeta_bin=str(ruta_bin)
+        )
+
+        # Formato columnar opcional (.tarc junto a cada .bin)
+        self.process.guardar_columnar = columnar
+
+        # Auto-guardado periódico
+        self.process.auto_periodo_seg = PERIODO_AUTOGUARDADO_SEG
+        self.process._ultimo_guardado_ts = time.time()
+        self.process._start_auto_loop()
+
+        self.ensayo_duracion = duracion_seg
+        self._fin_ensayo = time.monotonic() + duracion_seg
+        self.ensayo_activo = True
+
+        # Limpiar buffers previos
+        self.process.clear()
+        self.metricas.reiniciar()
+
+        # Modo contenedor: todo el ensayo en bin/ensayo.bin (+ ensayo.idx) con base de tiempo continua
+        if contenedor:
+            self.process.usar_contenedor(ContenedorEnsayo(str(ruta_bin / "ensayo")))
+
+        # Ordenar inicio al hardware
+        self.serial_handler.iniciar_captura()
+        print(f"[Adquisición] Ensayo iniciado ({duracion_seg} s) en {base}")
+        return base
+
+    def restante_seg(self) -> float:
+        """Segundos que le quedan al ensayo en curso (0 si no hay ensayo)."""
+        if not self.ensayo_activo:
+            return 0.0
+        return max(self._fin_ensayo - time.monotonic(), 0.0)
+
+    def finalizar_ensayo(self):
+        """Ordena STOP, hace el guardado final y deja las métricas junto a las carpetas del ensayo."""
+        if not self.ensayo_activo:
+            return
+        self.ensayo_activo = False
+
+        # Ordenar STOP al hardware
+        self.serial_handler.detener_captura()
+
+        # Lo que quedó en la cola de decodificación pertenece a este ensayo: entra antes del dump final
+        if not self.pipeline.esperar_vacia():
+            print("[Adquisición] La cola de decodificación no se vació a tiempo")
+
+        # Detener autoguardado para evitar condiciones de carrera
+        self.process.stop_auto()
+
+        # Guardado final (ProcesaDatosTAR guarda archivos dentro del ensayo actual)
+        print("[Adquisición] Guardando dump final...")
+        self.process.dump_and_reset(final=True)
+        self.process.usar_contenedor(None)
+
+        # Métricas del ensayo junto a sus carpetas bin / csv
+        if self.ensayo_dir:
+            self.metricas.volcar_json(str(self.ensayo_dir / "metricas.json"))
+
+    def limpiar(self):
+        self.process.clear()
+        print("[Adquisición] Datos limpiados.")
+
+    def cerrar(self):
+        """Cierra un ensayo en curso (con su guardado final), el puerto y el hilo decodificador."""
+        self.finalizar_ensayo()
+        if self.conectado():
+            self.desconectar()
+        self.pipeline.detener()
@@ -0,0 +1,50 @@
+from typing import Optional
+
+import numpy as np
+
+from core.protocolo import T_PERIOD
+
+# Un período del contador de timestamps (CH=3) en ns
+PERIODO_NS = T_PERIOD * 10
+
+
+# ====================================================================
+#              BASE DE TIEMPO CONTINUA ENTRE GUARDADOS
+# ====================================================================
+class BaseTiempoContinua:
+    """
+    Vuelve continua la base de tiempo de los pulsos leídos en orden de llegada.
+    Sin contenedor, dump_and_reset reinicia el offset de CH=3 y 'ts_abs_ns' retrocede un
+    múltiplo de PERIODO_NS (el contador del TAR sigue corriendo). Un retroceso de más de
+    medio período se interpreta así y se compensa sumando los períodos perdidos; los
+    pequeños desórdenes entre canales quedan como están.
+    Recibir solo pulsos: en los frames CH=3 'ts_abs_ns' no tiene significado.
+    """
+
+    def __init__(self):
+        self.ajuste_ns = 0
+        self._ultimo: Optional[int] = None    # último ts recibido (sin ajustar)
+
+    def reiniciar(self):
+        self.ajuste_ns = 0
+        self._ultimo = None
+
+    def continuar(self, ts_abs_ns: np.ndarray) -> np.ndarray:
+        """Devuelve los timestamps (int64) en la base continua."""
+        ts = np.asarray(ts_abs_ns, dtype=np.int64)
+        if not len(ts):
+            return ts
+
+        previo = ts[0] if self._ultimo is None else self._ultimo
+        saltos = np.diff(ts, prepend=previo)
+        self._ultimo = int(ts[-1])
+
+        retrocesos = saltos < -(PERIODO_NS // 2)
+        if not retrocesos.any():
+            return ts + self.ajuste_ns
+
+        # Períodos a sumar en cada retroceso: ceil(-salto / PERIODO_NS)
+        periodos = np.where(retrocesos, (-saltos + PERIODO_NS - 1) // PERIODO_NS, 0)
+        ajustes = self.ajuste_ns + np.cumsum(periodos) * PERIODO_NS
+        self.ajuste_ns = int(ajustes[-1])
+        return ts + ajustes
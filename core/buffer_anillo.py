@@ -0,0 +1,106 @@
+from typing import Dict, Iterator
+
+from core.protocolo import FRAME_SIZE
+
+
+# ====================================================================
+#                       BUFFER CIRCULAR
+# ====================================================================
+class BufferAnillo:
+    """
+    Buffer circular de capacidad fija para el flujo serie. Los chunks entrantes se decodifican
+    en el lugar (memoryview), y solo se copia al anillo el resto de menos de 8 bytes que
+    queda al final de cada chunk. Los cursores de lectura/escritura son absolutos y la
+    posición física es cursor % capacidad; como la capacidad es múltiplo de FRAME_SIZE y
+    la lectura avanza de a un frame, un frame pendiente nunca queda partido en el anillo.
+    """
+
+    def __init__(self, capacidad: int = 4 * FRAME_SIZE):
+        if capacidad < 2 * FRAME_SIZE or capacidad % FRAME_SIZE:
+            raise ValueError(f"Capacidad inválida para el anillo: {capacidad}")
+
+        self.capacidad = capacidad
+        self._mem = bytearray(capacidad)
+        self._vista = memoryview(self._mem)
+        self._lectura = 0
+        self._escritura = 0
+
+        # Contadores de copias: actual vs. lo que copiaba el bytearray anterior
+        self.frames = 0
+        self.bytes_copiados = 0
+        self.bytes_copiados_previo = 0
+
+    def __len__(self) -> int:
+        return self._escritura - self._lectura
+
+    def limpiar(self):
+        self._lectura = 0
+        self._escritura = 0
+
+    def _escribir(self, datos: memoryview):
+        n = len(datos)
+        if len(self) + n > self.capacidad:
+            raise OverflowError("Anillo lleno: el resto pendiente supera la capacidad")
+
+        pos = self._escritura % self.capacidad
+        primero = min(n, self.capacidad - pos)
+        self._vista[pos:pos + primero] = datos[:primero]
+        if primero < n:
+            self._vista[:n - primero] = datos[primero:]
+        self._escritura += n
+        self.bytes_copiados += n
+
+    # -------------------------
+    # Consumo de chunks
+    # -------------------------
+    def consumir(self, data) -> Iterator[memoryview]:
+        """
+        Entrega bloques contiguos de frames completos (memoryview) listos para decodificar.
+        Cada bloque debe procesarse antes de pedir el siguiente.
+        """
+        mv = memoryview(data)
+        total = len(mv)
+        pos = 0
+        frames = 0
+
+        # Completar el frame pendiente con los primeros bytes del chunk
+        pendiente = len(self)
+        if pendiente:
+            falta = FRAME_SIZE - pendiente
+            if total < falta:
+                self._escribir(mv)
+                self.bytes_copiados_previo += total + len(self)
+                return
+            self._escribir(mv[:falta])
+            pos = falta
+
+            inicio = self._lectura % self.capacidad
+            self._lectura += FRAME_SIZE
+            frames += 1
+            yield self._vista[inicio:inicio + FRAME_SIZE]
+
+        # Frames completos directamente sobre el chunk, sin copia
+        n = (total - pos) // FRAME_SIZE * FRAME_SIZE
+        if n:
+            frames += n // FRAME_SIZE
+            yield mv[pos:pos + n]
+            pos += n
+
+        # Resto (< 8 bytes) para el próximo chunk
+        resto = total - pos
+        if resto:
+            self._escribir(mv[pos:])
+
+        # El bytearray anterior copiaba: extend + bytes() por frame + el resto
+        self.frames += frames
+        self.bytes_copiados_previo += total + frames * FRAME_SIZE + len(self)
+
+    def estadisticas(self) -> Dict[str, float]:
+        """Bytes copiados por frame con el anillo y con el buffer anterior."""
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "bytes_copiados": self.bytes_copiados,
+            "bytes_por_frame": self.bytes_copiados / frames,
+            "bytes_por_frame_previo": self.bytes_copiados_previo / frames,
+        }
@@ -0,0 +1,241 @@
+"""
+Línea de comandos sin interfaz gráfica para conversión y análisis de .bin del TAR.
+
+Uso:
+    python -m core.cli convertir "ensayo_*/bin/*.bin" --salida csv/ --histograma --resumen
+    python -m core.cli histograma datos.bin --min 0 --max 5000 --bin 10
+    python -m core.cli resumen "*.bin" --json
+
+Los patrones se expanden acá (también entre comillas, para lotes en shells que no los
+expanden) y una carpeta equivale a sus .bin (o a los de su carpeta bin). No importa Tk,
+matplotlib ni pyserial; numpy y el procesador se cargan recién al ejecutar un comando,
+así que --help y los errores de argumentos no pagan ese costo.
+Código de salida: 0 si todos los archivos se procesaron, 1 si alguno falló o no hubo archivos.
+"""
+from typing import Dict, List, Optional, Sequence
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+# Rango por defecto del histograma exportado (mV) e intervalo
+HIST_MIN_MV = 0
+HIST_MAX_MV = 5000
+HIST_BIN_MV = 10
+
+
+# ====================================================================
+#                          ARCHIVOS DE ENTRADA
+# ====================================================================
+def expandir_entradas(patrones: Sequence[str]) -> List[str]:
+    """Expande patrones glob y carpetas a una lista ordenada de .bin, sin repetidos."""
+    rutas: List[str] = []
+    for patron in patrones:
+        candidatos = sorted(glob.glob(patron, recursive=True)) if glob.has_magic(patron) else [patron]
+        for candidato in candidatos:
+            if os.path.isdir(candidato):
+                carpeta = os.path.join(candidato, "bin") if os.path.isdir(os.path.join(candidato, "bin")) else candidato
+                rutas.extend(sorted(glob.glob(os.path.join(carpeta, "*.bin"))))
+            else:
+                rutas.append(candidato)
+    vistos = set()
+    return [r for r in rutas if not (r in vistos or vistos.add(r))]
+
+
+# ====================================================================
+#                     RESUMEN POR ARCHIVO (UNA PASADA)
+# ====================================================================
+class _Resumen:
+    """Conteos y estadísticos por canal acumulados lote a lote (memoria constante)."""
+
+    def __init__(self):
+        from core.procesar_datos import CANAL_A, CANAL_B
+        self.canales = (("A", CANAL_A), ("B", CANAL_B))
+        self.frames = 0
+        self.overflows = 0
+        self.pulsos = {letra: 0 for letra, _ in self.canales}
+        self.suma_vp = {letra: 0 for letra, _ in self.canales}
+        self.suma_vp2 = {letra: 0 for letra, _ in self.canales}
+        self.ts_min: Optional[int] = None
+        self.ts_max: Optional[int] = None
+
+    def acumular(self, lote: Dict):
+        import numpy as np
+        chan = lote["chan"]
+        self.frames += len(chan)
+        self.overflows += int(np.count_nonzero(lote["overflow"]))
+        pulsos = (chan == self.canales[0][1]) | (chan == self.canales[1][1])
+        if pulsos.any():
+            ts = lote["ts_abs_ns"][pulsos]
+            self.ts_min = int(ts.min()) if self.ts_min is None else min(self.ts_min, int(ts.min()))
+            self.ts_max = int(ts.max()) if self.ts_max is None else max(self.ts_max, int(ts.max()))
+        for letra, chan_tar in self.canales:
+            vp = lote["vp_counts"][chan == chan_tar].astype(np.int64)
+            self.pulsos[letra] += len(vp)
+            self.suma_vp[letra] += int(vp.sum())
+            self.suma_vp2[letra] += int((vp * vp).sum())
+
+    def como_dict(self, ruta: str, segundos: float) -> Dict:
+        from core.protocolo import ZMODADC1410_RESOLUTION
+        duracion_s = (self.ts_max - self.ts_min) / 1e9 if self.ts_min is not None else 0.0
+        canales = {}
+        for letra, _ in self.canales:
+            n = self.pulsos[letra]
+            media = self.suma_vp[letra] / n if n else 0.0
+            varianza = max(self.suma_vp2[letra] / n - media * media, 0.0) if n else 0.0
+            canales[letra] = {
+                "pulsos": n,
+                "tasa_s": n / duracion_s if duracion_s > 0 else 0.0,
+                "media_mv": media * ZMODADC1410_RESOLUTION,
+                "desvio_mv": varianza ** 0.5 * ZMODADC1410_RESOLUTION,
+            }
+        return {
+            "archivo": ruta,
+            "frames": self.frames,
+            "overflows": self.overflows,
+            "duracion_s": duracion_s,
+            "canales": canales,
+            "segundos_proceso": segundos,
+        }
+
+
+def _imprimir_resumen(r: Dict):
+    print(f"[CLI] {r['archivo']}: {r['frames']:,} frames, {r['overflows']:,} overflows, "
+          f"{r['duracion_s']:.3f} s de ensayo")
+    for letra, c in r["canales"].items():
+        print(f"\tCanal {letra}: {c['pulsos']:,} pulsos, {c['tasa_s']:,.1f} /s, "
+              f"{c['media_mv']:.1f} ± {c['desvio_mv']:.1f} mV")
+
+
+# ====================================================================
+#                            HISTOGRAMA
+# ====================================================================
+def _escribir_histograma(ruta: str, acumulador, minv: int, maxv: int, paso: int):
+    """CSV con un bin por fila y una columna de cuentas por canal."""
+    import numpy as np
+    from core.procesar_datos import CANAL_A, CANAL_B
+    bordes, conteos_a = acumulador.histograma(CANAL_A, minv, maxv, paso)
+    _, conteos_b = acumulador.histograma(CANAL_B, minv, maxv, paso)
+    filas = np.column_stack([bordes[:-1], bordes[1:], conteos_a, conteos_b])
+    with open(ruta, "w", newline="") as f:
+        f.write("Bin inicio (mV),Bin fin (mV),Canal A,Canal B\r\n")
+        f.writelines("%g,%g,%d,%d\r\n" % tuple(fila) for fila in filas.tolist())
+
+
+# ====================================================================
+#                            COMANDOS
+# ====================================================================
+def _procesar(ruta: str, args, convertir: bool, histograma: bool, resumen: bool) -> Optional[Dict]:
+    """Una sola lectura del .bin para todo lo pedido (conversión, histograma y/o resumen)."""
+    from core.procesar_datos import ProcesaDatosTAR, leer_lotes_bin
+    from core.histograma import AcumuladorHistograma
+
+    t0 = time.perf_counter()
+    carpeta = args.salida or os.path.dirname(os.path.abspath(ruta))
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    acumulador = AcumuladorHistograma() if histograma else None
+    estadisticos = _Resumen() if resumen else None
+
+    def on_lote(lote):
+        if acumulador is not None:
+            acumulador.acumular(lote["chan"], lote["vp_counts"])
+        if estadisticos is not None:
+            estadisticos.acumular(lote)
+
+    if convertir:
+        proc = ProcesaDatosTAR(carpeta_bin=None, carpeta_csv=carpeta)
+        csv_paths = proc.reprocesar_streaming(ruta, output_prefix=nombre, on_lote=on_lote)
+        if not csv_paths:
+            return None
+    else:
+        try:
+            for lote, _, _ in leer_lotes_bin(ruta):
+                on_lote(lote)
+        except OSError as e:
+            print(f"ERROR leyendo {ruta}: {e}")
+            return None
+
+    if acumulador is not None:
+        os.makedirs(carpeta, exist_ok=True)
+        ruta_hist = os.path.join(carpeta, f"{nombre}_histograma.csv")
+        _escribir_histograma(ruta_hist, acumulador, args.min, args.max, args.bin)
+        print(f"[CLI] Histograma guardado en: {ruta_hist}")
+
+    if estadisticos is None:
+        return {}
+    return estadisticos.como_dict(ruta, time.perf_counter() - t0)
+
+
+def _ejecutar(args, convertir: bool, histograma: bool, resumen: bool) -> int:
+    rutas = expandir_entradas(args.archivos)
+    if not rutas:
+        print("[CLI] No se encontraron archivos .bin")
+        return 1
+    if args.salida:
+        os.makedirs(args.salida, exist_ok=True)
+    if histograma and (args.bin <= 0 or args.max - args.min < args.bin):
+        print(f"[CLI] Rango de histograma inválido: min={args.min} max={args.max} bin={args.bin}")
+        return 1
+
+    t0 = time.perf_counter()
+    resumenes, fallidos = [], 0
+    for ruta in rutas:
+        resultado = _procesar(ruta, args, convertir, histograma, resumen)
+        if resultado is None:
+            fallidos += 1
+        elif resultado:
+            resumenes.append(resultado)
+            if not getattr(args, "json", False):
+                _imprimir_resumen(resultado)
+
+    if getattr(args, "json", False):
+        json.dump(resumenes, sys.stdout, indent=2)
+        print()
+    print(f"[CLI] {len(rutas) - fallidos}/{len(rutas)} archivos en {time.perf_counter() - t0:.2f} s",
+          file=sys.stderr if getattr(args, "json", False) else sys.stdout)
+    return 1 if fallidos else 0
+
+
+def _agregar_histograma(parser: argparse.ArgumentParser):
+    parser.add_argument("--min", type=int, default=HIST_MIN_MV, help="mV")
+    parser.add_argument("--max", type=int, default=HIST_MAX_MV, help="mV")
+    parser.add_argument("--bin", type=int, default=HIST_BIN_MV, help="intervalo en mV")
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m core.cli",
+                                     description="Conversión y análisis de archivos .bin del TAR (sin GUI)")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    p = comandos.add_parser("convertir", help=".bin → CSV por canal (memoria constante)")
+    p.add_argument("archivos", nargs="+", help=".bin, carpetas o patrones glob")
+    p.add_argument("--salida", default=None, help="carpeta de salida (por defecto, junto a cada .bin)")
+    p.add_argument("--histograma", action="store_true", help="exportar también el histograma")
+    p.add_argument("--resumen", action="store_true", help="mostrar también el resumen por archivo")
+    _agregar_histograma(p)
+
+    p = comandos.add_parser("histograma", help="histograma de amplitudes por canal a CSV")
+    p.add_argument("archivos", nargs="+", help=".bin, carpetas o patrones glob")
+    p.add_argument("--salida", default=None, help="carpeta de salida (por defecto, junto a cada .bin)")
+    _agregar_histograma(p)
+
+    p = comandos.add_parser("resumen", help="frames, overflows, pulsos, tasa y amplitud media por canal")
+    p.add_argument("archivos", nargs="+", help=".bin, carpetas o patrones glob")
+    p.add_argument("--json", action="store_true", help="salida en JSON (stdout)")
+    p.set_defaults(salida=None)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = crear_parser().parse_args(argv)
+    if args.comando == "convertir":
+        return _ejecutar(args, convertir=True, histograma=args.histograma, resumen=args.resumen)
+    if args.comando == "histograma":
+        return _ejecutar(args, convertir=False, histograma=True, resumen=False)
+    return _ejecutar(args, convertir=False, histograma=False, resumen=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
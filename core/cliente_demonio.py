@@ -0,0 +1,373 @@
+"""
+Cliente del demonio de adquisición (core.demonio), para la ventana con --demonio.
+
+ClienteDemonio expone los mismos métodos que SesionAdquisicion (conectar, aplicar_umbrales,
+iniciar_ensayo, ...) enviándolos como pedidos por el socket, y mantiene en EspejoProcesador
+una copia local y acotada de los eventos que transmite el demonio, con la interfaz de lectura
+de ProcesaDatosTAR que usan los paneles. La adquisición y los archivos quedan en el demonio:
+si la ventana se cierra, al volver a abrirla se recuperan los acumulados y la suscripción
+sigue desde ahí.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from core.adquisicion import VENTANA_COINCIDENCIA_NS
+from core.coincidencias import MotorCoincidencias
+from core.demonio import (
+    enviar_mensaje, leer_mensaje, columnas_lote, demonio_activo, ruta_socket_por_defecto,
+)
+from core.histograma import AcumuladorHistograma
+from core.metricas import RegistroMetricas
+from core.registro_eventos import VistaEventos, concatenar_vistas
+
+# Eventos que conserva el espejo para los paneles que todavía no los leyeron
+MAX_EVENTOS_ESPEJO = 1 << 21
+
+# Los frames crudos quedan en el demonio: las vistas del espejo no los traen
+_SIN_CRUDO = np.empty(0, dtype=np.uint8)
+
+
+# ====================================================================
+#                  MÉTRICAS DEL DEMONIO + TIEMPOS LOCALES
+# ====================================================================
+class MetricasCliente(RegistroMetricas):
+    """
+    Tiempos propios de la ventana (redibujos, arranque) más, en cada instantánea, las
+    métricas que el demonio envía con su estado (serie, cola, decodificación, guardado).
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.remotas: Dict = {}
+
+    def instantanea(self) -> Dict:
+        local = super().instantanea()
+        if not self.remotas:
+            return local
+        return dict(self.remotas, tiempos={**self.remotas.get("tiempos", {}), **local["tiempos"]})
+
+
+# ====================================================================
+#                ESPEJO LOCAL DE LOS EVENTOS DEL DEMONIO
+# ====================================================================
+class EspejoProcesador:
+    """
+    Eventos recibidos por la suscripción, con índices absolutos iguales a los del demonio.
+    Se conservan a lo sumo 'max_eventos' (los paneles leen cada uno o pocos segundos); un
+    lector que quedó antes de lo conservado recibe desde lo más viejo que hay, igual que
+    ProcesaDatosTAR.registros_nuevos_desde. Las coincidencias se resuelven acá sobre los
+    mismos eventos, partiendo de la grilla 2D que tenía el demonio al conectarse; solo pueden
+    diferir los pocos pares con un pulso a cada lado de ese instante (dentro de la ventana).
+    """
+
+    def __init__(self, metricas: Optional[RegistroMetricas] = None, max_eventos: int = MAX_EVENTOS_ESPEJO):
+        self.metricas = metricas
+        self.max_eventos = max_eventos
+        self.coincidencias = MotorCoincidencias(VENTANA_COINCIDENCIA_NS)
+        self.generacion = 0                 # cambia cuando el demonio descarta sus datos
+        self._generacion_remota: Optional[int] = None
+        self._tramos: List[Tuple[int, VistaEventos]] = []
+        self._eventos = 0
+        self._fin = 0
+        self._lock = threading.Lock()
+
+    def reiniciar(self, generacion_remota: int, fin: int = 0, histograma_2d: Optional[np.ndarray] = None,
+                  total_pares: int = 0):
+        """Descarta lo recibido y sigue desde 'fin' (opcionalmente con la grilla 2D del demonio)."""
+        with self._lock:
+            self._reiniciar(generacion_remota, fin)
+            if histograma_2d is not None:
+                self.coincidencias.histograma.conteos += histograma_2d
+                self.coincidencias.total_pares = total_pares
+
+    def _reiniciar(self, generacion_remota: int, fin: int):
+        self._tramos = []
+        self._eventos = 0
+        self._fin = fin
+        self.coincidencias.reiniciar()
+        self._generacion_remota = generacion_remota
+        self.generacion += 1
+
+    def agregar(self, inicio: int, generacion_remota: int, ts_abs_ns: np.ndarray, chan: np.ndarray,
+                vp_counts: np.ndarray):
+        with self._lock:
+            if generacion_remota != self._generacion_remota:
+                self._reiniciar(generacion_remota, 0)
+            self._tramos.append((inicio, VistaEventos(ts_abs_ns, chan, vp_counts, _SIN_CRUDO)))
+            self._eventos += len(chan)
+            self._fin = inicio + len(chan)
+            self.coincidencias.acumular(chan, ts_abs_ns, vp_counts)
+
+            while len(self._tramos) > 1 and self._eventos - len(self._tramos[0][1]) >= self.max_eventos:
+                self._eventos -= len(self._tramos.pop(0)[1])
+
+    def sincronizar_generacion(self, generacion_remota: int):
+        """Un clear() en el demonio sin eventos nuevos también reinicia a los paneles."""
+        with self._lock:
+            if generacion_remota != self._generacion_remota:
+                self._reiniciar(generacion_remota, 0)
+
+    # -------------------------
+    # Interfaz de lectura de ProcesaDatosTAR
+    # -------------------------
+    def registros_nuevos_desde(self, indice: int) -> VistaEventos:
+        with self._lock:
+            partes = []
+            for inicio, v in self._tramos:
+                if inicio + len(v) <= indice:
+                    continue
+                desde = max(indice - inicio, 0)
+                partes.append(VistaEventos(v.ts_abs_ns[desde:], v.chan[desde:], v.vp_counts[desde:], _SIN_CRUDO))
+            if not partes:
+                return VistaEventos(np.empty(0, np.int64), np.empty(0, np.uint8), np.empty(0, np.uint16),
+                                    _SIN_CRUDO, self._fin)
+            return concatenar_vistas(partes, self._fin)
+
+    def total_registros(self) -> int:
+        with self._lock:
+            return self._fin
+
+    def histograma_coincidencias(self, total_previo: int = -1) -> Tuple[int, Optional[np.ndarray]]:
+        with self._lock:
+            self.coincidencias.adelantar()
+            total = self.coincidencias.total_pares
+            if total == total_previo:
+                return total, None
+            return total, self.coincidencias.histograma.conteos.copy()
+
+    def pares_coincidentes(self) -> int:
+        with self._lock:
+            self.coincidencias.adelantar()
+            return self.coincidencias.total_pares
+
+
+# ====================================================================
+#                          CLIENTE
+# ====================================================================
+class ClienteDemonio:
+    """
+    Pedidos por una conexión (desde el hilo de la interfaz) y suscripción por otra, leída en
+    un hilo propio que solo agrega al espejo y guarda el último estado: la interfaz nunca
+    espera a la transmisión de eventos.
+    """
+
+    remota = True
+
+    def __init__(self, ruta_socket: Optional[str] = None, timeout: float = 30.0):
+        self.ruta_socket = ruta_socket or ruta_socket_por_defecto()
+        self.timeout = timeout
+        self.metricas = MetricasCliente()
+        self.process = EspejoProcesador(self.metricas)
+        self.resumen_inicial: Optional[AcumuladorHistograma] = None
+        self.estado_remoto: Dict = {}
+        self._t_estado = 0.0
+        self.perdido = False                # se cortó la conexión con el demonio
+
+        self._sock: Optional[socket.socket] = None
+        self._lector = None
+        self._lock = threading.Lock()
+        self._sock_suscripcion: Optional[socket.socket] = None
+        self._desde = 0
+
+    # -------------------------
+    # Conexión con el demonio
+    # -------------------------
+    def abrir(self, lanzar: bool = False) -> bool:
+        """Se conecta (arrancando el demonio si 'lanzar' y no hay uno) y trae estado y acumulados."""
+        if lanzar and not demonio_activo(self.ruta_socket):
+            print(f"[Cliente] No hay demonio en {self.ruta_socket}: arrancando uno")
+            if not lanzar_demonio(self.ruta_socket):
+                print("[Cliente] El demonio no arrancó")
+                return False
+        try:
+            self._sock = self._conectar_socket()
+        except OSError as e:
+            print(f"[Cliente] No se pudo conectar al demonio en {self.ruta_socket}: {e}")
+            return False
+        self._lector = self._sock.makefile("rb")
+
+        if self.comando("estado") is None:
+            return False
+        return self._traer_acumulados()
+
+    def _conectar_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.ruta_socket)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _traer_acumulados(self) -> bool:
+        """Histograma por canal y grilla 2D del demonio, y el índice desde el que suscribirse."""
+        leido = self._pedir({"comando": "acumulados"})
+        if leido is None:
+            return False
+        r, carga = leido
+        conteos = np.frombuffer(carga, dtype="<i8")
+        niveles, pos = r["niveles"], 0
+        if r["canales"]:
+            self.resumen_inicial = AcumuladorHistograma(r["canales"])
+            for ch in r["canales"]:
+                self.resumen_inicial.conteos[ch][:] = conteos[pos:pos + niveles]
+                pos += niveles
+        grilla = None
+        if r["bins_2d"]:
+            grilla = conteos[pos:].reshape(r["bins_2d"], r["bins_2d"])
+        self.process.reiniciar(r["generacion"], r["fin"], grilla, r["total_pares"])
+        self._desde = r["fin"]
+        print(f"[Cliente] Conectado al demonio: {r['fin']:,} eventos previos, {r['total_pares']:,} pares")
+        return True
+
+    def suscribir(self):
+        """Empieza a recibir los lotes desde donde cubren los acumulados (ver abrir)."""
+        try:
+            self._sock_suscripcion = self._conectar_socket()
+            self._sock_suscripcion.settimeout(None)
+            enviar_mensaje(self._sock_suscripcion.sendall, {"comando": "suscribir", "desde": self._desde})
+        except OSError as e:
+            print(f"[Cliente] No se pudo suscribir: {e}")
+            self.perdido = True
+            return
+        threading.Thread(target=self._recibir, daemon=True).start()
+
+    def _recibir(self):
+        lector = self._sock_suscripcion.makefile("rb")
+        try:
+            while True:
+                leido = leer_mensaje(lector)
+                if leido is None:
+                    break
+                mensaje, carga = leido
+                if mensaje["evento"] == "lote":
+                    ts, chan, vp = columnas_lote(carga, mensaje["n"])
+                    self.process.agregar(mensaje["inicio"], mensaje["generacion"], ts, chan, vp)
+                elif mensaje["evento"] == "estado":
+                    self._actualizar_estado(mensaje)
+                    self.process.sincronizar_generacion(mensaje["generacion"])
+        except (OSError, ValueError) as e:
+            print(f"[Cliente] Error en la suscripción: {e}")
+        self.perdido = True
+        print("[Cliente] Se perdió la conexión con el demonio")
+
+    def _actualizar_estado(self, estado: Dict):
+        self.estado_remoto = estado
+        self._t_estado = time.monotonic()
+        self.metricas.remotas = estado.get("metricas") or {}
+
+    def _pedir(self, pedido: Dict) -> Optional[Tuple[Dict, bytes]]:
+        with self._lock:
+            try:
+                enviar_mensaje(self._sock.sendall, pedido)
+                leido = leer_mensaje(self._lector)
+            except (OSError, ValueError) as e:
+                leido = None
+                print(f"[Cliente] Error en '{pedido['comando']}': {e}")
+        if leido is None:
+            self.perdido = True
+            return None
+        if not leido[0].get("ok"):
+            print(f"[Cliente] El demonio rechazó '{pedido['comando']}': {leido[0].get('error')}")
+            return None
+        return leido
+
+    def comando(self, nombre: str, **args) -> Optional[Dict]:
+        """Envía un pedido y devuelve la respuesta (None si falló); tras cada uno se refresca el estado."""
+        leido = self._pedir(dict(args, comando=nombre))
+        if leido is None:
+            return None
+        if nombre != "estado":
+            estado = self._pedir({"comando": "estado"})
+            if estado is not None:
+                self._actualizar_estado(estado[0])
+        else:
+            self._actualizar_estado(leido[0])
+        return leido[0]
+
+    def cerrar(self):
+        """Cierra las conexiones; el demonio y su ensayo siguen."""
+        for sock in (self._sock, self._sock_suscripcion):
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    # -------------------------
+    # Misma interfaz que SesionAdquisicion
+    # -------------------------
+    @property
+    def puerto(self) -> Optional[str]:
+        return self.estado_remoto.get("puerto")
+
+    @property
+    def umbrales(self) -> Optional[Dict[str, int]]:
+        return self.estado_remoto.get("umbrales")
+
+    @property
+    def ensayo_activo(self) -> bool:
+        return bool(self.estado_remoto.get("ensayo_activo"))
+
+    @property
+    def ensayo_dir(self) -> Optional[Path]:
+        ruta = self.estado_remoto.get("ensayo_dir")
+        return Path(ruta) if ruta else None
+
+    def conectar(self, puerto: str) -> bool:
+        r = self.comando("conectar", puerto=puerto)
+        return bool(r and r["conectado"])
+
+    def desconectar(self):
+        self.comando("desconectar")
+
+    def conectado(self) -> bool:
+        """Según el último estado (la suscripción lo renueva cada segundo): no espera al demonio."""
+        return not self.perdido and bool(self.estado_remoto.get("conectado"))
+
+    def aplicar_umbrales(self, params: Dict[str, int]):
+        self.comando("umbrales", params=params)
+
+    def iniciar_ensayo(self, duracion_seg: int, columnar: bool = False, contenedor: bool = False) -> Optional[Path]:
+        r = self.comando("iniciar_ensayo", duracion_seg=duracion_seg, columnar=columnar, contenedor=contenedor)
+        return Path(r["ensayo_dir"]) if r else None
+
+    def restante_seg(self) -> float:
+        """Lo que informó el demonio en su último estado, descontado el tiempo desde entonces."""
+        if not self.ensayo_activo:
+            return 0.0
+        return max(self.estado_remoto.get("restante_seg", 0.0) - (time.monotonic() - self._t_estado), 0.0)
+
+    def finalizar_ensayo(self):
+        self.comando("finalizar_ensayo")
+
+    def limpiar(self):
+        self.comando("limpiar")
+
+
+def lanzar_demonio(ruta_socket: str, espera_seg: float = 10.0) -> bool:
+    """
+    Arranca 'python -m core.demonio' en su propia sesión, para que siga corriendo al cerrar la
+    ventana, con la salida en <socket>.log; espera hasta que acepte conexiones.
+    """
+    raiz = Path(__file__).resolve().parent.parent
+    with open(ruta_socket + ".log", "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-u", "-m", "core.demonio", "--socket", ruta_socket],
+            cwd=str(raiz), stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    limite = time.monotonic() + espera_seg
+    while time.monotonic() < limite:
+        if demonio_activo(ruta_socket):
+            return True
+        time.sleep(0.1)
+    return False
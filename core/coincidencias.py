@@ -0,0 +1,212 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.protocolo import CANAL_A, CANAL_B
+from core.base_tiempo import BaseTiempoContinua
+from core.histograma import AcumuladorHistograma2D
+
+
+def _vacio() -> Dict[str, np.ndarray]:
+    return {
+        "ts_a": np.empty(0, np.int64), "vp_a": np.empty(0, np.uint16),
+        "ts_b": np.empty(0, np.int64), "vp_b": np.empty(0, np.uint16),
+        "delta_ns": np.empty(0, np.int64),
+    }
+
+
+# ====================================================================
+#                 COINCIDENCIAS A / B EN TIEMPO REAL
+# ====================================================================
+class MotorCoincidencias:
+    """
+    Empareja pulsos del Canal A y del Canal B separados a lo sumo 'ventana_ns', sobre el flujo
+    decodificado (en orden de llegada). Cada pulso A se empareja con el B más cercano dentro
+    de la ventana, y cada B se usa una sola vez (si varios A eligen el mismo B, queda el más
+    cercano). Todo se resuelve con searchsorted sobre los lotes, sin recorrer eventos en Python.
+
+    Un A se decide recién cuando el flujo avanzó más de 'ventana_ns' después de él (ya llegaron
+    todos sus posibles B); mientras tanto queda pendiente junto con los B que todavía pueden
+    emparejarse, de un lote al siguiente y a través de los guardados. Las comparaciones usan
+    una base de tiempo continua (BaseTiempoContinua); los pares conservan el ts_abs_ns
+    original, el mismo que aparece en los CSV de cada canal.
+    Además se acumula la grilla 2D de amplitudes A contra B de los pares ('histograma').
+    """
+
+    def __init__(self, ventana_ns: int, canal_a: int = CANAL_A, canal_b: int = CANAL_B,
+                 eventos_por_paso: int = 1 << 14):
+        if ventana_ns <= 0:
+            raise ValueError(f"Ventana de coincidencia inválida: {ventana_ns} ns")
+        self.ventana_ns = int(ventana_ns)
+        # Los lotes chicos (un chunk serie) se juntan hasta esta cantidad antes de resolver:
+        # el resultado no cambia y el costo fijo por paso se reparte entre más eventos
+        self.eventos_por_paso = eventos_por_paso
+        self.canal_a = canal_a
+        self.canal_b = canal_b
+        self.base = BaseTiempoContinua()
+        self.histograma = AcumuladorHistograma2D()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.base.reiniciar()
+        self.histograma.reiniciar()
+        # Pendientes por canal: tiempo continuo, ts_abs_ns original y vp_counts
+        self._a = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.uint16))
+        self._b = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.uint16))
+        self._pares: List[Dict[str, np.ndarray]] = []
+        self._entrantes: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._n_entrantes = 0
+        self.total_pares = 0
+        self.total_a = 0
+        self.total_b = 0
+
+    # -------------------------
+    # Entrada
+    # -------------------------
+    def acumular(self, chan: np.ndarray, ts_abs_ns: np.ndarray, vp_counts: np.ndarray):
+        """
+        Agrega un lote de eventos (columnas del registro; los CH=3 se ignoran). Las columnas
+        se guardan sin copiar hasta juntar 'eventos_por_paso': no deben modificarse después.
+        """
+        if not len(chan):
+            return
+        self._entrantes.append((chan, ts_abs_ns, vp_counts))
+        self._n_entrantes += len(chan)
+        if self._n_entrantes >= self.eventos_por_paso:
+            self._procesar_entrantes()
+
+    def _procesar_entrantes(self):
+        if not self._entrantes:
+            return
+        entrantes, self._entrantes, self._n_entrantes = self._entrantes, [], 0
+        if len(entrantes) == 1:
+            chan, ts_abs_ns, vp_counts = entrantes[0]
+        else:
+            chan, ts_abs_ns, vp_counts = (np.concatenate(c) for c in zip(*entrantes))
+
+        # Índices en lugar de máscaras booleanas: se usan varias veces y el take es mucho más barato
+        es_a = chan == self.canal_a
+        pulsos = np.flatnonzero(es_a | (chan == self.canal_b))
+        if not len(pulsos):
+            return
+
+        ts = ts_abs_ns[pulsos]
+        continuo = self.base.continuar(ts)
+        vp = vp_counts[pulsos]
+        es_a = es_a[pulsos]
+        ia = np.flatnonzero(es_a)
+        ib = np.flatnonzero(~es_a)
+
+        self._a = self._unir(self._a, continuo[ia], ts[ia], vp[ia])
+        self._b = self._unir(self._b, continuo[ib], ts[ib], vp[ib])
+        self.total_a += len(ia)
+        self.total_b += len(ib)
+
+        self._resolver(int(continuo.max()))
+
+    def adelantar(self):
+        """Resuelve ya lo juntado, sin esperar a 'eventos_por_paso' (el resultado no cambia)."""
+        self._procesar_entrantes()
+
+    def vaciar(self):
+        """Fin del flujo: resuelve todos los pendientes."""
+        self._procesar_entrantes()
+        self._resolver(None)
+
+    @staticmethod
+    def _unir(pendiente, continuo, ts, vp):
+        if not len(continuo):
+            return pendiente
+        columnas = tuple(np.concatenate([p, n]) for p, n in zip(pendiente, (continuo, ts, vp)))
+        # El flujo llega ordenado salvo desórdenes mínimos entre canales: se ordena solo si hace falta
+        if len(columnas[0]) > 1 and np.any(np.diff(columnas[0]) < 0):
+            orden = np.argsort(columnas[0], kind="stable")
+            columnas = tuple(c[orden] for c in columnas)
+        return columnas
+
+    # -------------------------
+    # Emparejamiento
+    # -------------------------
+    def _resolver(self, ultimo: Optional[int]):
+        """
+        Decide lo que ya no puede cambiar con eventos futuros, dado el último tiempo visto
+        ('ultimo'; None = fin del flujo). Con W = ventana:
+         - la elección de un A (su B más cercano) es definitiva si ta < ultimo - W;
+         - un B se asigna cuando tb < ultimo - 2W: todos los A que pueden elegirlo ya eligieron.
+        Así el resultado es el mismo sin importar cómo se corte el flujo en lotes.
+        """
+        w = self.ventana_ns
+        ta, ts_a, vp_a = self._a
+        tb, ts_b, vp_b = self._b
+
+        completos = len(ta) if ultimo is None else int(np.searchsorted(ta, ultimo - w, side="left"))
+        pendientes = np.ones(len(ta), dtype=bool)
+        usados = np.zeros(len(tb), dtype=bool)
+
+        if completos and len(tb):
+            t = ta[:completos]
+            # B más cercano a cada A: el anterior o el siguiente en el orden de tiempos
+            derecha = np.searchsorted(tb, t, side="left")
+            izquierda = np.maximum(derecha - 1, 0)
+            derecha = np.minimum(derecha, len(tb) - 1)
+            d_izq = np.abs(tb[izquierda] - t)
+            d_der = np.abs(tb[derecha] - t)
+            elegido = np.where(d_der < d_izq, derecha, izquierda)
+            distancia = np.minimum(d_izq, d_der)
+
+            en_ventana = distancia <= w
+            asignable = en_ventana if ultimo is None else en_ventana & (tb[elegido] < ultimo - 2 * w)
+            pendientes[:completos] = en_ventana & ~asignable    # su B todavía puede recibir otros A
+
+            candidatos = np.flatnonzero(asignable)
+            if len(candidatos):
+                # Un B por par: si varios A lo eligieron, queda el más cercano (y el primero ante empate)
+                orden = np.lexsort((candidatos, distancia[candidatos], elegido[candidatos]))
+                candidatos = candidatos[orden]
+                primeros = np.ones(len(candidatos), dtype=bool)
+                primeros[1:] = elegido[candidatos][1:] != elegido[candidatos][:-1]
+                ganadores = np.sort(candidatos[primeros])
+
+                ib = elegido[ganadores]
+                usados[ib] = True
+                self._agregar_pares(ta[ganadores], ts_a[ganadores], vp_a[ganadores], ts_b[ib], vp_b[ib],
+                                    tb[ib] - ta[ganadores])
+        elif completos:
+            pendientes[:completos] = False      # sin ningún B: los A completos quedan sin par
+
+        # Pendientes: los A sin decidir, y los B libres que todavía pueden emparejarse
+        self._a = (ta[pendientes], ts_a[pendientes], vp_a[pendientes])
+        if ultimo is None:
+            self._b = (tb[:0], ts_b[:0], vp_b[:0])
+            return
+        limite_b = (self._a[0][0] if len(self._a[0]) else ultimo) - 2 * w
+        libres = ~usados & (tb >= limite_b)
+        self._b = (tb[libres], ts_b[libres], vp_b[libres])
+
+    def _agregar_pares(self, t_a, ts_a, vp_a, ts_b, vp_b, delta_ns):
+        self._pares.append({"t_a": t_a, "ts_a": ts_a, "vp_a": vp_a, "ts_b": ts_b, "vp_b": vp_b, "delta_ns": delta_ns})
+        self.total_pares += len(ts_a)
+        self.histograma.acumular(vp_a, vp_b)
+
+    # -------------------------
+    # Salida
+    # -------------------------
+    def tomar_pares(self) -> Dict[str, np.ndarray]:
+        """Entrega los pares resueltos desde la última llamada (columnas) y los quita del motor."""
+        self._procesar_entrantes()
+        pares, self._pares = self._pares, []
+        if not pares:
+            return _vacio()
+        # Ordenados por tiempo de A (un A con su B todavía abierto puede resolverse después que uno posterior)
+        orden = np.argsort(np.concatenate([p["t_a"] for p in pares]), kind="stable")
+        return {clave: np.concatenate([p[clave] for p in pares])[orden] for clave in _vacio()}
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "ventana_ns": self.ventana_ns,
+            "pares": self.total_pares,
+            "pulsos_a": self.total_a,
+            "pulsos_b": self.total_b,
+            "pendientes_a": len(self._a[0]),
+            "pendientes_b": len(self._b[0]),
+        }
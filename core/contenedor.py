@@ -0,0 +1,180 @@
+from typing import Dict, List, Optional
+import os
+import struct
+import threading
+
+import numpy as np
+
+from core.protocolo import FRAME_SIZE, T_PERIOD, CANAL_A, CANAL_B
+from core.registro_eventos import VistaEventos
+from core.procesar_datos import decodificar_lote
+
+# ====================================================================
+#            CONTENEDOR ÚNICO POR ENSAYO + ÍNDICE DE SEGMENTOS
+# ====================================================================
+# <base>.bin: frames crudos de todo el ensayo, agregados en orden (es el flujo serie tal cual,
+#             así que cualquier herramienta que lea .bin lo decodifica con base de tiempo continua).
+# <base>.idx: encabezado "TARI" + versión + tamaño de registro, y un registro por segmento
+#             (un segmento = un autoguardado):
+#   byte_inicio, eventos, pulsos A, pulsos B, overflows, ts_min_ns, ts_max_ns, offset_inicio
+#   offset_inicio es el offset de CH=3 acumulado antes del segmento, para decodificarlo suelto.
+MAGIC_INDICE = b"TARI"
+VERSION_INDICE = 1
+_ENCABEZADO_INDICE = struct.Struct("<4sHH")
+_SEGMENTO = struct.Struct("<QQQQQqqQ")
+CAMPOS_SEGMENTO = (
+    "byte_inicio", "eventos", "pulsos_a", "pulsos_b", "overflows", "ts_min_ns", "ts_max_ns", "offset_inicio",
+)
+
+
+class ContenedorEnsayo:
+    """
+    Registro de un ensayo en un único archivo creciente con índice lateral. Cada guardado
+    agrega un segmento; como el procesador no reinicia el offset en este modo, 'ts_abs_ns'
+    es continuo en todo el ensayo y eventos_entre(t0, t1) se resuelve con búsqueda binaria
+    sobre el índice y una lectura posicionada, sin abrir un archivo por parte.
+    Si el contenedor ya existe se continúa (se lee el índice y se sigue agregando).
+    """
+
+    def __init__(self, ruta_base: str):
+        self.ruta_bin = ruta_base + ".bin"
+        self.ruta_indice = ruta_base + ".idx"
+        os.makedirs(os.path.dirname(os.path.abspath(self.ruta_bin)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._segmentos: List[tuple] = []
+        self._bytes = 0
+        self._offset = 0        # offset de CH=3 al final del último segmento
+
+        if os.path.exists(self.ruta_indice):
+            self._leer_indice()
+        else:
+            with open(self.ruta_indice, "wb") as f:
+                f.write(_ENCABEZADO_INDICE.pack(MAGIC_INDICE, VERSION_INDICE, _SEGMENTO.size))
+            open(self.ruta_bin, "wb").close()
+
+    # -------------------------
+    # Índice
+    # -------------------------
+    def _leer_indice(self):
+        with open(self.ruta_indice, "rb") as f:
+            datos = f.read()
+        magic, version, tam = _ENCABEZADO_INDICE.unpack_from(datos)
+        if magic != MAGIC_INDICE or version != VERSION_INDICE or tam != _SEGMENTO.size:
+            raise ValueError(f"Índice inválido o de otra versión: {self.ruta_indice}")
+
+        cuerpo = datos[_ENCABEZADO_INDICE.size:]
+        completos = len(cuerpo) // _SEGMENTO.size     # un registro truncado (corte) se ignora
+        self._segmentos = [_SEGMENTO.unpack_from(cuerpo, i * _SEGMENTO.size) for i in range(completos)]
+        if self._segmentos:
+            ultimo = dict(zip(CAMPOS_SEGMENTO, self._segmentos[-1]))
+            self._bytes = ultimo["byte_inicio"] + ultimo["eventos"] * FRAME_SIZE
+            self._offset = ultimo["offset_inicio"] + ultimo["overflows"] * T_PERIOD
+
+        # Datos escritos después del último registro del índice no están indexados: se descartan
+        if os.path.getsize(self.ruta_bin) != self._bytes:
+            with open(self.ruta_bin, "r+b") as f:
+                f.truncate(self._bytes)
+
+    @property
+    def offset_final(self) -> int:
+        """Offset de CH=3 acumulado al final del contenedor (con él continúa el procesador)."""
+        return self._offset
+
+    def segmentos(self) -> List[Dict]:
+        with self._lock:
+            return [dict(zip(CAMPOS_SEGMENTO, s)) for s in self._segmentos]
+
+    # -------------------------
+    # Escritura
+    # -------------------------
+    def agregar_segmento(self, vista: VistaEventos) -> Optional[Dict]:
+        """Agrega los frames de 'vista' al contenedor y su registro al índice (primero los datos)."""
+        n = len(vista)
+        if n == 0:
+            return None
+
+        chan = vista.chan
+        pulsos = (chan == CANAL_A) | (chan == CANAL_B)
+        ts = vista.ts_abs_ns[pulsos]
+        overflows = int(np.count_nonzero(chan == 3))
+
+        with self._lock:
+            with open(self.ruta_bin, "ab") as f:
+                f.write(vista.raw)
+            registro = (
+                self._bytes,
+                n,
+                int(np.count_nonzero(chan == CANAL_A)),
+                int(np.count_nonzero(chan == CANAL_B)),
+                overflows,
+                int(ts.min()) if len(ts) else 0,
+                int(ts.max()) if len(ts) else 0,
+                self._offset,
+            )
+            with open(self.ruta_indice, "ab") as f:
+                f.write(_SEGMENTO.pack(*registro))
+
+            self._segmentos.append(registro)
+            self._bytes += n * FRAME_SIZE
+            self._offset += overflows * T_PERIOD
+        return dict(zip(CAMPOS_SEGMENTO, registro))
+
+    # -------------------------
+    # Consultas
+    # -------------------------
+    def eventos_entre(self, t0_ns: int, t1_ns: int) -> VistaEventos:
+        """
+        Pulsos (canal A y B) con t0_ns <= ts_abs_ns < t1_ns. Solo se leen y decodifican los
+        segmentos cuyo rango de tiempo se solapa con [t0, t1).
+        """
+        with self._lock:
+            segmentos = [s for s in self._segmentos if s[2] + s[3] > 0]
+        if not segmentos:
+            return _vista_vacia()
+
+        ts_min = np.array([s[5] for s in segmentos], dtype=np.int64)
+        ts_max = np.array([s[6] for s in segmentos], dtype=np.int64)
+        if np.all(ts_max[:-1] <= ts_min[1:]):
+            # Segmentos ordenados en el tiempo (base continua): búsqueda binaria
+            primero = int(np.searchsorted(ts_max, t0_ns, side="left"))
+            ultimo = int(np.searchsorted(ts_min, t1_ns, side="left"))
+        else:
+            # La base de tiempo se reinició en algún punto (p. ej. reinicio del TAR): solapamiento directo
+            solapados = np.flatnonzero((ts_max >= t0_ns) & (ts_min < t1_ns))
+            if not len(solapados):
+                return _vista_vacia()
+            primero, ultimo = int(solapados[0]), int(solapados[-1]) + 1
+        if primero >= ultimo:
+            return _vista_vacia()
+
+        inicio = segmentos[primero][0]
+        fin = segmentos[ultimo - 1][0] + segmentos[ultimo - 1][1] * FRAME_SIZE
+        with open(self.ruta_bin, "rb") as f:
+            f.seek(inicio)
+            datos = f.read(fin - inicio)
+
+        lote, _ = decodificar_lote(datos, segmentos[primero][7])
+        chan = lote["chan"]
+        ts = lote["ts_abs_ns"]
+        sel = ((chan == CANAL_A) | (chan == CANAL_B)) & (ts >= t0_ns) & (ts < t1_ns)
+        crudo = np.frombuffer(datos, dtype=np.uint8).reshape(-1, FRAME_SIZE)[sel].reshape(-1)
+        return VistaEventos(ts[sel], chan[sel], lote["vp_counts"][sel], crudo)
+
+    def resumen(self) -> Dict:
+        with self._lock:
+            segmentos = list(self._segmentos)
+        con_pulsos = [s for s in segmentos if s[2] + s[3] > 0]
+        return {
+            "segmentos": len(segmentos),
+            "bytes": self._bytes,
+            "eventos": sum(s[1] for s in segmentos),
+            "pulsos_a": sum(s[2] for s in segmentos),
+            "pulsos_b": sum(s[3] for s in segmentos),
+            "ts_min_ns": min((s[5] for s in con_pulsos), default=0),
+            "ts_max_ns": max((s[6] for s in con_pulsos), default=0),
+        }
+
+
+def _vista_vacia() -> VistaEventos:
+    return VistaEventos(np.empty(0, np.int64), np.empty(0, np.uint8), np.empty(0, np.uint16), np.empty(0, np.uint8))
@@ -0,0 +1,362 @@
+"""
+Demonio de adquisición sin interfaz gráfica, controlado por un socket local (Unix).
+
+Uso:
+    python -m core.demonio [--socket RUTA] [--carpeta ENSAYOS] [--puerto /dev/ttyUSB0]
+
+El demonio es dueño del puerto serie, de la decodificación y del autoguardado
+(SesionAdquisicion): si la ventana se cierra o se cae, el ensayo sigue y sus archivos se
+siguen escribiendo; al volver a abrirla (python main.py --demonio) se vuelve a conectar.
+Un ensayo termina solo al cumplirse su duración aunque no haya ningún cliente.
+
+Protocolo: cada mensaje es una línea JSON; si trae "bytes": N, le siguen N bytes binarios.
+Pedidos {"comando": ..., ...} y respuestas {"ok": true, ...} / {"ok": false, "error": ...}:
+    estado                                  puerto, ensayo en curso, índices y métricas
+    conectar {puerto} / desconectar         puerto serie
+    umbrales {params}                       UMBRAL CHA_MIN ... al firmware
+    iniciar_ensayo {duracion_seg, columnar, contenedor} / finalizar_ensayo / limpiar
+    acumulados                              histograma por canal + grilla 2D (binario) y su 'fin'
+    suscribir {desde}                       la conexión pasa a recibir lotes (ver transmitir)
+    apagar                                  cierra el ensayo en curso y termina el proceso
+"""
+from typing import Callable, Dict, Optional, Tuple
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from core.adquisicion import SesionAdquisicion, ENSAYOS_DIR
+
+# Eventos por mensaje de la suscripción y período con que se buscan eventos nuevos
+EVENTOS_POR_LOTE = 1 << 18
+PERIODO_SUSCRIPCION_SEG = 0.05
+PERIODO_ESTADO_SEG = 1.0
+
+# Columnas de cada lote en el cable: ts_abs_ns, chan, vp_counts (sin los frames crudos)
+DTYPES_LOTE = (np.dtype("<i8"), np.dtype("u1"), np.dtype("<u2"))
+
+
+def ruta_socket_por_defecto() -> str:
+    """Socket por usuario en XDG_RUNTIME_DIR (o en la carpeta temporal del sistema)."""
+    carpeta = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    usuario = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(carpeta, f"tar_adquisicion_{usuario}.sock")
+
+
+# ====================================================================
+#                     MENSAJES (JSON + CARGA BINARIA)
+# ====================================================================
+def _a_json(valor):
+    """Escalares de NumPy (indicadores de métricas) y rutas como valores JSON."""
+    return valor.item() if hasattr(valor, "item") else str(valor)
+
+
+def enviar_mensaje(escribir: Callable[[bytes], object], mensaje: Dict, carga: bytes = b""):
+    """Escribe el mensaje completo con 'escribir' (sendall del socket o write del manejador)."""
+    if carga:
+        mensaje = dict(mensaje, bytes=len(carga))
+    linea = json.dumps(mensaje, default=_a_json).encode() + b"\n"
+    escribir(linea + carga if carga else linea)
+
+
+def leer_mensaje(archivo) -> Optional[Tuple[Dict, bytes]]:
+    """Lee un mensaje y su carga; None si el otro extremo cerró la conexión."""
+    linea = archivo.readline()
+    if not linea:
+        return None
+    mensaje = json.loads(linea)
+    n = mensaje.get("bytes", 0)
+    carga = archivo.read(n) if n else b""
+    if len(carga) < n:
+        return None
+    return mensaje, carga
+
+
+def columnas_lote(carga: bytes, n: int):
+    """ts_abs_ns, chan, vp_counts de la carga de un lote (vistas sobre los bytes recibidos)."""
+    columnas, pos = [], 0
+    for dtype in DTYPES_LOTE:
+        columnas.append(np.frombuffer(carga, dtype=dtype, count=n, offset=pos))
+        pos += n * dtype.itemsize
+    return columnas
+
+
+# ====================================================================
+#                          DEMONIO
+# ====================================================================
+class _Manejador(socketserver.StreamRequestHandler):
+    """Un hilo por cliente: atiende pedidos hasta que se cierra la conexión o se suscribe."""
+
+    def handle(self):
+        demonio = self.server.demonio
+        try:
+            while True:
+                leido = leer_mensaje(self.rfile)
+                if leido is None:
+                    return
+                pedido, _ = leido
+                if pedido.get("comando") == "suscribir":
+                    demonio.transmitir(self.wfile.write, int(pedido.get("desde", 0)))
+                    return
+                respuesta, carga = demonio.ejecutar(pedido)
+                enviar_mensaje(self.wfile.write, respuesta, carga)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except ValueError as e:
+            print(f"[Demonio] Mensaje inválido: {e}")
+
+
+class DemonioAdquisicion:
+    """
+    Atiende clientes por un socket Unix (un hilo por conexión) y ejecuta sus pedidos sobre
+    una única SesionAdquisicion; los pedidos que cambian el estado se ejecutan de a uno.
+    El hilo principal controla la duración del ensayo en curso.
+    """
+
+    def __init__(self, ruta_socket: str, carpeta_ensayos=ENSAYOS_DIR):
+        self.ruta_socket = ruta_socket
+        self.sesion = SesionAdquisicion(carpeta_ensayos=carpeta_ensayos)
+        self._lock = threading.Lock()
+        self._apagar = threading.Event()
+        self.suscriptores = 0
+
+    # -------------------------
+    # Pedidos
+    # -------------------------
+    def ejecutar(self, pedido: Dict) -> Tuple[Dict, bytes]:
+        comando = pedido.get("comando")
+        metodo = getattr(self, f"_cmd_{comando}", None)
+        if metodo is None:
+            return {"ok": False, "error": f"Comando desconocido: {comando}"}, b""
+        try:
+            with self._lock:
+                respuesta, carga = metodo(pedido)
+        except Exception as e:
+            print(f"[Demonio] Error en '{comando}': {e}")
+            return {"ok": False, "error": str(e)}, b""
+        return dict(respuesta, ok=True), carga
+
+    def estado(self) -> Dict:
+        s = self.sesion
+        return {
+            "conectado": s.conectado(),
+            "puerto": s.puerto,
+            "umbrales": s.umbrales,
+            "ensayo_activo": s.ensayo_activo,
+            "ensayo_dir": str(s.ensayo_dir) if s.ensayo_dir else None,
+            "ensayo_duracion": s.ensayo_duracion,
+            "restante_seg": s.restante_seg(),
+            "total_registros": s.process.total_registros(),
+            "generacion": s.process.generacion,
+            "suscriptores": self.suscriptores,
+            "metricas": s.metricas.instantanea(),
+        }
+
+    def _cmd_estado(self, pedido):
+        return self.estado(), b""
+
+    def _cmd_conectar(self, pedido):
+        return {"conectado": self.sesion.conectar(pedido["puerto"])}, b""
+
+    def _cmd_desconectar(self, pedido):
+        self.sesion.desconectar()
+        return {}, b""
+
+    def _cmd_umbrales(self, pedido):
+        if not self.sesion.conectado():
+            raise RuntimeError("No hay ningún puerto conectado")
+        self.sesion.aplicar_umbrales(pedido["params"])
+        return {}, b""
+
+    def _cmd_iniciar_ensayo(self, pedido):
+        if self.sesion.ensayo_activo:
+            raise RuntimeError("Ya hay un ensayo en curso")
+        if not self.sesion.conectado():
+            raise RuntimeError("No hay ningún puerto conectado")
+        base = self.sesion.iniciar_ensayo(
+            int(pedido["duracion_seg"]),
+            columnar=bool(pedido.get("columnar", False)),
+            contenedor=bool(pedido.get("contenedor", False)),
+        )
+        return {"ensayo_dir": str(base)}, b""
+
+    def _cmd_finalizar_ensayo(self, pedido):
+        self.sesion.finalizar_ensayo()
+        return {}, b""
+
+    def _cmd_limpiar(self, pedido):
+        self.sesion.limpiar()
+        return {}, b""
+
+    def _cmd_acumulados(self, pedido):
+        """Conteos por canal y grilla 2D como int64 contiguos, en el orden que indica la respuesta."""
+        acum = self.sesion.process.acumulados()
+        canales = sorted(acum["resumen"]) if acum["resumen"] is not None else []
+        partes = [acum["resumen"][ch] for ch in canales]
+        grilla = acum["histograma_2d"]
+        if grilla is not None:
+            partes.append(grilla)
+        respuesta = {
+            "fin": acum["fin"],
+            "generacion": acum["generacion"],
+            "canales": canales,
+            "niveles": len(partes[0]) if canales else 0,
+            "bins_2d": len(grilla) if grilla is not None else 0,
+            "total_pares": acum["total_pares"],
+        }
+        return respuesta, b"".join(p.astype("<i8").tobytes() for p in partes)
+
+    def _cmd_apagar(self, pedido):
+        self._apagar.set()
+        return {}, b""
+
+    # -------------------------
+    # Suscripción a los lotes decodificados
+    # -------------------------
+    def transmitir(self, escribir: Callable[[bytes], object], desde: int):
+        """
+        Envía a un suscriptor los eventos desde el índice absoluto 'desde' y, de ahí en más,
+        los nuevos cada PERIODO_SUSCRIPCION_SEG, más un mensaje de estado por segundo:
+            {"evento": "lote", "inicio", "n", "generacion", "bytes"} + ts, chan y vp_counts
+            {"evento": "estado", ...}  (mismos campos que el comando estado)
+        Cada suscriptor tiene su propio hilo y su propio índice, así que uno lento recibe lotes
+        más grandes pero no frena la decodificación ni a los demás. Tras un clear() los
+        lotes traen otra 'generacion' y los índices vuelven a empezar de cero.
+        """
+        process = self.sesion.process
+        indice = desde
+        generacion = process.generacion
+        ultimo_estado = 0.0
+        with self._lock:
+            self.suscriptores += 1
+        print(f"[Demonio] Nuevo suscriptor desde el evento {desde:,}")
+        try:
+            while not self._apagar.is_set():
+                if process.generacion != generacion:
+                    generacion = process.generacion
+                    indice = 0
+                    ultimo_estado = 0.0     # se avisa enseguida
+
+                vista = process.registros_nuevos_desde(indice)
+                inicio = vista.fin - len(vista)
+                for i in range(0, len(vista), EVENTOS_POR_LOTE):
+                    j = min(i + EVENTOS_POR_LOTE, len(vista))
+                    columnas = (vista.ts_abs_ns[i:j], vista.chan[i:j], vista.vp_counts[i:j])
+                    carga = b"".join(c.astype(d, copy=False).tobytes() for c, d in zip(columnas, DTYPES_LOTE))
+                    enviar_mensaje(escribir, {"evento": "lote", "inicio": inicio + i, "n": j - i,
+                                             "generacion": generacion}, carga)
+                indice = vista.fin
+
+                ahora = time.monotonic()
+                if ahora - ultimo_estado >= PERIODO_ESTADO_SEG:
+                    ultimo_estado = ahora
+                    enviar_mensaje(escribir, dict(self.estado(), evento="estado"))
+
+                self._apagar.wait(PERIODO_SUSCRIPCION_SEG)
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            pass
+        finally:
+            with self._lock:
+                self.suscriptores -= 1
+            print("[Demonio] Suscriptor desconectado")
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    def servir(self) -> int:
+        """Escucha en el socket hasta recibir 'apagar', SIGTERM o Ctrl+C; devuelve el código de salida."""
+        if os.path.exists(self.ruta_socket):
+            if demonio_activo(self.ruta_socket):
+                print(f"[Demonio] Ya hay un demonio escuchando en {self.ruta_socket}")
+                return 1
+            os.unlink(self.ruta_socket)     # socket huérfano de un demonio que no terminó bien
+
+        servidor = socketserver.ThreadingUnixStreamServer(self.ruta_socket, _Manejador)
+        servidor.daemon_threads = True
+        servidor.demonio = self
+        os.chmod(self.ruta_socket, 0o600)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        signal.signal(signal.SIGTERM, lambda *_: self._apagar.set())
+        print(f"[Demonio] Escuchando en {self.ruta_socket}")
+
+        try:
+            while not self._apagar.wait(0.5):
+                with self._lock:
+                    if self.sesion.ensayo_activo and self.sesion.restante_seg() <= 0:
+                        print("[Demonio] Duración cumplida: finalizando ensayo")
+                        self.sesion.finalizar_ensayo()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            print("[Demonio] Cerrando...")
+            servidor.shutdown()
+            servidor.server_close()
+            with self._lock:
+                self.sesion.cerrar()
+            try:
+                os.unlink(self.ruta_socket)
+            except OSError:
+                pass
+        return 0
+
+
+def demonio_activo(ruta_socket: str, timeout: float = 1.0) -> bool:
+    """True si hay un demonio aceptando conexiones en el socket."""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        try:
+            s.connect(ruta_socket)
+        except OSError:
+            return False
+    return True
+
+
+def _pedir_apagado(ruta_socket: str) -> int:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(ruta_socket)
+            enviar_mensaje(s.sendall, {"comando": "apagar"})
+            leido = leer_mensaje(s.makefile("rb"))
+    except OSError as e:
+        print(f"[Demonio] No hay demonio en {ruta_socket}: {e}")
+        return 1
+    return 0 if leido and leido[0].get("ok") else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.demonio",
+                                     description="Demonio de adquisición del TAR (sin GUI)")
+    parser.add_argument("--socket", default=ruta_socket_por_defecto(), help="ruta del socket de control")
+    parser.add_argument("--carpeta", default=str(ENSAYOS_DIR), help="carpeta donde se crean los ensayos")
+    parser.add_argument("--puerto", default=None, help="puerto serie a conectar al arrancar")
+    parser.add_argument("--apagar", action="store_true",
+                        help="pedir al demonio que finalice el ensayo en curso y termine")
+    args = parser.parse_args(argv)
+
+    if not hasattr(socket, "AF_UNIX"):
+        print("[Demonio] Este sistema no tiene sockets Unix; usar la GUI sin --demonio")
+        return 1
+    if args.apagar:
+        return _pedir_apagado(args.socket)
+    if demonio_activo(args.socket):
+        print(f"[Demonio] Ya hay un demonio escuchando en {args.socket}")
+        return 1
+
+    demonio = DemonioAdquisicion(args.socket, carpeta_ensayos=args.carpeta)
+    if args.puerto and not demonio.sesion.conectar(args.puerto):
+        return 1
+    return demonio.servir()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+from typing import Callable, Optional
+import queue
+import threading
+
+
+# ====================================================================
+#               HILO ESCRITOR CON COLA ACOTADA
+# ====================================================================
+class EscritorArchivos:
+    """
+    Ejecuta tareas de escritura a disco en un hilo propio, fuera del lock del procesador.
+    La cola es acotada: si el disco no da abasto, quien encola espera (el autoguardado),
+    nunca el hilo que recibe datos del puerto serie.
+    """
+
+    def __init__(self, max_pendientes: int = 4):
+        self._cola: "queue.Queue[Callable[[], None]]" = queue.Queue(maxsize=max_pendientes)
+        self._hilo: Optional[threading.Thread] = None
+        self._hilo_lock = threading.Lock()
+
+    def encolar(self, tarea: Callable[[], None]):
+        """Agrega una tarea; bloquea si ya hay 'max_pendientes' esperando."""
+        with self._hilo_lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._loop, daemon=True)
+                self._hilo.start()
+        self._cola.put(tarea)
+
+    def pendientes(self) -> int:
+        return self._cola.qsize()
+
+    def esperar(self):
+        """Bloquea hasta que todas las tareas encoladas terminaron."""
+        self._cola.join()
+
+    def _loop(self):
+        while True:
+            tarea = self._cola.get()
+            try:
+                tarea()
+            except Exception as e:
+                print(f"[Escritor] Error escribiendo archivos: {e}")
+            finally:
+                self._cola.task_done()
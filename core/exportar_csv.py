@@ -0,0 +1,88 @@
+from typing import BinaryIO, Dict
+
+import numpy as np
+
+from core.protocolo import MSK_VP, OFF_VP, ZMODADC1410_RESOLUTION
+
+# Formato del C original: Index,Timestamp (ns),Value (mV) con fin de línea \r\n (igual que csv.writer)
+ENCABEZADO_CSV = b"Index,Timestamp (ns),Value (mV)\r\n"
+_FILA = "%d,%d,%s\r\n"
+
+# CSV de coincidencias A/B: mismos formatos de timestamp y mV que los CSV por canal
+ENCABEZADO_COINCIDENCIAS = b"Index,Timestamp A (ns),Value A (mV),Timestamp B (ns),Value B (mV),Delta B-A (ns)\r\n"
+_FILA_COINCIDENCIA = "%d,%d,%s,%d,%s,%d\r\n"
+
+# Filas formateadas por bloque antes de escribir (acota la memoria del texto intermedio)
+FILAS_POR_BLOQUE = 1 << 18
+
+# Texto de 'vp_counts * 3.21' para cada nivel del ADC: el mismo repr() que usaba csv.writer
+_VP_MV_TEXTO = np.array(
+    [repr(k * ZMODADC1410_RESOLUTION) for k in range((MSK_VP >> OFF_VP) + 1)], dtype=object
+)
+
+
+# ====================================================================
+#                  EXPORTACIÓN DE CSV POR BLOQUES
+# ====================================================================
+def textos_vp_mv(vp_counts: np.ndarray) -> list:
+    """Columna 'Value (mV)' como textos, por tabla; valores fuera de rango se formatean uno a uno."""
+    vp_counts = np.asarray(vp_counts)
+    if len(vp_counts) and int(vp_counts.max()) >= len(_VP_MV_TEXTO):
+        return [repr(v) for v in (vp_counts * ZMODADC1410_RESOLUTION).tolist()]
+    return _VP_MV_TEXTO[vp_counts].tolist()
+
+
+def formatear_filas(indice: int, ts_abs_ns: np.ndarray, vp_counts: np.ndarray) -> bytes:
+    """Arma de una vez el texto de las filas Index,Timestamp (ns),Value (mV) desde 'indice'."""
+    n = len(ts_abs_ns)
+    filas = zip(range(indice, indice + n), ts_abs_ns.tolist(), textos_vp_mv(vp_counts))
+    return "".join(map(_FILA.__mod__, filas)).encode("ascii")
+
+
+def escribir_filas(
+    archivo: BinaryIO,
+    indice: int,
+    ts_abs_ns: np.ndarray,
+    vp_counts: np.ndarray,
+    filas_por_bloque: int = FILAS_POR_BLOQUE,
+) -> int:
+    """
+    Escribe filas en un archivo abierto en modo binario, formateando columnas completas por
+    bloques en lugar de fila por fila. Retorna el próximo índice.
+    """
+    n = len(ts_abs_ns)
+    for i in range(0, n, filas_por_bloque):
+        archivo.write(formatear_filas(indice + i, ts_abs_ns[i:i + filas_por_bloque], vp_counts[i:i + filas_por_bloque]))
+    return indice + n
+
+
+def abrir_csv(ruta: str, con_encabezado: bool = True) -> BinaryIO:
+    """Abre un CSV de canal para escritura por bloques (con buffer grande)."""
+    archivo = open(ruta, "wb", buffering=1 << 20)
+    if con_encabezado:
+        archivo.write(ENCABEZADO_CSV)
+    return archivo
+
+
+def escribir_csv(ruta: str, ts_abs_ns: np.ndarray, vp_counts: np.ndarray) -> int:
+    """Escribe un CSV de canal completo (encabezado + filas desde Index 0); retorna la cantidad de filas."""
+    with abrir_csv(ruta) as archivo:
+        return escribir_filas(archivo, 0, ts_abs_ns, vp_counts)
+
+
+def escribir_csv_coincidencias(ruta: str, pares: Dict[str, np.ndarray],
+                               filas_por_bloque: int = FILAS_POR_BLOQUE) -> int:
+    """Escribe el CSV de pares A/B (columnas de MotorCoincidencias.tomar_pares); retorna la cantidad de filas."""
+    n = len(pares["ts_a"])
+    with open(ruta, "wb", buffering=1 << 20) as archivo:
+        archivo.write(ENCABEZADO_COINCIDENCIAS)
+        for i in range(0, n, filas_por_bloque):
+            j = min(i + filas_por_bloque, n)
+            filas = zip(
+                range(i, j),
+                pares["ts_a"][i:j].tolist(), textos_vp_mv(pares["vp_a"][i:j]),
+                pares["ts_b"][i:j].tolist(), textos_vp_mv(pares["vp_b"][i:j]),
+                pares["delta_ns"][i:j].tolist(),
+            )
+            archivo.write("".join(map(_FILA_COINCIDENCIA.__mod__, filas)).encode("ascii"))
+    return n
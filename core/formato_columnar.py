@@ -0,0 +1,147 @@
+from typing import Dict, Sequence, Tuple, Union
+import os
+import struct
+
+import numpy as np
+
+from core.protocolo import ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B
+from core.registro_eventos import VistaEventos
+
+# ====================================================================
+#                  FORMATO COLUMNAR .tarc (versión 1)
+# ====================================================================
+# Encabezado (little-endian, 128 bytes):
+#   magic "TARC", versión, tamaño del encabezado, resolución (mV por cuenta),
+#   chan TAR del Canal A y del Canal B, cantidad de eventos / pulsos A / pulsos B / overflows,
+#   ts_abs_ns mínimo y máximo de los pulsos, y el offset en bytes de cada columna.
+# Columnas (alineadas a 64 bytes): ts_abs_ns int64, chan uint8, vp_counts uint16.
+# Se guardan todos los eventos (también los CH=3), en el mismo orden que el .bin.
+MAGIC = b"TARC"
+VERSION = 1
+EXTENSION = ".tarc"
+TAM_ENCABEZADO = 128
+ALINEACION = 64
+
+_ENCABEZADO = struct.Struct("<4sHHdBB2xQQQQqqQQQ")
+_COLUMNAS = (("ts_abs_ns", "<i8"), ("chan", "u1"), ("vp_counts", "<u2"))
+
+
+def _alinear(pos: int) -> int:
+    return (pos + ALINEACION - 1) // ALINEACION * ALINEACION
+
+
+def escribir_tarc(ruta: str, vista: Union[VistaEventos, Sequence[VistaEventos]]) -> Dict:
+    """
+    Guarda las columnas de 'vista' en un archivo .tarc; retorna el encabezado escrito.
+    Acepta también una lista de vistas consecutivas (se escriben como un solo bloque, sin unirlas en memoria).
+    """
+    partes = [vista] if isinstance(vista, VistaEventos) else list(vista)
+    n = sum(len(p) for p in partes)
+    n_a = n_b = n_ov = 0
+    ts_min, ts_max = None, None
+    for p in partes:
+        pulsos = (p.chan == CANAL_A) | (p.chan == CANAL_B)
+        n_a += int(np.count_nonzero(p.chan == CANAL_A))
+        n_b += int(np.count_nonzero(p.chan == CANAL_B))
+        n_ov += int(np.count_nonzero(p.chan == 3))
+        ts_pulsos = p.ts_abs_ns[pulsos]
+        if len(ts_pulsos):
+            ts_min = int(ts_pulsos.min()) if ts_min is None else min(ts_min, int(ts_pulsos.min()))
+            ts_max = int(ts_pulsos.max()) if ts_max is None else max(ts_max, int(ts_pulsos.max()))
+
+    # Offsets de cada columna
+    offsets, pos = [], TAM_ENCABEZADO
+    for _, dtype in _COLUMNAS:
+        pos = _alinear(pos)
+        offsets.append(pos)
+        pos += n * np.dtype(dtype).itemsize
+
+    encabezado = {
+        "version": VERSION,
+        "resolucion_mv": ZMODADC1410_RESOLUTION,
+        "canal_a": CANAL_A,
+        "canal_b": CANAL_B,
+        "eventos": n,
+        "pulsos_a": n_a,
+        "pulsos_b": n_b,
+        "overflows": n_ov,
+        "ts_min_ns": 0 if ts_min is None else ts_min,
+        "ts_max_ns": 0 if ts_max is None else ts_max,
+    }
+
+    with open(ruta, "wb") as f:
+        f.write(_ENCABEZADO.pack(
+            MAGIC, VERSION, TAM_ENCABEZADO, ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B,
+            n, encabezado["pulsos_a"], encabezado["pulsos_b"], encabezado["overflows"],
+            encabezado["ts_min_ns"], encabezado["ts_max_ns"], *offsets,
+        ).ljust(TAM_ENCABEZADO, b"\0"))
+
+        for (nombre, dtype), offset in zip(_COLUMNAS, offsets):
+            f.write(b"\0" * (offset - f.tell()))
+            for p in partes:
+                columna = np.ascontiguousarray(getattr(p, nombre), dtype=dtype)
+                f.write(memoryview(columna).cast("B"))
+
+    return encabezado
+
+
+def leer_encabezado(ruta: str) -> Dict:
+    with open(ruta, "rb") as f:
+        datos = f.read(TAM_ENCABEZADO)
+    if len(datos) < _ENCABEZADO.size or datos[:4] != MAGIC:
+        raise ValueError(f"{ruta} no es un archivo {EXTENSION}")
+
+    (_, version, tam, resolucion, canal_a, canal_b, n, n_a, n_b, n_ov,
+     ts_min, ts_max, off_ts, off_chan, off_vp) = _ENCABEZADO.unpack_from(datos)
+    if version != VERSION:
+        raise ValueError(f"Versión de {EXTENSION} no soportada: {version}")
+
+    return {
+        "version": version,
+        "tam_encabezado": tam,
+        "resolucion_mv": resolucion,
+        "canal_a": canal_a,
+        "canal_b": canal_b,
+        "eventos": n,
+        "pulsos_a": n_a,
+        "pulsos_b": n_b,
+        "overflows": n_ov,
+        "ts_min_ns": ts_min,
+        "ts_max_ns": ts_max,
+        "offsets": (off_ts, off_chan, off_vp),
+    }
+
+
+def abrir_tarc(ruta: str) -> Tuple[Dict, VistaEventos]:
+    """
+    Abre un .tarc con mmap (tiempo constante, sin leer las columnas).
+    La vista no trae frames crudos: 'raw' queda vacío.
+    """
+    encabezado = leer_encabezado(ruta)
+    n = encabezado["eventos"]
+    if n == 0:
+        vacio = VistaEventos(np.empty(0, np.int64), np.empty(0, np.uint8), np.empty(0, np.uint16),
+                             np.empty(0, np.uint8))
+        return encabezado, vacio
+
+    columnas = {
+        nombre: np.memmap(ruta, dtype=dtype, mode="r", offset=offset, shape=(n,))
+        for (nombre, dtype), offset in zip(_COLUMNAS, encabezado["offsets"])
+    }
+    vista = VistaEventos(columnas["ts_abs_ns"], columnas["chan"], columnas["vp_counts"], np.empty(0, np.uint8))
+    return encabezado, vista
+
+
+def comprobar_resolucion(encabezado: Dict, ruta: str = ""):
+    """
+    Los conteos se pasan a mV con ZMODADC1410_RESOLUTION: un archivo escrito con otra
+    resolución no se puede sumar a ellos y se rechaza con ValueError.
+    """
+    if encabezado["resolucion_mv"] != ZMODADC1410_RESOLUTION:
+        raise ValueError(f"{ruta} usa {encabezado['resolucion_mv']} mV por cuenta "
+                         f"(se esperaba {ZMODADC1410_RESOLUTION})")
+
+
+def ruta_tarc(ruta_bin: str) -> str:
+    """Nombre del .tarc que acompaña a un .bin (misma carpeta y nombre)."""
+    return os.path.splitext(ruta_bin)[0] + EXTENSION
@@ -0,0 +1,96 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from core.protocolo import MSK_VP, OFF_VP, ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B
+
+# Niveles posibles de vp_counts (14 bits del ADC)
+VP_NIVELES = (MSK_VP >> OFF_VP) + 1
+
+
+# ====================================================================
+#               ACUMULADOR INCREMENTAL DE HISTOGRAMAS
+# ====================================================================
+class AcumuladorHistograma:
+    """
+    Conteos por canal a la resolución nativa del ADC (un bin por valor de vp_counts).
+    Cada lote nuevo se suma con np.bincount, y el histograma en mV para cualquier
+    min/max/intervalo se obtiene re-agrupando esos conteos, sin volver a recorrer eventos.
+    """
+
+    def __init__(self, canales: Iterable[int] = (CANAL_A, CANAL_B)):
+        self.conteos: Dict[int, np.ndarray] = {ch: np.zeros(VP_NIVELES, dtype=np.int64) for ch in canales}
+        self._mv_niveles = np.arange(VP_NIVELES) * ZMODADC1410_RESOLUTION
+        self._cache_bins: Dict[Tuple[int, int, int], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def acumular(self, chan: np.ndarray, vp_counts: np.ndarray):
+        """Suma a los conteos los eventos de un lote (columnas chan y vp_counts)."""
+        if not len(chan):
+            return
+        for ch, conteos in self.conteos.items():
+            vals = vp_counts[chan == ch]
+            if len(vals):
+                conteos += np.bincount(vals, minlength=VP_NIVELES)
+
+    def reiniciar(self):
+        for conteos in self.conteos.values():
+            conteos[:] = 0
+
+    def total(self, canal: int) -> int:
+        return int(self.conteos[canal].sum())
+
+    def _mapa_bins(self, minv: int, maxv: int, paso: int):
+        """Bordes en mV y bin de destino de cada nivel del ADC (misma semántica que np.histogram)."""
+        clave = (minv, maxv, paso)
+        if clave not in self._cache_bins:
+            bordes = np.arange(minv, maxv + paso, paso, dtype=np.float64)
+            idx = np.searchsorted(bordes, self._mv_niveles, side="right") - 1
+            # El último bin es cerrado a derecha
+            idx[self._mv_niveles == bordes[-1]] = len(bordes) - 2
+            validos = np.flatnonzero((idx >= 0) & (idx < len(bordes) - 1))
+            self._cache_bins = {clave: (bordes, idx[validos], validos)}
+        return self._cache_bins[clave]
+
+    def histograma(self, canal: int, minv: int, maxv: int, paso: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Devuelve (bordes, conteos) del canal para bins de 'paso' mV entre minv y maxv."""
+        bordes, destino, validos = self._mapa_bins(minv, maxv, paso)
+        conteos = np.bincount(destino, weights=self.conteos[canal][validos], minlength=len(bordes) - 1)
+        return bordes, conteos.astype(np.int64)
+
+
+# ====================================================================
+#          HISTOGRAMA 2D DE AMPLITUDES (PARES COINCIDENTES A/B)
+# ====================================================================
+class AcumuladorHistograma2D:
+    """
+    Grilla de conteos vp_counts A (filas) contra vp_counts B (columnas) de pares coincidentes.
+    Cada bin agrupa 'niveles_por_bin' niveles del ADC (potencia de 2: el índice es un
+    corrimiento). Los pares nuevos se suman con un solo bincount sobre el índice lineal, así
+    que el costo depende de los pares del lote, y el de leer la grilla solo de su tamaño.
+    """
+
+    def __init__(self, niveles_por_bin: int = 32):
+        if niveles_por_bin <= 0 or niveles_por_bin & (niveles_por_bin - 1):
+            raise ValueError(f"niveles_por_bin debe ser potencia de 2: {niveles_por_bin}")
+        self.niveles_por_bin = niveles_por_bin
+        self._corrimiento = niveles_por_bin.bit_length() - 1
+        self.bins = -(-VP_NIVELES // niveles_por_bin)
+        self.conteos = np.zeros((self.bins, self.bins), dtype=np.int64)
+
+    def acumular(self, vp_a: np.ndarray, vp_b: np.ndarray):
+        """Suma los pares de un lote (vp_counts de A y de B, alineados)."""
+        if not len(vp_a):
+            return
+        lineal = (vp_a.astype(np.intp) >> self._corrimiento) * self.bins + (vp_b.astype(np.intp) >> self._corrimiento)
+        self.conteos += np.bincount(lineal, minlength=self.bins * self.bins).reshape(self.bins, self.bins)
+
+    def reiniciar(self):
+        self.conteos[:] = 0
+
+    def total(self) -> int:
+        return int(self.conteos.sum())
+
+    def extension_mv(self) -> Tuple[float, float, float, float]:
+        """Límites de la grilla en mV (B en x, A en y), para imshow(extent=...)."""
+        tope = self.bins * self.niveles_por_bin * ZMODADC1410_RESOLUTION
+        return 0.0, tope, 0.0, tope
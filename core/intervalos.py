@@ -0,0 +1,109 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from core.protocolo import CANAL_A, CANAL_B
+from core.base_tiempo import BaseTiempoContinua
+
+# Clave de la distribución entre canales (demora desde el último A hasta cada B)
+A_B = "A->B"
+
+
+# ====================================================================
+#            HISTOGRAMA DE INTERVALOS DE TIEMPO (INCREMENTAL)
+# ====================================================================
+class HistogramaIntervalos:
+    """
+    Distribución de Δt en bins logarítmicos: entre pulsos consecutivos de cada canal y
+    desde el último pulso A llegado hasta cada pulso B. Cada lote se procesa con diferencias
+    vectorizadas y se suma con bincount; del pasado solo se guarda el último tiempo de
+    cada canal, así que el costo por lote no depende de los eventos ya acumulados.
+
+    Los CH=3 se ignoran (su ts_abs_ns no es un pulso) y los tiempos pasan por una
+    BaseTiempoContinua, de modo que los reinicios del offset en los guardados no generan
+    intervalos negativos ni gigantes. Los Δt fuera de [dt_min_ns, dt_max_ns) se cuentan
+    aparte (por_debajo / por_encima).
+    """
+
+    def __init__(self, dt_min_ns: float = 10.0, dt_max_ns: float = 1e10, bins_por_decada: int = 20,
+                 canal_a: int = CANAL_A, canal_b: int = CANAL_B):
+        if not 0 < dt_min_ns < dt_max_ns:
+            raise ValueError(f"Rango de intervalos inválido: [{dt_min_ns}, {dt_max_ns}) ns")
+        self.canal_a = canal_a
+        self.canal_b = canal_b
+        self.bins_por_decada = bins_por_decada
+        self._log_min = np.log10(dt_min_ns)
+        n_bins = int(np.ceil((np.log10(dt_max_ns) - self._log_min) * bins_por_decada))
+        self.bordes_ns = 10.0 ** (self._log_min + np.arange(n_bins + 1) / bins_por_decada)
+        self.base = BaseTiempoContinua()
+        self.reiniciar()
+
+    @property
+    def claves(self) -> Tuple:
+        return (self.canal_a, self.canal_b, A_B)
+
+    def reiniciar(self):
+        self.base.reiniciar()
+        n = len(self.bordes_ns) - 1
+        self.conteos: Dict[object, np.ndarray] = {k: np.zeros(n, dtype=np.int64) for k in self.claves}
+        self.por_debajo: Dict[object, int] = {k: 0 for k in self.claves}
+        self.por_encima: Dict[object, int] = {k: 0 for k in self.claves}
+        # Último pulso (tiempo continuo) de cada canal: une los lotes y los guardados
+        self._ultimo: Dict[int, Optional[int]] = {self.canal_a: None, self.canal_b: None}
+
+    # -------------------------
+    # Entrada
+    # -------------------------
+    def acumular(self, chan: np.ndarray, ts_abs_ns: np.ndarray):
+        """Suma los intervalos de un lote nuevo (columnas del registro, en orden de llegada)."""
+        es_a = chan == self.canal_a
+        pulsos = np.flatnonzero(es_a | (chan == self.canal_b))
+        if not len(pulsos):
+            return
+        ts = self.base.continuar(ts_abs_ns[pulsos])
+        es_a = es_a[pulsos]
+        t_a = ts[es_a]
+        t_b = ts[~es_a]
+        previo_a = self._ultimo[self.canal_a]
+
+        for canal, t in ((self.canal_a, t_a), (self.canal_b, t_b)):
+            if not len(t):
+                continue
+            previo = self._ultimo[canal]
+            self._sumar(canal, np.diff(t) if previo is None else np.diff(t, prepend=previo))
+            self._ultimo[canal] = int(t[-1])
+
+        if len(t_b):
+            # Último A llegado antes de cada B (en orden de llegada, como el flujo): su posición
+            # sale de la cuenta acumulada de A; -1 es el último A de los lotes previos
+            cual = np.cumsum(es_a)[~es_a] - 1
+            if previo_a is not None:
+                t_a = np.concatenate([[previo_a], t_a])
+                cual += 1
+            con_a = cual >= 0
+            self._sumar(A_B, t_b[con_a] - t_a[cual[con_a]])
+
+    def _sumar(self, clave, dt: np.ndarray):
+        if not len(dt):
+            return
+        # Índice de bin por logaritmo (los Δt <= 0, p. ej. desórdenes entre canales, van por debajo)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            idx = np.floor((np.log10(dt.astype(np.float64)) - self._log_min) * self.bins_por_decada)
+        n = len(self.bordes_ns) - 1
+        debajo = ~(idx >= 0)
+        encima = idx >= n
+        self.por_debajo[clave] += int(np.count_nonzero(debajo))
+        self.por_encima[clave] += int(np.count_nonzero(encima))
+        validos = idx[~(debajo | encima)].astype(np.intp)
+        if len(validos):
+            self.conteos[clave] += np.bincount(validos, minlength=n)
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    def total(self, clave) -> int:
+        return int(self.conteos[clave].sum()) + self.por_debajo[clave] + self.por_encima[clave]
+
+    def densidad(self, clave) -> np.ndarray:
+        """Conteos por ns de ancho de bin: con bins logarítmicos es lo que se compara entre zonas."""
+        return self.conteos[clave] / np.diff(self.bordes_ns)
@@ -0,0 +1,121 @@
+from typing import Callable, Deque, Dict, Optional
+from collections import deque
+import contextlib
+import json
+import threading
+import time
+
+import numpy as np
+
+
+# ====================================================================
+#                      SERIE DE TIEMPOS
+# ====================================================================
+class SerieTiempos:
+    """Acumula duraciones (s): cantidad, total y máximo, más las últimas muestras para percentiles."""
+
+    def __init__(self, muestras: int = 512):
+        self.cantidad = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.ultimas: Deque[float] = deque(maxlen=muestras)
+
+    def agregar(self, segundos: float):
+        self.cantidad += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        self.ultimas.append(segundos)
+
+    def resumen(self) -> Dict[str, float]:
+        ultimas_ms = np.asarray(self.ultimas) * 1000.0
+        return {
+            "cantidad": self.cantidad,
+            "total_s": self.total,
+            "promedio_ms": self.total / self.cantidad * 1000.0 if self.cantidad else 0.0,
+            "p50_ms": float(np.percentile(ultimas_ms, 50)) if len(ultimas_ms) else 0.0,
+            "p99_ms": float(np.percentile(ultimas_ms, 99)) if len(ultimas_ms) else 0.0,
+            "max_ms": self.maximo * 1000.0,
+        }
+
+
+# ====================================================================
+#                      REGISTRO DE MÉTRICAS
+# ====================================================================
+class RegistroMetricas:
+    """
+    Métricas del camino de adquisición:
+     - contadores: sumas enteras (frames decodificados, overflows, ...)
+     - tiempos: duraciones por operación (feed, lock, guardado, redibujo)
+     - indicadores: funciones que se evalúan solo al pedir una instantánea, para
+       exponer contadores que otros objetos ya llevan sin costo en el camino caliente.
+    Cada contador / serie la escribe un único hilo, por eso no se usa lock al sumar;
+    la lectura (instantanea) es informativa y tolera valores a mitad de actualización.
+    """
+
+    def __init__(self):
+        self.contadores: Dict[str, int] = {}
+        self.tiempos: Dict[str, SerieTiempos] = {}
+        self._indicadores: Dict[str, Callable[[], object]] = {}
+        self._alta_lock = threading.Lock()
+        self._t_inicio = time.time()
+
+    # -------------------------
+    # Escritura (caminos calientes)
+    # -------------------------
+    def sumar(self, nombre: str, cantidad: int = 1):
+        self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def tiempo(self, nombre: str, segundos: float):
+        serie = self.tiempos.get(nombre)
+        if serie is None:
+            with self._alta_lock:
+                serie = self.tiempos.setdefault(nombre, SerieTiempos())
+        serie.agregar(segundos)
+
+    @contextlib.contextmanager
+    def cronometro(self, nombre: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempo(nombre, time.perf_counter() - t0)
+
+    def registrar_indicador(self, nombre: str, funcion: Callable[[], object]):
+        self._indicadores[nombre] = funcion
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    def instantanea(self) -> Dict:
+        """Estado actual de todas las métricas (los percentiles se calculan recién acá)."""
+        indicadores = {}
+        for nombre, funcion in list(self._indicadores.items()):
+            try:
+                indicadores[nombre] = funcion()
+            except Exception as e:
+                indicadores[nombre] = f"error: {e}"
+        return {
+            "fecha": time.strftime("%Y-%m-%d_%H-%M-%S"),
+            "segundos": time.time() - self._t_inicio,
+            "contadores": dict(self.contadores),
+            "tiempos": {nombre: serie.resumen() for nombre, serie in list(self.tiempos.items())},
+            "indicadores": indicadores,
+        }
+
+    def volcar_json(self, ruta: str) -> Optional[str]:
+        try:
+            with open(ruta, "w") as f:
+                json.dump(self.instantanea(), f, indent=2, default=str)
+        except OSError as e:
+            print(f"[Metricas] Error guardando {ruta}: {e}")
+            return None
+        print(f"[Metricas] Guardadas en: {ruta}")
+        return ruta
+
+    def reiniciar(self):
+        """Pone a cero contadores y tiempos (los indicadores quedan registrados)."""
+        self.contadores = {}
+        with self._alta_lock:
+            self.tiempos = {}
+        self._t_inicio = time.time()
@@ -0,0 +1,131 @@
+from typing import Dict, Optional, Tuple
+import queue
+import threading
+import time
+
+
+# ====================================================================
+#          PIPELINE LECTOR → COLA ACOTADA → HILO DECODIFICADOR
+# ====================================================================
+class PipelineDecodificacion:
+    """
+    Desacopla el hilo de lectura serie de la decodificación. El lector solo encola los chunks
+    crudos (sin bloquear); un hilo decodificador los retira por tandas y llama a
+    procesador.feed() con cada uno. Si la cola está llena el chunk se descarta y se cuenta, para que el
+    hilo serie nunca espere a la decodificación.
+    """
+
+    def __init__(self, procesador, max_chunks: int = 1024, max_tanda: int = 64):
+        self.procesador = procesador
+        self.max_tanda = max_tanda
+        self._cola: "queue.Queue[Tuple[bytes, bool]]" = queue.Queue(maxsize=max_chunks)
+
+        # Estadísticas de contrapresión
+        self.encolados = 0
+        self.descartados = 0
+        self.bytes_descartados = 0
+        self.maximo_profundidad = 0
+        self.tandas = 0
+        self._discontinuidad = False    # hubo descarte: el próximo chunk no continúa al anterior
+
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    def iniciar(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def detener(self, timeout: float = 1.0):
+        """Detiene el hilo decodificador luego de vaciar la cola."""
+        self._stop_event.set()
+        try:
+            self._cola.put_nowait(b"")   # despierta al hilo si está esperando
+        except queue.Full:
+            pass
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def esperar_vacia(self, timeout: float = 5.0) -> bool:
+        """
+        Espera a que el decodificador termine con todo lo encolado (incluida la tanda en curso).
+        Devuelve False si se agotó el tiempo con chunks todavía pendientes.
+        """
+        limite = time.monotonic() + timeout
+        with self._cola.all_tasks_done:
+            while self._cola.unfinished_tasks:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    return False
+                self._cola.all_tasks_done.wait(restante)
+        return True
+
+    # -------------------------
+    # Productor (hilo serie)
+    # -------------------------
+    def encolar(self, data: bytes):
+        """Encola un chunk crudo sin bloquear; si no hay lugar se descarta."""
+        try:
+            self._cola.put_nowait((data, self._discontinuidad))
+        except queue.Full:
+            self.descartados += 1
+            self.bytes_descartados += len(data)
+            self._discontinuidad = True
+            return
+
+        self._discontinuidad = False
+        self.encolados += 1
+        profundidad = self._cola.qsize()
+        if profundidad > self.maximo_profundidad:
+            self.maximo_profundidad = profundidad
+
+    # -------------------------
+    # Consumidor (hilo decodificador)
+    # -------------------------
+    def _loop(self):
+        while True:
+            item = self._cola.get()
+            tanda = [item]
+            try:
+                while len(tanda) < self.max_tanda:
+                    tanda.append(self._cola.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                self._procesar_tanda(tanda)
+            finally:
+                for _ in tanda:
+                    self._cola.task_done()
+
+            if self._stop_event.is_set() and self._cola.empty():
+                break
+
+    def _procesar_tanda(self, tanda):
+        # Cada chunk se pasa tal cual a feed() (se decodifica en el lugar, sin unir copias)
+        for item in tanda:
+            if not isinstance(item, tuple):
+                continue        # marcador de detención
+            data, discontinuo = item
+            if discontinuo:
+                # Lo anterior a un descarte no continúa en este chunk
+                self.procesador.descartar_resto()
+            self.procesador.feed(data)
+        self.tandas += 1
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "profundidad": self._cola.qsize(),
+            "maximo_profundidad": self.maximo_profundidad,
+            "capacidad": self._cola.maxsize,
+            "encolados": self.encolados,
+            "descartados": self.descartados,
+            "bytes_descartados": self.bytes_descartados,
+            "tandas": self.tandas,
+        }
@@ -1,29 +1,116 @@
 
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from collections import deque
 import os
-import csv
+import tempfile
 import threading
 import time
 
-# ============================================================
-#   DEFINICIONES DEL PROTOCOLO TAR (firmware real — 8 bytes)
-# ============================================================
-FRAME_SIZE = 8                    # Tamaño fijo de frame
-T_PERIOD = 0xFFFFFFFF             # Para eventos CH=3
+import numpy as np
 
-# Máscaras del firmware real (binToCSV.h)
-MSK_HEADER = 0xFF00000000000000
-MSK_TS     = 0x00FFFFFFFF000000
-MSK_CH     = 0x0000000000C00000
-MSK_VP     = 0x00000000003FFF00
-MSK_FOOTER = 0x00000000000000FF
+from core.protocolo import (
+    FRAME_SIZE, T_PERIOD,
+    MSK_TS, MSK_CH, MSK_VP,
+    OFF_TS, OFF_CH, OFF_VP,
+    ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B,
+)
+from core.registro_eventos import RegistroEventos, VistaEventos, CHAN_INVALIDO, concatenar_vistas
+from core.buffer_anillo import BufferAnillo
+from core.escritor import EscritorArchivos
+from core.metricas import RegistroMetricas
+from core.exportar_csv import abrir_csv, escribir_csv, escribir_filas, escribir_csv_coincidencias
+from core.formato_columnar import escribir_tarc, abrir_tarc, ruta_tarc
+from core.histograma import AcumuladorHistograma
+from core.sincronizacion import SincronizadorTAR
+from core.coincidencias import MotorCoincidencias
 
-OFF_TS = 24
-OFF_CH = 22
-OFF_VP = 8
+# Vista de frames para la decodificación por lotes (uint64 big-endian)
+_DTYPE_FRAME = np.dtype(">u8")
+
+
+# ====================================================================
+#                   DECODIFICACIÓN POR LOTES (NumPy)
+# ====================================================================
+def decodificar_lote(datos, offset: int = 0) -> Tuple[Dict[str, np.ndarray], int]:
+    """
+    Decodifica de una vez todos los frames completos de 'datos' (bytes, bytearray o memoryview).
+    Aplica MSK_TS/MSK_CH/MSK_VP como operaciones sobre arrays y calcula el offset de los CH=3
+    con una suma acumulada, de modo que 'ts_abs_ns' coincide exactamente con _interpretador_TAR.
+    Retorna (columnas, offset_final). En los frames de overflow 'ts_abs_ns' no tiene significado.
+    """
+    n = len(datos) // FRAME_SIZE
+    pulsos = np.frombuffer(datos, dtype=_DTYPE_FRAME, count=n)
+
+    ts = ((pulsos & MSK_TS) >> OFF_TS).astype(np.int64)
+    chan = ((pulsos & MSK_CH) >> OFF_CH).astype(np.uint8)
+    vp = ((pulsos & MSK_VP) >> OFF_VP).astype(np.uint16)
+
+    # Cantidad de overflows vistos hasta cada frame (inclusive)
+    overflow = chan == 3
+    n_overflow = np.cumsum(overflow, dtype=np.int64)
+
+    ts_abs_ns = (offset + n_overflow * T_PERIOD + ts) * 10
+
+    if n:
+        offset += int(n_overflow[-1]) * T_PERIOD
+
+    lote = {
+        "ts": ts,
+        "ts_abs_ns": ts_abs_ns,
+        "chan": chan,
+        "vp_counts": vp,
+        "overflow": overflow,
+    }
+    return lote, offset
+
+
+def leer_lotes_bin(
+    ruta: str,
+    inicio: int = 0,
+    fin: Optional[int] = None,
+    offset: int = 0,
+    tam_bloque: int = 1 << 20,
+) -> Iterator[Tuple[Dict[str, np.ndarray], int, int]]:
+    """
+    Lee y decodifica el rango [inicio, fin) de un .bin por bloques, con memoria constante.
+    El offset de los CH=3 y el resto de frame se arrastran entre bloques.
+    Entrega (lote, offset_al_final_del_lote, bytes_leidos_del_rango).
+    """
+    tam_bloque = max(FRAME_SIZE, tam_bloque // FRAME_SIZE * FRAME_SIZE)
+    buf = bytearray(tam_bloque)
+    anillo = BufferAnillo()
+    leidos = 0
+    restante = None if fin is None else fin - inicio
+
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        while restante is None or restante > 0:
+            vista = memoryview(buf) if restante is None else memoryview(buf)[:min(tam_bloque, restante)]
+            n = f.readinto(vista)
+            if not n:
+                break
+            leidos += n
+            if restante is not None:
+                restante -= n
+
+            for bloque in anillo.consumir(vista[:n]):
+                lote, offset = decodificar_lote(bloque, offset)
+                yield lote, offset, leidos
+
+
+class _Tramo:
+    """
+    Bloque de eventos que ya salió del registro actual (volcado a disco o guardado), con su
+    índice absoluto de inicio. 'vista' empieza en memoria y, una vez escrito el volcado, pasa a
+    ser una vista mapeada desde disco (la asignación es atómica: los lectores ven una u otra).
+    """
+    __slots__ = ("base", "vista", "rutas")
+
+    def __init__(self, base: int, vista: VistaEventos):
+        self.base = base
+        self.vista = vista
+        self.rutas: List[str] = []
 
-# Definición de la resolución 
-ZMODADC1410_RESOLUTION = 3.21 # mv
 
 # ====================================================================
 #                       CLASE PROCESAR
@@ -41,20 +128,54 @@ class ProcesaDatosTAR:
         auto_prefix: str = "tar",
         interpretar_frame: Optional[Callable[[bytes], Dict]] = None,
         auto_periodo_seg: Optional[int] = None,
+        modo_lote: bool = True,
+        metricas: Optional[RegistroMetricas] = None,
+        guardar_columnar: bool = False,
+        memoria_max_bytes: Optional[int] = None,
+        carpeta_volcado: Optional[str] = None,
+        sincronizador: Optional[SincronizadorTAR] = None,
+        coincidencias: Optional[MotorCoincidencias] = None,
     ):
         # Interpretador 
         self.interpretar_frame = interpretar_frame or self._interpretador_TAR
 
+        # Decodificación vectorizada, solo aplica con el interpretador propio del TAR
+        self.modo_lote = modo_lote and interpretar_frame is None
+
         # Buffers internos
-        self._buffer = bytearray()
-        self.registros: List[Dict] = []
-        self._raw_frames: List[bytes] = []
+        self._anillo = BufferAnillo()          # resto (< 8 bytes) entre chunks
+        # Con sincronizador, el framing valida header/footer y se realinea tras bytes perdidos
+        # o de más (reemplaza al anillo en feed)
+        self.sincronizador = sincronizador
+        self.registros = RegistroEventos()   # columnas + frames crudos contiguos
         self._offset = 0  # offset acumulado por CH=3
 
+        # Índices absolutos para lectores incrementales (GUI): el registro se vacía en cada
+        # guardado, así que se recuerda dónde empieza y los tramos del último guardado.
+        self._base = 0
+        self._previo: List[_Tramo] = []
+        self.generacion = 0   # cambia cuando los datos se descartan (clear / reprocesado)
+
+        # Presupuesto de memoria: al superarlo, los eventos más viejos de la parte en curso se
+        # vuelcan a disco (.bin + .tarc mapeados) hasta el próximo guardado. 'resumen' mantiene
+        # en memoria los conteos por canal de toda la corrida.
+        self.memoria_max_bytes = memoria_max_bytes
+        self.carpeta_volcado = carpeta_volcado
+        self._volcados: List[_Tramo] = []
+        self._n_volcados = 0
+        self._por_borrar: List[str] = []
+        self.resumen: Optional[AcumuladorHistograma] = AcumuladorHistograma() if memoria_max_bytes else None
+
+        # Coincidencias A/B: se emparejan a medida que llegan los lotes y cada guardado escribe
+        # además <base>_coincidencias.csv con los pares resueltos hasta ese momento
+        self.coincidencias = coincidencias
 
         # Lock para concurrencia
         self._lock = threading.Lock()
 
+        # Métricas opcionales (sin registro no se mide nada en el camino caliente)
+        self.metricas = metricas
+
         # Carpetas raíz
         self.carpeta_bin_root = carpeta_bin
         self.carpeta_csv_root = carpeta_csv
@@ -72,12 +193,24 @@ class ProcesaDatosTAR:
         # Prefijo por defecto
         self.auto_prefix = auto_prefix
 
+        # Además de BIN + CSV, guardar columnas en .tarc (junto al .bin, ver formato_columnar)
+        self.guardar_columnar = guardar_columnar
+
+        # Contenedor único del ensayo (core.contenedor.ContenedorEnsayo): si está configurado,
+        # los guardados se agregan a él en lugar de crear un .bin por parte y el offset de
+        # CH=3 no se reinicia, de modo que ts_abs_ns es continuo en todo el ensayo.
+        self.contenedor = None
+
         # Guardado automático interno
         self.auto_periodo_seg = auto_periodo_seg
         self._auto_running = False
         self._auto_thread: Optional[threading.Thread] = None
         self._ultimo_guardado_ts = time.time()
 
+        # Escritura de archivos fuera del lock (doble buffer + hilo escritor)
+        self._escritor = EscritorArchivos(max_pendientes=4)
+        self.estadisticas_guardado: Deque[Dict] = deque(maxlen=50)
+
         if self.auto_periodo_seg and self.auto_periodo_seg > 0:
             self._start_auto_loop()
 
@@ -91,6 +224,13 @@ class ProcesaDatosTAR:
         os.makedirs(self.carpeta_csv, exist_ok=True)
         os.makedirs(self.carpeta_bin, exist_ok=True)
 
+    def usar_contenedor(self, contenedor):
+        """Activa (o con None desactiva) el modo contenedor; la base de tiempo continúa la del contenedor."""
+        with self._lock:
+            self.contenedor = contenedor
+            if contenedor is not None and not len(self.registros):
+                self._offset = contenedor.offset_final
+
     def set_auto_prefix(self, prefix: str):
         self.auto_prefix = prefix
 
@@ -103,11 +243,16 @@ class ProcesaDatosTAR:
         self._auto_thread.start()
 
     def stop_auto(self):
-        """Detiene el autoguardado interno."""
+        """Detiene el autoguardado interno y espera las escrituras pendientes."""
         self._auto_running = False
         if self._auto_thread:
             self._auto_thread.join(timeout=1.0)
             self._auto_thread = None
+        self.esperar_guardados()
+
+    def esperar_guardados(self):
+        """Bloquea hasta que el hilo escritor terminó los guardados encolados."""
+        self._escritor.esperar()
 
     def _auto_loop(self):
         """Bucle interno para el autoguardado."""
@@ -115,7 +260,7 @@ class ProcesaDatosTAR:
             time.sleep(1)
             if time.time() - self._ultimo_guardado_ts >= self.auto_periodo_seg:
                 print(f"[AutoSave] Guardando datos parciales ({self.auto_prefix})...")
-                self.dump_and_reset(prefix=f"{self.auto_prefix}_part")
+                self.dump_and_reset(prefix=f"{self.auto_prefix}_part", asincrono=True)
                 self._ultimo_guardado_ts = time.time()
 
     # -------------------------
@@ -126,22 +271,162 @@ class ProcesaDatosTAR:
         if not data:
             return
 
+        consumir = self._anillo.consumir if self.sincronizador is None else self.sincronizador.consumir
+        m = self.metricas
+        if m is None:
+            with self._lock:
+                for bloque in consumir(data):
+                    self._extraer_frames(bloque)
+                tramo = self._controlar_memoria()
+            if tramo is not None:
+                self._encolar_volcado(tramo)
+            return
+
+        t0 = time.perf_counter()
+        with self._lock:
+            t1 = time.perf_counter()
+            for bloque in consumir(data):
+                self._extraer_frames(bloque)
+            tramo = self._controlar_memoria()
+            t2 = time.perf_counter()
+        if tramo is not None:
+            self._encolar_volcado(tramo)
+        m.tiempo("feed", t2 - t0)
+        m.tiempo("lock_espera.feed", t1 - t0)
+        m.tiempo("lock_retencion.feed", t2 - t1)
+
+    def descartar_resto(self):
+        """Descarta el frame incompleto pendiente (el flujo tuvo un corte, p. ej. chunks perdidos)."""
         with self._lock:
-            self._buffer.extend(data)
-            self._extraer_frames()
-
-    def _extraer_frames(self):
-        """Procesa el buffer para extraer todos los frames completos de 8 bytes."""
-        b = self._buffer
-        i = 0
-        while len(b) - i >= FRAME_SIZE:
-            frame = bytes(b[i:i + FRAME_SIZE])
+            self._anillo.limpiar()
+            if self.sincronizador is not None:
+                self.sincronizador.reiniciar()
+
+    def _extraer_frames(self, bloque: memoryview):
+        """Decodifica un bloque contiguo de frames completos de 8 bytes, sin copiarlo."""
+        if self.modo_lote:
+            m = self.metricas
+            t0 = time.perf_counter() if m else 0.0
+            lote, self._offset = decodificar_lote(bloque, self._offset)
+            self.registros.agregar_lote(lote["ts_abs_ns"], lote["chan"], lote["vp_counts"], bloque)
+            self._acumular_derivados(lote["chan"], lote["ts_abs_ns"], lote["vp_counts"])
+            if m:
+                m.tiempo("decodificacion", time.perf_counter() - t0)
+                m.sumar("frames_decodificados", len(lote["chan"]))
+                m.sumar("frames_overflow", int(np.count_nonzero(lote["overflow"])))
+            return
+
+        m = self.metricas
+        t0 = time.perf_counter() if m else 0.0
+        overflows = 0
+        previos = len(self.registros)
+        for i in range(0, len(bloque), FRAME_SIZE):
+            frame = bytes(bloque[i:i + FRAME_SIZE])
             reg = self.interpretar_frame(frame)
-            self.registros.append(reg)
-            self._raw_frames.append(frame)
-            i += FRAME_SIZE
-        # conservar el resto
-        self._buffer = bytearray(b[i:])
+            overflows += reg.get("chan") == 3
+            self._agregar_registro(reg, frame)
+        if self.resumen is not None or self.coincidencias is not None:
+            nuevos = self.registros.desde(previos)
+            self._acumular_derivados(nuevos.chan, nuevos.ts_abs_ns, nuevos.vp_counts)
+        if m:
+            m.tiempo("decodificacion", time.perf_counter() - t0)
+            m.sumar("frames_decodificados", len(bloque) // FRAME_SIZE)
+            m.sumar("frames_overflow", overflows)
+
+    def _acumular_derivados(self, chan: np.ndarray, ts_abs_ns: np.ndarray, vp_counts: np.ndarray):
+        """Actualiza con los eventos recién decodificados lo que se mantiene en línea (resumen, coincidencias)."""
+        if self.resumen is not None:
+            self.resumen.acumular(chan, vp_counts)
+        if self.coincidencias is not None:
+            m = self.metricas
+            t0 = time.perf_counter() if m else 0.0
+            self.coincidencias.acumular(chan, ts_abs_ns, vp_counts)
+            if m:
+                m.tiempo("coincidencias", time.perf_counter() - t0)
+
+    def _agregar_registro(self, reg: Dict, frame: bytes):
+        """Pasa el diccionario de un interpretador a las columnas del registro."""
+        chan = reg.get("chan")
+        ts_abs_ns = reg.get("ts_abs_ns")
+        if ts_abs_ns is None:
+            ts_abs_ns = self._offset * 10
+        self.registros.agregar(
+            ts_abs_ns,
+            CHAN_INVALIDO if chan is None else chan,
+            reg.get("vp_counts") or 0,
+            frame,
+        )
+
+    # -------------------------
+    # Presupuesto de memoria (volcado a disco)
+    # -------------------------
+    def _controlar_memoria(self) -> Optional[_Tramo]:
+        """
+        Con el lock tomado: si el registro supera el presupuesto, lo retira como tramo y lo
+        retorna. Su volcado se encola después de soltar el lock (_encolar_volcado), porque el
+        escritor bloquea con la cola llena y no debe frenar a los lectores.
+        """
+        if not self.memoria_max_bytes or self.registros.nbytes <= self.memoria_max_bytes:
+            return None
+
+        tramo = _Tramo(self._base, self.registros.desde(0))
+        self._volcados.append(tramo)
+        self._base += len(tramo.vista)
+        self.registros = RegistroEventos()
+        return tramo
+
+    def _encolar_volcado(self, tramo: _Tramo):
+        """Sin el lock: pasa el tramo retirado por _controlar_memoria al hilo escritor."""
+        self._escritor.encolar(lambda: self._escribir_volcado(tramo))
+        if self.metricas:
+            self.metricas.sumar("volcados")
+
+    def _escribir_volcado(self, tramo: _Tramo):
+        """Hilo escritor: guarda el tramo en disco y lo reemplaza por su versión mapeada."""
+        if tramo.vista is None:
+            return      # un guardado ya lo escribió y lo liberó antes de que llegara el volcado
+        if self.carpeta_volcado is None:
+            self.carpeta_volcado = tempfile.mkdtemp(prefix="tar_volcado_")
+        os.makedirs(self.carpeta_volcado, exist_ok=True)
+
+        self._n_volcados += 1
+        ruta = os.path.join(self.carpeta_volcado, f"volcado_{self._n_volcados:06d}")
+        with open(ruta + ".bin", "wb") as f:
+            f.write(tramo.vista.raw)
+        escribir_tarc(ruta + ".tarc", tramo.vista)
+
+        _, columnas = abrir_tarc(ruta + ".tarc")
+        raw = np.memmap(ruta + ".bin", dtype=np.uint8, mode="r")
+        tramo.rutas = [ruta + ".bin", ruta + ".tarc"]
+        tramo.vista = VistaEventos(columnas.ts_abs_ns, columnas.chan, columnas.vp_counts, raw)
+        print(f"[Volcado] {len(raw) // FRAME_SIZE} eventos a {ruta}.bin")
+
+    def _borrar_volcados(self, tramos: List[_Tramo]):
+        """Borra los archivos de tramos que ya nadie lee (los que no se pueden, se reintentan luego)."""
+        for tramo in tramos:
+            tramo.vista = None      # suelta el mapeo antes de borrar (necesario en Windows)
+            self._por_borrar.extend(tramo.rutas)
+            tramo.rutas = []
+
+        pendientes = []
+        for ruta in self._por_borrar:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                pendientes.append(ruta)
+        self._por_borrar = pendientes
+
+    def memoria_en_uso(self) -> int:
+        """Bytes en memoria del registro actual y de los tramos aún no mapeados desde disco."""
+        with self._lock:
+            tramos = self._volcados + self._previo
+            en_memoria = sum(
+                t.vista.raw.nbytes + t.vista.ts_abs_ns.nbytes + t.vista.chan.nbytes + t.vista.vp_counts.nbytes
+                for t in tramos if t.vista is not None and not isinstance(t.vista.raw, np.memmap)
+            )
+            return self.registros.nbytes + en_memoria
 
     # -------------------------
     # Interpretador 
@@ -205,108 +490,218 @@ class ProcesaDatosTAR:
         name = f"{base}_canal_{letra}.csv"
         return os.path.join(self.carpeta_csv, name)
 
+    def _nombre_csv_coincidencias(self, tstamp: str, prefix: Optional[str] = None) -> str:
+        base = f"Datos_csv_{tstamp}"
+        if prefix:
+            base = f"{prefix}_{tstamp}"
+        return os.path.join(self.carpeta_csv, f"{base}_coincidencias.csv")
+
     # -------------------------
     # Guardado atómico: guarda BIN + CSV por canal y reinicia buffers
     # -------------------------
-    def dump_and_reset(self, prefix: Optional[str] = None) -> Tuple[Optional[str], List[str]]:
+    def dump_and_reset(
+        self,
+        prefix: Optional[str] = None,
+        asincrono: bool = False,
+        columnar: Optional[bool] = None,
+        final: bool = False,
+    ) -> Tuple[Optional[str], List[str]]:
         """
         Guarda los buffers actuales en archivos .bin y .csv, y reinicia el estado interno.
+        Bajo el lock solo se intercambian los buffers llenos por unos vacíos; la escritura
+        se hace después, fuera del lock. Con asincrono=True la escritura va al hilo escritor
+        y el método retorna enseguida con las rutas que se van a generar.
+        Con columnar=True (por defecto self.guardar_columnar) se escribe también el .tarc
+        junto al .bin (ruta_tarc(raw_path)).
+        Si hubo volcados a disco por presupuesto de memoria, la parte se arma con esos tramos
+        más el registro actual, en orden, sin volver a cargarlos enteros en memoria.
+        Con un motor de coincidencias se escribe también el CSV de pares A/B resueltos; los A
+        cuya ventana sigue abierta pasan al próximo guardado, salvo con final=True (fin del
+        ensayo o del archivo), que los resuelve todos.
         """
+        if columnar is None:
+            columnar = self.guardar_columnar
 
         if not self.carpeta_bin or not self.carpeta_csv:
             print("[WARN] dump_and_reset llamado sin carpetas configuradas")
             return None, []
 
+        t_espera = time.perf_counter()
         with self._lock:
-            if not self._raw_frames:
-                print("-> No hay datos para guardar. Buffers vacíos.")
-                return None, []
-
-            tstamp = self._timestamp()
-            print(f"-> Guardando datos con timestamp: {tstamp}")
-
+            t_lock = time.perf_counter()
+            vacio = not len(self.registros) and not self._volcados
+            if vacio:
+                # El último autoguardado se llevó todos los eventos, pero al final del ensayo
+                # los A que quedaron con la ventana abierta todavía se resuelven y se guardan
+                pares = None
+                if final and self.coincidencias is not None:
+                    self.coincidencias.vaciar()
+                    pares = self.coincidencias.tomar_pares()
+                if pares is None or not len(pares["ts_a"]):
+                    print("-> No hay datos para guardar. Buffers vacíos.")
+                    return None, []
+                self._ultimo_guardado_ts = time.time()
+            else:
+                actual = _Tramo(self._base, self.registros.desde(0))
+                tramos = self._volcados + [actual]
+
+                # Intercambio de buffers (la parte guardada queda disponible para lectores atrasados).
+                # El resto del anillo (< 8 bytes) no se toca: pertenece al próximo frame del flujo.
+                liberados = self._previo
+                self._previo = tramos
+                self._volcados = []
+                self._base += len(actual.vista)
+                self.registros = RegistroEventos()
+                contenedor = self.contenedor
+                if contenedor is None:
+                    self._offset = 0
+
+                pares = None
+                if self.coincidencias is not None:
+                    if final:
+                        self.coincidencias.vaciar()
+                    pares = self.coincidencias.tomar_pares()
+
+                # actualizar último guardado
+                self._ultimo_guardado_ts = time.time()
+        t_fin_lock = time.perf_counter()
+
+        tstamp = self._timestamp()
+        if vacio:
+            return None, [self._guardar_pares_finales(pares, tstamp, prefix, asincrono)]
+        print(f"-> Guardando datos con timestamp: {tstamp}")
+
+        raw_path = self._nombre_bin(tstamp, prefix=prefix)
+        tarc_path = ruta_tarc(raw_path) if columnar else None
+        if contenedor is not None:
+            raw_path = contenedor.ruta_bin
+        canales = [
+            (ch_id, chan_tar) for ch_id, chan_tar in ((0, CANAL_A), (1, CANAL_B))
+            if any(np.any(t.vista.chan == chan_tar) for t in tramos)
+        ]
+        salidas = [(self._nombre_csv(tstamp, ch_id, prefix=prefix), ch_id, chan_tar) for ch_id, chan_tar in canales]
+        csv_paths = [csv_path for csv_path, _, _ in salidas]
+        coincidencias_path = None
+        if pares is not None and len(pares["ts_a"]):
+            coincidencias_path = self._nombre_csv_coincidencias(tstamp, prefix=prefix)
+            csv_paths.append(coincidencias_path)
+
+        tiempos = {
+            "tstamp": tstamp,
+            "eventos": sum(len(t.vista) for t in tramos),
+            "espera_lock_ms": (t_lock - t_espera) * 1000.0,
+            "lock_ms": (t_fin_lock - t_lock) * 1000.0,
+        }
+
+        def escribir():
+            self._escribir_archivos(tramos, raw_path, salidas, tiempos, tarc_path, contenedor)
+            if coincidencias_path:
+                cantidad = escribir_csv_coincidencias(coincidencias_path, pares)
+                print(f"\tCSV de coincidencias guardado en: {coincidencias_path} ({cantidad} pares)")
+            if liberados or self._por_borrar:
+                self._borrar_volcados(liberados)
+
+        if asincrono:
+            self._escritor.encolar(escribir)
+        else:
+            # Respetar el orden de los guardados encolados (el contenedor agrega segmentos en orden)
+            self._escritor.esperar()
+            escribir()
+
+        return raw_path, csv_paths
+
+    def _guardar_pares_finales(self, pares: Dict[str, np.ndarray], tstamp: str,
+                               prefix: Optional[str], asincrono: bool) -> str:
+        """Guardado final sin eventos nuevos: solo el CSV de coincidencias; retorna su ruta."""
+        coincidencias_path = self._nombre_csv_coincidencias(tstamp, prefix=prefix)
+        print(f"-> Guardando coincidencias pendientes con timestamp: {tstamp}")
+
+        def escribir():
+            cantidad = escribir_csv_coincidencias(coincidencias_path, pares)
+            print(f"\tCSV de coincidencias guardado en: {coincidencias_path} ({cantidad} pares)")
+
+        if asincrono:
+            self._escritor.encolar(escribir)
+        else:
+            self._escritor.esperar()
+            escribir()
+        return coincidencias_path
+
+    def _escribir_archivos(self, tramos: List[_Tramo], raw_path: str, salidas, tiempos: Dict,
+                           tarc_path: Optional[str] = None, contenedor=None):
+        """
+        Escribe el .bin (o el segmento del contenedor), el .tarc opcional y los CSV por canal.
+        'tramos' son las partes consecutivas del guardado (volcados a disco + registro final).
+        """
+        t0 = time.perf_counter()
+        partes = [t.vista for t in tramos]
+
+        if contenedor is not None:
+            for vista in partes:
+                segmento = contenedor.agregar_segmento(vista)
+                if segmento:
+                    print(f"\tSegmento agregado a: {raw_path} (byte {segmento['byte_inicio']}, {segmento['eventos']} eventos)")
+        else:
             # Guardar bin (equivalente a openBinFile/writeBinFile/closeBinFile)
-            raw_path = self._nombre_bin(tstamp, prefix=prefix)
             with open(raw_path, "wb") as f:
-                for fr in self._raw_frames:
-                    f.write(fr)
+                for vista in partes:
+                    f.write(vista.raw)
             print(f"\tBIN guardado en: {raw_path}")
 
-            # Guardar CSV por canal (equivalente a binToCSV())
-            registros_por_ch: Dict[int, List[Dict]] = {}
-            overflow_count = 0
-
-            for r in self.registros:
-                ch = r.get("chan")
-                if ch is None:
-                    continue
-
-                # Overflow de base de tiempo
-                if ch == 3:
-                    overflow_count += 1
-                    continue
-
-                # Canal A → chan = 2
-                if ch == 2:
-                    map_ch = 0   # índice interno para Canal A
-
-                # Canal B → chan = 1
-                elif ch == 1:
-                    map_ch = 1   # índice interno para Canal B
-
-                # chan = 0 u otros → reservado / inválido
-                else:
-                    continue
-
-                registros_por_ch.setdefault(map_ch, []).append(r)
-
-
-            csv_paths: List[str] = []
-            for ch_id, regs in registros_por_ch.items():
-                csv_path = self._nombre_csv(tstamp, ch_id, prefix=prefix)
-                with open(csv_path, "w", newline="") as csvfile:
-                    w = csv.writer(csvfile)
-                    # Headers del C original: Index,Timestamp (ns),Value (mV)
-                    w.writerow(["Index", "Timestamp (ns)", "Value (mV)"])
-                    for index, rec in enumerate(regs):
-                        w.writerow([
-                            index, 
-                            rec.get("ts_abs_ns"), 
-                            rec.get("vp_mv")
-                        ])
-                csv_paths.append(csv_path)
-                print(f"\tCSV CH{self._map_chan_letter(ch_id)} guardado en: {csv_path} ({len(regs)} pulsos)")
-
-            print(f"\tMarcas de tiempo (overflows): {overflow_count}")
-            self._last_overflow_count = overflow_count
-
-            # Reiniciar buffers y offset
-            self._buffer.clear()
-            self.registros.clear()
-            self._raw_frames.clear()
-            self._offset = 0
-
-            # actualizar último guardado
-            self._ultimo_guardado_ts = time.time()
-            
-            return raw_path, csv_paths
+        if tarc_path:
+            escribir_tarc(tarc_path, partes)
+            print(f"\tColumnas guardadas en: {tarc_path}")
+
+        # Guardar CSV por canal (equivalente a binToCSV())
+        # Overflow de base de tiempo → chan = 3; chan = 0 u otros → reservado / inválido
+        overflow_count = sum(int(np.count_nonzero(vista.chan == 3)) for vista in partes)
+
+        for csv_path, ch_id, chan_tar in salidas:
+            # Headers del C original: Index,Timestamp (ns),Value (mV); filas formateadas por bloques
+            if len(partes) == 1:
+                vista = partes[0]
+                sel = vista.chan == chan_tar
+                cantidad = escribir_csv(csv_path, vista.ts_abs_ns[sel], vista.vp_counts[sel])
+            else:
+                cantidad = 0
+                with abrir_csv(csv_path) as archivo:
+                    for vista in partes:
+                        sel = vista.chan == chan_tar
+                        cantidad = escribir_filas(archivo, cantidad, vista.ts_abs_ns[sel], vista.vp_counts[sel])
+            print(f"\tCSV CH{self._map_chan_letter(ch_id)} guardado en: {csv_path} ({cantidad} pulsos)")
+
+        print(f"\tMarcas de tiempo (overflows): {overflow_count}")
+        self._last_overflow_count = overflow_count
+
+        tiempos["escritura_ms"] = (time.perf_counter() - t0) * 1000.0
+        self.estadisticas_guardado.append(tiempos)
+        if self.metricas:
+            self.metricas.tiempo("lock_espera.guardado", tiempos["espera_lock_ms"] / 1000.0)
+            self.metricas.tiempo("lock_retencion.guardado", tiempos["lock_ms"] / 1000.0)
+            self.metricas.tiempo("guardado.escritura", tiempos["escritura_ms"] / 1000.0)
+            self.metricas.sumar("guardados")
+        print(f"\tLock retenido: {tiempos['lock_ms']:.2f} ms, escritura: {tiempos['escritura_ms']:.1f} ms")
 
     # -------------------------
     # Método para reprocesar archivos existentes 
     # -------------------------
-    def load_raw_and_reprocesar(self, input_bin_path: str, output_prefix: Optional[str] = None):
+    def load_raw_and_reprocesar(
+        self,
+        input_bin_path: str,
+        output_prefix: Optional[str] = None,
+        columnar: Optional[bool] = None,
+    ):
         """
         Carga un archivo binario existente, lo procesa y guarda los CSVs resultantes.
         Equivalente a las funciones C binToCSV_console y binToCSV.
+        Con columnar=True también genera el .tarc (ver dump_and_reset).
         """
         print(f"-> Iniciando reprocesamiento de: {input_bin_path}")
 
         # Limpiamos buffers antes de cargar nuevos datos
-        self._buffer.clear()
-        self.registros.clear()
-        self._raw_frames.clear()
-        self._offset = 0
-        
+        self.clear()
+
+
         try:
             with open(input_bin_path, 'rb') as f:
                 raw_data = f.read()
@@ -326,29 +721,178 @@ class ProcesaDatosTAR:
         # dump_and_reset utiliza el timestamp actual para los nombres de archivo.
         prefix_final = output_prefix if output_prefix is not None else "reprocesado"
         
-        raw_path_out, csv_paths_out = self.dump_and_reset(prefix=prefix_final)
+        raw_path_out, csv_paths_out = self.dump_and_reset(prefix=prefix_final, columnar=columnar, final=True)
         
         print("-> Reprocesamiento completo a CSV.")
         return raw_path_out, csv_paths_out
 
+    def reprocesar_streaming(
+        self,
+        input_bin_path: str,
+        output_prefix: Optional[str] = None,
+        progreso: Optional[Callable[[int, int], None]] = None,
+        on_lote: Optional[Callable[[Dict[str, np.ndarray]], None]] = None,
+        tam_bloque: int = 1 << 20,
+    ) -> List[str]:
+        """
+        Reprocesa un .bin a CSV por bloques, con memoria constante sin importar el tamaño del archivo.
+        No usa los buffers internos (puede correr en otro hilo durante la visualización) y no
+        genera una copia del .bin. El offset de los CH=3 se arrastra entre bloques.
+        progreso(bytes_leidos, bytes_totales) se llama tras cada bloque; on_lote recibe las
+        columnas decodificadas de cada bloque (por ejemplo, para acumular histogramas).
+        """
+        if not self.carpeta_csv:
+            print("[WARN] reprocesar_streaming llamado sin carpeta CSV configurada")
+            return []
+
+        print(f"-> Iniciando reprocesamiento (streaming) de: {input_bin_path}")
+        try:
+            total = os.path.getsize(input_bin_path)
+        except FileNotFoundError:
+            print(f"ERROR: Archivo no encontrado en {input_bin_path}")
+            return []
+
+        prefix_final = output_prefix if output_prefix is not None else "reprocesado"
+        tstamp = self._timestamp()
+
+        # CSV por canal: se abren al aparecer el primer pulso del canal (igual que dump_and_reset)
+        salidas: Dict[int, list] = {}   # ch_id → [archivo, índice, ruta]
+        overflow_count = 0
+
+        try:
+            for lote, _, leidos in leer_lotes_bin(input_bin_path, tam_bloque=tam_bloque):
+                overflow_count += int(np.count_nonzero(lote["overflow"]))
+                if on_lote:
+                    on_lote(lote)
+
+                for ch_id, chan_tar in ((0, CANAL_A), (1, CANAL_B)):
+                    sel = lote["chan"] == chan_tar
+                    if not sel.any():
+                        continue
+                    if ch_id not in salidas:
+                        ruta = self._nombre_csv(tstamp, ch_id, prefix=prefix_final)
+                        salidas[ch_id] = [abrir_csv(ruta), 0, ruta]
+
+                    salida = salidas[ch_id]
+                    salida[1] = escribir_filas(salida[0], salida[1], lote["ts_abs_ns"][sel], lote["vp_counts"][sel])
+
+                if progreso:
+                    progreso(leidos, total)
+            if progreso:
+                progreso(total, total)
+        except Exception as e:
+            print(f"ERROR reprocesando archivo binario: {e}")
+            return []
+        finally:
+            for csvfile, _, _ in salidas.values():
+                csvfile.close()
+
+        csv_paths = []
+        for ch_id in sorted(salidas):
+            _, cantidad, ruta = salidas[ch_id]
+            csv_paths.append(ruta)
+            print(f"\tCSV CH{self._map_chan_letter(ch_id)} guardado en: {ruta} ({cantidad} pulsos)")
+        print(f"\tMarcas de tiempo (overflows): {overflow_count}")
+        print("-> Reprocesamiento completo a CSV.")
+        return csv_paths
+
 
     # ======================================================
     #                 Utilidades para GUI
     # ======================================================
     def clear(self):
         with self._lock:
-            self._buffer.clear()
-            self.registros.clear()
-            self._raw_frames.clear()
-            self._offset = 0
-
+            self._anillo.limpiar()
+            if self.sincronizador is not None:
+                self.sincronizador.reiniciar()
+            self.registros.limpiar()
+            self._offset = self.contenedor.offset_final if self.contenedor is not None else 0
+            self._base = 0
+            liberados = self._previo + self._volcados
+            self._previo = []
+            self._volcados = []
+            if self.resumen is not None:
+                self.resumen.reiniciar()
+            if self.coincidencias is not None:
+                self.coincidencias.reiniciar()
+            self.generacion += 1
+        if liberados:
+            self._escritor.encolar(lambda: self._borrar_volcados(liberados))
+
+
+    def registros_nuevos_desde(self, indice: int) -> VistaEventos:
+        """
+        Devuelve los registros desde un índice absoluto en adelante (vista sin copia).
+        Los índices siguen creciendo a través de los guardados; si el lector quedó antes del
+        registro actual se le entregan los tramos pendientes (último guardado y volcados a disco)
+        más el actual. 'fin' indica dónde retomar.
+        """
+        with self._lock:
+            fin = self._base + len(self.registros)
+            tramos = [t for t in self._previo + self._volcados if t.base + len(t.vista) > indice]
+            if indice >= self._base or not tramos:
+                vista = self.registros.desde(max(indice - self._base, 0))
+                return VistaEventos(vista.ts_abs_ns, vista.chan, vista.vp_counts, vista.raw, fin)
+
+            partes = []
+            for tramo in tramos:
+                v = tramo.vista
+                inicio = max(indice - tramo.base, 0)
+                partes.append(VistaEventos(
+                    v.ts_abs_ns[inicio:], v.chan[inicio:], v.vp_counts[inicio:], v.raw[inicio * FRAME_SIZE:],
+                ))
+            partes.append(self.registros.desde(0))
+            return concatenar_vistas(partes, fin)
+
+    def histograma_coincidencias(self, total_previo: int = -1) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Total de pares y copia de la grilla 2D de amplitudes A/B, tomados en un mismo instante.
+        La grilla solo se copia si el total cambió respecto de 'total_previo' (si no, o sin
+        motor, va None).
+        """
+        if self.coincidencias is None:
+            return 0, None
+        with self._lock:
+            # El motor junta eventos_por_paso antes de resolver: a tasas bajas se adelanta acá
+            self.coincidencias.adelantar()
+            total = self.coincidencias.total_pares
+            if total == total_previo:
+                return total, None
+            return total, self.coincidencias.histograma.conteos.copy()
+
+    def pares_coincidentes(self) -> int:
+        """Total de pares resueltos hasta ahora, incluidos los eventos que el motor tenía juntados."""
+        if self.coincidencias is None:
+            return 0
+        with self._lock:
+            self.coincidencias.adelantar()
+            return self.coincidencias.total_pares
 
-    def registros_nuevos_desde(self, indice: int):
-        """Devuelve los registros desde un índice en adelante."""
+    def acumulados(self) -> Dict:
+        """
+        Copia, tomada en un mismo instante, de lo que se acumula en línea (conteos por canal de
+        'resumen' y grilla 2D de coincidencias) junto con el índice absoluto hasta donde cubre:
+        quien la recibe sigue con registros_nuevos_desde(fin) sin contar eventos dos veces.
+        """
+        with self._lock:
+            motor = self.coincidencias
+            if motor is not None:
+                motor.adelantar()
+            return {
+                "fin": self._base + len(self.registros),
+                "generacion": self.generacion,
+                "resumen": ({ch: c.copy() for ch, c in self.resumen.conteos.items()}
+                            if self.resumen is not None else None),
+                "histograma_2d": motor.histograma.conteos.copy() if motor is not None else None,
+                "total_pares": motor.total_pares if motor is not None else 0,
+            }
+
+    def estadisticas_copia(self) -> Dict[str, float]:
+        """Bytes copiados por frame en la etapa de framing (anillo actual vs. buffer anterior)."""
         with self._lock:
-            return self.registros[indice:]
+            return self._anillo.estadisticas()
 
     def total_registros(self) -> int:
-        """Devuelve la cantidad total de registros interpretados acumulados."""
+        """Devuelve la cantidad total de registros interpretados acumulados (índice absoluto)."""
         with self._lock:
-            return len(self.registros)
+            return self._base + len(self.registros)
@@ -0,0 +1,23 @@
+# ============================================================
+#   DEFINICIONES DEL PROTOCOLO TAR (firmware real — 8 bytes)
+# ============================================================
+FRAME_SIZE = 8                    # Tamaño fijo de frame
+T_PERIOD = 0xFFFFFFFF             # Para eventos CH=3
+
+# Máscaras del firmware real (binToCSV.h)
+MSK_HEADER = 0xFF00000000000000
+MSK_TS     = 0x00FFFFFFFF000000
+MSK_CH     = 0x0000000000C00000
+MSK_VP     = 0x00000000003FFF00
+MSK_FOOTER = 0x00000000000000FF
+
+OFF_TS = 24
+OFF_CH = 22
+OFF_VP = 8
+
+# Definición de la resolución 
+ZMODADC1410_RESOLUTION = 3.21 # mv
+
+# Canales del TAR (chan del frame): Canal A → 2, Canal B → 1
+CANAL_A = 2
+CANAL_B = 1
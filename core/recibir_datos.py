@@ -1,5 +1,6 @@
 
 import serial
+import selectors
 import threading
 import time
 
@@ -8,12 +9,25 @@ class RecibirDatos:
     """Encapsula toda la lógica de comunicación serie, utiliza un hilo secundario para leer datos constantemente sin congelar 
     la aplicación principal, se utilizan eventos para no hacer polling sobre el estado del puerto, y se gestiona si el puerto
     está abierto o cerrado y controla el ciclo de vida del hilo de lectura."""
-    def __init__(self, on_data_callback=None, on_error_callback=None):
+    def __init__(self, on_data_callback=None, on_error_callback=None,
+                 modo_lectura="evento", tam_bloque=4096, latencia_ms=5.0):
         # on_data nos avisa la llegada de datos, on_error si surgen errores en el puerto       
         self.serial = None      # Incializar variable datos en serie 
         self.port = None        # Inicializar variable puerto
         self.baudrate = 115200  # ajustable al TAR
 
+        # Modo de lectura: "evento" bloquea en read() hasta que llegan datos (sin despertares en
+        # reposo) y junta hasta tam_bloque bytes esperando como máximo latencia_ms; "polling" es
+        # el esquema anterior (in_waiting + sleep de 5 ms).
+        self.modo_lectura = modo_lectura
+        self.tam_bloque = tam_bloque
+        self.latencia_ms = latencia_ms
+
+        # Estadísticas de lectura
+        self.bytes_recibidos = 0
+        self.lecturas = 0
+        self._t_inicio = None
+
         # Callbacks externos
         self.on_data = on_data_callback     # Se configura el callback para la llegada de datos
         self.on_error = on_error_callback   
@@ -31,7 +45,7 @@ class RecibirDatos:
             self.serial = serial.Serial(
                 port=port,
                 baudrate=self.baudrate,
-                timeout=0.1
+                timeout=None if self.modo_lectura == "evento" else 0.1
             )
         except Exception as e:
             if self.on_error:
@@ -40,6 +54,9 @@ class RecibirDatos:
 
         self.port = port
         self._stop_event.clear()
+        self.bytes_recibidos = 0
+        self.lecturas = 0
+        self._t_inicio = time.perf_counter()
 
         # Iniciar hilo de lectura
         self._thread = threading.Thread(target=self._read_loop, daemon=True)
@@ -51,6 +68,13 @@ class RecibirDatos:
         """Detiene el hilo y cierra el puerto."""
         self._stop_event.set()      # Es el evento que detiene el funcionamiento del hilo, hay datos
 
+        # En modo evento el hilo está bloqueado en read(): se lo despierta
+        if self.serial and self.serial.is_open and hasattr(self.serial, "cancel_read"):
+            try:
+                self.serial.cancel_read()
+            except Exception:
+                pass
+
         if self._thread:
             self._thread.join(timeout=1.0)
 
@@ -83,11 +107,19 @@ class RecibirDatos:
     # ============================================================
     def _read_loop(self):
         """Hilo que lee constantemente del puerto serie."""
+        if self.modo_lectura == "evento":
+            self._read_loop_evento()
+        else:
+            self._read_loop_polling()
+
+    def _read_loop_polling(self):
+        """Lectura por consulta de in_waiting cada 5 ms."""
 
         while not self._stop_event.is_set():    # Bucle infinito mientras no hay datos entrantes
             try:
                 if self.serial and self.serial.in_waiting > 0:
                     data = self.serial.read(self.serial.in_waiting)
+                    self._contar(data)
 
                     # Llamar callback con los bytes crudos
                     if self.on_data:
@@ -100,6 +132,79 @@ class RecibirDatos:
 
             time.sleep(0.005)  # control para no saturar CPU
 
+    def _read_loop_evento(self):
+        """Lectura bloqueante: sin datos el hilo duerme en read(); con carga entrega bloques grandes."""
+        ser = self.serial
+        selector = None
+        try:
+            selector = selectors.DefaultSelector()
+            selector.register(ser.fileno(), selectors.EVENT_READ)
+        except Exception:
+            selector = None     # sin descriptor seleccionable (p. ej. Windows)
+
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    # Bloquea hasta el primer byte (o cancel_read() al cerrar)
+                    data = ser.read(max(1, min(ser.in_waiting, self.tam_bloque)))
+                    if not data:
+                        continue
+
+                    if len(data) < self.tam_bloque and self.latencia_ms > 0:
+                        data += self._completar_bloque(ser, selector, len(data))
+
+                    self._contar(data)
+                    if self.on_data:
+                        self.on_data(data)
+
+                except Exception as e:
+                    if not self._stop_event.is_set() and self.on_error:
+                        self.on_error(f"Error leyendo puerto: {e}")
+                    break
+        finally:
+            if selector:
+                selector.close()
+
+    def _completar_bloque(self, ser, selector, ya_leidos: int) -> bytes:
+        """Junta más bytes hasta tam_bloque, esperando como máximo latencia_ms desde el primero."""
+        limite = time.perf_counter() + self.latencia_ms / 1000.0
+        partes = []
+        n = ya_leidos
+        esperado = False
+
+        while n < self.tam_bloque:
+            disponibles = ser.in_waiting
+            if disponibles:
+                parte = ser.read(min(disponibles, self.tam_bloque - n))
+                partes.append(parte)
+                n += len(parte)
+                continue
+
+            restante = limite - time.perf_counter()
+            if restante <= 0 or (esperado and selector is None):
+                break
+            if selector is not None:
+                selector.select(restante)
+            else:
+                time.sleep(restante)
+                esperado = True
+
+        return b"".join(partes)
+
+    def _contar(self, data: bytes):
+        self.bytes_recibidos += len(data)
+        self.lecturas += 1
+
+    def estadisticas(self):
+        """Bytes recibidos, lecturas, bytes por lectura y tasa lograda (bytes/s) desde open()."""
+        transcurrido = time.perf_counter() - self._t_inicio if self._t_inicio else 0.0
+        return {
+            "bytes": self.bytes_recibidos,
+            "lecturas": self.lecturas,
+            "bytes_por_lectura": self.bytes_recibidos / self.lecturas if self.lecturas else 0.0,
+            "bytes_s": self.bytes_recibidos / transcurrido if transcurrido > 0 else 0.0,
+        }
+
     # ============================================================
     #                   PARAMETROS AL TAR
     # ============================================================
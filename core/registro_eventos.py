@@ -0,0 +1,140 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.protocolo import FRAME_SIZE, ZMODADC1410_RESOLUTION
+
+CHAN_INVALIDO = 0xFF              # Canal para registros sin 'chan' (interpretadores propios)
+
+
+# ====================================================================
+#                       VISTA DE EVENTOS
+# ====================================================================
+class VistaEventos:
+    """
+    Vista liviana (sin copia) sobre un rango de eventos del registro columnar.
+    Cada columna es un array NumPy; 'raw' contiene los frames crudos contiguos (8 bytes por evento).
+    'fin' es el índice absoluto siguiente al último evento, para retomar la lectura desde ahí.
+    """
+
+    def __init__(self, ts_abs_ns: np.ndarray, chan: np.ndarray, vp_counts: np.ndarray, raw: np.ndarray,
+                 fin: Optional[int] = None):
+        self.ts_abs_ns = ts_abs_ns
+        self.chan = chan
+        self.vp_counts = vp_counts
+        self.raw = raw
+        self.fin = len(chan) if fin is None else fin
+
+    def __len__(self) -> int:
+        return len(self.chan)
+
+    @property
+    def vp_mv(self) -> np.ndarray:
+        """Amplitud en mV, calculada a partir de vp_counts (igual que _interpretador_TAR)."""
+        return self.vp_counts * ZMODADC1410_RESOLUTION
+
+
+def concatenar_vistas(vistas: Sequence[VistaEventos], fin: Optional[int] = None) -> VistaEventos:
+    """Une varias vistas en una sola (copia); con una única vista la devuelve tal cual."""
+    if len(vistas) == 1:
+        vista = vistas[0]
+        return VistaEventos(vista.ts_abs_ns, vista.chan, vista.vp_counts, vista.raw, fin)
+    return VistaEventos(
+        np.concatenate([v.ts_abs_ns for v in vistas]),
+        np.concatenate([v.chan for v in vistas]),
+        np.concatenate([v.vp_counts for v in vistas]),
+        np.concatenate([v.raw for v in vistas]),
+        fin,
+    )
+
+
+# ====================================================================
+#                   REGISTRO COLUMNAR DE EVENTOS
+# ====================================================================
+class RegistroEventos:
+    """
+    Almacena los eventos decodificados en arrays tipados que crecen por duplicación:
+    ts_abs_ns (int64), chan (uint8), vp_counts (uint16) y los frames crudos en un único buffer.
+    Las vistas entregadas siguen siendo válidas aunque el registro crezca o se limpie,
+    porque el crecimiento y la limpieza reservan arrays nuevos en lugar de reutilizar los anteriores.
+    """
+
+    def __init__(self, capacidad_inicial: int = 4096):
+        self._capacidad_inicial = max(1, capacidad_inicial)
+        self._reservar(self._capacidad_inicial)
+
+    def _reservar(self, capacidad: int):
+        self._n = 0
+        self._ts_abs_ns = np.empty(capacidad, dtype=np.int64)
+        self._chan = np.empty(capacidad, dtype=np.uint8)
+        self._vp_counts = np.empty(capacidad, dtype=np.uint16)
+        self._raw = np.empty(capacidad * FRAME_SIZE, dtype=np.uint8)
+
+    def _asegurar_capacidad(self, extra: int):
+        requerido = self._n + extra
+        capacidad = len(self._chan)
+        if requerido <= capacidad:
+            return
+
+        while capacidad < requerido:
+            capacidad *= 2
+
+        n = self._n
+        ts, chan, vp, raw = self._ts_abs_ns, self._chan, self._vp_counts, self._raw
+        self._reservar(capacidad)
+        self._n = n
+        self._ts_abs_ns[:n] = ts[:n]
+        self._chan[:n] = chan[:n]
+        self._vp_counts[:n] = vp[:n]
+        self._raw[:n * FRAME_SIZE] = raw[:n * FRAME_SIZE]
+
+    # -------------------------
+    # Carga de eventos
+    # -------------------------
+    def agregar_lote(self, ts_abs_ns: np.ndarray, chan: np.ndarray, vp_counts: np.ndarray, crudo):
+        """Agrega un lote de eventos ya decodificados junto con sus frames crudos."""
+        k = len(chan)
+        if k == 0:
+            return
+        self._asegurar_capacidad(k)
+        i, j = self._n, self._n + k
+        self._ts_abs_ns[i:j] = ts_abs_ns
+        self._chan[i:j] = chan
+        self._vp_counts[i:j] = vp_counts
+        self._raw[i * FRAME_SIZE:j * FRAME_SIZE] = np.frombuffer(crudo, dtype=np.uint8, count=k * FRAME_SIZE)
+        self._n = j
+
+    def agregar(self, ts_abs_ns: int, chan: int, vp_counts: int, frame: bytes):
+        """Agrega un único evento (camino de interpretadores propios)."""
+        self._asegurar_capacidad(1)
+        i = self._n
+        self._ts_abs_ns[i] = ts_abs_ns
+        self._chan[i] = chan
+        self._vp_counts[i] = vp_counts
+        self._raw[i * FRAME_SIZE:(i + 1) * FRAME_SIZE] = np.frombuffer(frame, dtype=np.uint8, count=FRAME_SIZE)
+        self._n = i + 1
+
+    def limpiar(self):
+        self._reservar(self._capacidad_inicial)
+
+    # -------------------------
+    # Lectura
+    # -------------------------
+    def __len__(self) -> int:
+        return self._n
+
+    def desde(self, indice: int, hasta: Optional[int] = None) -> VistaEventos:
+        """Devuelve una vista (sin copia) de los eventos en [indice, hasta)."""
+        j = self._n if hasta is None else min(hasta, self._n)
+        i = min(max(indice, 0), j)
+        return VistaEventos(
+            self._ts_abs_ns[i:j],
+            self._chan[i:j],
+            self._vp_counts[i:j],
+            self._raw[i * FRAME_SIZE:j * FRAME_SIZE],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria reservada por las columnas (bytes)."""
+        return self._ts_abs_ns.nbytes + self._chan.nbytes + self._vp_counts.nbytes + self._raw.nbytes
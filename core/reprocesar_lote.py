@@ -0,0 +1,179 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+import glob
+import os
+import shutil
+import time
+
+import numpy as np
+
+from core.procesar_datos import (
+    FRAME_SIZE, T_PERIOD, CANAL_A, CANAL_B,
+    leer_lotes_bin,
+)
+from core.exportar_csv import abrir_csv, escribir_filas
+
+# Archivos más grandes que esto se parten en varios rangos de frames
+TAM_PARTICION = 64 << 20
+CANALES = (("A", CANAL_A), ("B", CANAL_B))
+
+
+# ====================================================================
+#            TAREAS DE LOS PROCESOS (funciones de nivel módulo)
+# ====================================================================
+def _contar_particion(ruta: str, inicio: int, fin: int) -> Tuple[int, int, int]:
+    """Primera pasada de un rango: cantidad de CH=3 y de pulsos de cada canal."""
+    overflows = n_a = n_b = 0
+    for lote, _, _ in leer_lotes_bin(ruta, inicio, fin):
+        overflows += int(np.count_nonzero(lote["overflow"]))
+        n_a += int(np.count_nonzero(lote["chan"] == CANAL_A))
+        n_b += int(np.count_nonzero(lote["chan"] == CANAL_B))
+    return overflows, n_a, n_b
+
+
+def _convertir_particion(
+    ruta: str, inicio: int, fin: int, offset: int,
+    indices: Dict[str, int], salidas: Dict[str, str], con_header: bool,
+) -> Dict[str, int]:
+    """
+    Decodifica un rango empezando en 'offset' (suma de CH=3 previos) y escribe sus filas
+    en los CSV parciales 'salidas', numerando desde 'indices'. Retorna pulsos por canal.
+    """
+    archivos, siguiente = {}, dict(indices)
+    try:
+        for letra, ruta_csv in salidas.items():
+            archivos[letra] = abrir_csv(ruta_csv, con_encabezado=con_header)
+
+        for lote, _, _ in leer_lotes_bin(ruta, inicio, fin, offset=offset):
+            for letra, chan_tar in CANALES:
+                if letra not in archivos:
+                    continue
+                sel = lote["chan"] == chan_tar
+                siguiente[letra] = escribir_filas(
+                    archivos[letra], siguiente[letra], lote["ts_abs_ns"][sel], lote["vp_counts"][sel]
+                )
+    finally:
+        for f in archivos.values():
+            f.close()
+
+    return {letra: siguiente[letra] - indices[letra] for letra in salidas}
+
+
+# ====================================================================
+#                       ARMADO DEL LOTE
+# ====================================================================
+def listar_bins(entrada: Union[str, Sequence[str]]) -> List[str]:
+    """Acepta una carpeta de ensayo (o su carpeta bin) o una lista de .bin."""
+    if isinstance(entrada, (str, os.PathLike)):
+        carpeta = str(entrada)
+        if os.path.isdir(os.path.join(carpeta, "bin")):
+            carpeta = os.path.join(carpeta, "bin")
+        return sorted(glob.glob(os.path.join(carpeta, "*.bin")))
+    return [str(r) for r in entrada]
+
+
+def _particiones(tam: int, tam_particion: int) -> List[Tuple[int, int]]:
+    """Rangos [inicio, fin) alineados a frame; el último incluye el resto incompleto."""
+    paso = max(FRAME_SIZE, tam_particion // FRAME_SIZE * FRAME_SIZE)
+    bordes = list(range(0, tam, paso)) + [tam]
+    if len(bordes) > 2 and tam - bordes[-2] < FRAME_SIZE:
+        bordes.pop(-2)
+    return list(zip(bordes[:-1], bordes[1:])) or [(0, 0)]
+
+
+def reprocesar_ensayo(
+    entrada: Union[str, Sequence[str]],
+    carpeta_csv: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    tam_particion: int = TAM_PARTICION,
+) -> Dict:
+    """
+    Convierte a CSV todos los .bin de un ensayo (o una lista de .bin) en un ProcessPoolExecutor.
+    El trabajo se reparte por archivo; los archivos grandes se parten además en rangos de frames.
+    Para esos rangos, una primera pasada cuenta los CH=3 y pulsos por canal, y con sus sumas
+    prefijas cada rango arranca con el offset y el Index correctos, de modo que el resultado
+    es idéntico a convertir el archivo de una sola vez. Cada archivo genera
+    <nombre>_canal_A.csv / <nombre>_canal_B.csv en 'carpeta_csv'
+    (por defecto, csv_reprocesado junto a la carpeta de los .bin).
+    """
+    rutas = listar_bins(entrada)
+    if not rutas:
+        print("[Reproceso] No se encontraron archivos .bin")
+        return {"archivos": 0, "bytes": 0, "segundos": 0.0, "mb_s": 0.0, "csv": []}
+
+    if carpeta_csv is None:
+        carpeta_csv = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(rutas[0]))), "csv_reprocesado")
+    os.makedirs(carpeta_csv, exist_ok=True)
+
+    t0 = time.perf_counter()
+    total_bytes = sum(os.path.getsize(r) for r in rutas)
+    print(f"[Reproceso] {len(rutas)} archivos, {total_bytes / 1e6:.1f} MB")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        partes = {r: _particiones(os.path.getsize(r), tam_particion) for r in rutas}
+
+        # 1) Conteos por rango (solo archivos partidos)
+        conteos = {
+            (r, i): pool.submit(_contar_particion, r, ini, fin)
+            for r in rutas if len(partes[r]) > 1
+            for i, (ini, fin) in enumerate(partes[r])
+        }
+        conteos = {clave: fut.result() for clave, fut in conteos.items()}
+
+        # 2) Conversión de cada rango con offset e índices de las sumas prefijas
+        tareas = []
+        for r in rutas:
+            base = os.path.join(carpeta_csv, os.path.splitext(os.path.basename(r))[0])
+            finales = {letra: f"{base}_canal_{letra}.csv" for letra, _ in CANALES}
+            offset, indices = 0, {"A": 0, "B": 0}
+
+            for i, (ini, fin) in enumerate(partes[r]):
+                if len(partes[r]) == 1:
+                    salidas = finales
+                else:
+                    salidas = {letra: f"{ruta}.part{i}" for letra, ruta in finales.items()}
+                fut = pool.submit(_convertir_particion, r, ini, fin, offset, dict(indices), salidas, i == 0)
+                tareas.append((r, i, salidas, fut))
+
+                if len(partes[r]) > 1:
+                    overflows, n_a, n_b = conteos[(r, i)]
+                    offset += overflows * T_PERIOD
+                    indices["A"] += n_a
+                    indices["B"] += n_b
+
+        pulsos: Dict[Tuple[str, str], int] = {}
+        for r, i, salidas, fut in tareas:
+            for letra, n in fut.result().items():
+                pulsos[(r, letra)] = pulsos.get((r, letra), 0) + n
+
+    # 3) Unir los parciales en orden y descartar canales sin pulsos (igual que dump_and_reset)
+    csv_paths: List[str] = []
+    for r in rutas:
+        base = os.path.join(carpeta_csv, os.path.splitext(os.path.basename(r))[0])
+        for letra, _ in CANALES:
+            final = f"{base}_canal_{letra}.csv"
+            n_partes = len(partes[r])
+            if n_partes > 1:
+                with open(final, "wb") as destino:
+                    for i in range(n_partes):
+                        parcial = f"{final}.part{i}"
+                        with open(parcial, "rb") as origen:
+                            shutil.copyfileobj(origen, destino, 1 << 20)
+                        os.remove(parcial)
+
+            if pulsos.get((r, letra), 0):
+                csv_paths.append(final)
+            else:
+                os.remove(final)
+
+    segundos = time.perf_counter() - t0
+    mb_s = total_bytes / 1e6 / segundos if segundos > 0 else 0.0
+    print(f"[Reproceso] {len(csv_paths)} CSV en {carpeta_csv} — {segundos:.2f} s, {mb_s:.1f} MB/s")
+
+    return {
+        "archivos": len(rutas),
+        "bytes": total_bytes,
+        "segundos": segundos,
+        "mb_s": mb_s,
+        "csv": csv_paths,
+    }
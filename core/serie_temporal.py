@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+from core.protocolo import ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B
+from core.base_tiempo import BaseTiempoContinua
+
+_SIN_MINIMO = np.iinfo(np.uint16).max
+
+
+# ====================================================================
+#                        DECIMACIÓN MIN / MAX
+# ====================================================================
+def decimar_min_max(minimos: np.ndarray, maximos: np.ndarray, columnas: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Agrupa intervalos consecutivos para que no haya más de 'columnas' grupos, conservando
+    el mínimo y el máximo de cada grupo (la envolvente no pierde picos).
+    Retorna (mínimos, máximos, intervalos por grupo). El costo depende de la cantidad de
+    intervalos, y lo que se dibuja depende solo de 'columnas'.
+    """
+    n = len(minimos)
+    grupo = max(1, -(-n // max(1, columnas)))
+    if grupo == 1:
+        return minimos, maximos, 1
+
+    relleno = -n % grupo
+    minimos = np.concatenate([minimos, np.full(relleno, minimos.max(initial=0), dtype=minimos.dtype)])
+    maximos = np.concatenate([maximos, np.full(relleno, maximos.min(initial=0), dtype=maximos.dtype)])
+    return minimos.reshape(-1, grupo).min(axis=1), maximos.reshape(-1, grupo).max(axis=1), grupo
+
+
+# ====================================================================
+#              TASA Y AMPLITUD EN EL TIEMPO (INCREMENTAL)
+# ====================================================================
+class SerieTemporal:
+    """
+    Por canal y por intervalo de 'resolucion_s' (tiempo del TAR, desde el primer pulso):
+    cantidad de pulsos y vp_counts mínimo / máximo. Cada lote nuevo se suma con bincount y
+    minimum/maximum.at, sin volver a recorrer eventos; la memoria crece con la duración del
+    ensayo (un valor por intervalo), no con la cantidad de eventos.
+    """
+
+    def __init__(self, canales: Iterable[int] = (CANAL_A, CANAL_B), resolucion_s: float = 0.1):
+        self.canales = tuple(canales)
+        self.resolucion_s = resolucion_s
+        self._resolucion_ns = int(round(resolucion_s * 1e9))
+        self.base = BaseTiempoContinua()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.base.reiniciar()
+        self.t0_ns = None
+        self.intervalos = 0
+        self.conteos: Dict[int, np.ndarray] = {ch: np.zeros(0, dtype=np.int64) for ch in self.canales}
+        self.minimos: Dict[int, np.ndarray] = {ch: np.zeros(0, dtype=np.uint16) for ch in self.canales}
+        self.maximos: Dict[int, np.ndarray] = {ch: np.zeros(0, dtype=np.uint16) for ch in self.canales}
+
+    def _asegurar_intervalos(self, n: int):
+        capacidad = len(self.conteos[self.canales[0]])
+        if n > capacidad:
+            nueva = max(n, 2 * capacidad, 1024)
+            for ch in self.canales:
+                extra = nueva - capacidad
+                self.conteos[ch] = np.concatenate([self.conteos[ch], np.zeros(extra, dtype=np.int64)])
+                self.minimos[ch] = np.concatenate([self.minimos[ch], np.full(extra, _SIN_MINIMO, dtype=np.uint16)])
+                self.maximos[ch] = np.concatenate([self.maximos[ch], np.zeros(extra, dtype=np.uint16)])
+        self.intervalos = max(self.intervalos, n)
+
+    def acumular(self, chan: np.ndarray, ts_abs_ns: np.ndarray, vp_counts: np.ndarray):
+        """Suma un lote de eventos (columnas del registro; los CH=3 se ignoran)."""
+        pulsos = np.isin(chan, self.canales)
+        if not pulsos.any():
+            return
+        chan = chan[pulsos]
+        vp = vp_counts[pulsos]
+        ts = self.base.continuar(ts_abs_ns[pulsos])
+
+        if self.t0_ns is None:
+            self.t0_ns = int(ts.min())
+        idx = np.maximum((ts - self.t0_ns) // self._resolucion_ns, 0)
+        self._asegurar_intervalos(int(idx.max()) + 1)
+
+        for ch in self.canales:
+            sel = chan == ch
+            if not sel.any():
+                continue
+            i = idx[sel]
+            n = int(i.max()) + 1
+            self.conteos[ch][:n] += np.bincount(i, minlength=n)
+            np.minimum.at(self.minimos[ch], i, vp[sel])
+            np.maximum.at(self.maximos[ch], i, vp[sel])
+
+    # -------------------------
+    # Lectura (ya decimada)
+    # -------------------------
+    def tasa(self, canal: int, columnas: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Pulsos por segundo del canal: (bordes_s, mínimo, máximo) con a lo sumo 'columnas' grupos.
+        Se cuenta por segundo completo (el segundo en curso no se incluye) y cada grupo es la
+        envolvente de esas tasas.
+        """
+        por_segundo = max(1, int(round(1.0 / self.resolucion_s)))
+        segundos = max(self.intervalos - 1, 0) // por_segundo
+        conteos = self.conteos[canal][:segundos * por_segundo]
+        eventos_s = conteos.reshape(-1, por_segundo).sum(axis=1) / (por_segundo * self.resolucion_s)
+        minimos, maximos, grupo = decimar_min_max(eventos_s, eventos_s, columnas)
+        bordes_s = np.arange(len(minimos) + 1) * grupo * por_segundo * self.resolucion_s
+        return bordes_s, minimos, maximos
+
+    def amplitud(self, canal: int, columnas: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Envolvente de amplitud (bordes_s, mín mV, máx mV); los grupos sin pulsos quedan en NaN."""
+        n = self.intervalos
+        minimos, maximos, grupo = decimar_min_max(self.minimos[canal][:n], self.maximos[canal][:n], columnas)
+        vacios = minimos > maximos
+        bordes_s = np.arange(len(minimos) + 1) * grupo * self.resolucion_s
+        min_mv = np.where(vacios, np.nan, minimos * ZMODADC1410_RESOLUTION)
+        max_mv = np.where(vacios, np.nan, maximos * ZMODADC1410_RESOLUTION)
+        return bordes_s, min_mv, max_mv
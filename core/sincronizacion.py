@@ -0,0 +1,249 @@
+from typing import Dict, Iterator, Optional
+from collections import Counter
+
+import numpy as np
+
+from core.protocolo import FRAME_SIZE, MSK_HEADER, MSK_FOOTER
+
+# Bytes del flujo usados para aprender header/footer cuando no se configuran (64 frames)
+BYTES_APRENDIZAJE = 64 * FRAME_SIZE
+# Fracción mínima de frames con el mismo par header/footer para darlo por aprendido
+COINCIDENCIA_MINIMA = 0.9
+# Ventana de búsqueda de la próxima alineación válida (se amplía hasta el final del chunk)
+VENTANA_BUSQUEDA = 4096
+
+# Máscara de header+footer sobre el frame leído como uint64 nativo (little-endian):
+# el header es el primer byte del frame y el footer el último.
+_DTYPE_NATIVO = np.dtype("<u8")
+_MASCARA = np.uint64(int.from_bytes((MSK_HEADER | MSK_FOOTER).to_bytes(8, "big"), "little"))
+
+
+# ====================================================================
+#             VALIDACIÓN DE HEADER / FOOTER Y RESINCRONIZACIÓN
+# ====================================================================
+class SincronizadorTAR:
+    """
+    Etapa de framing con validación: reemplaza a BufferAnillo.consumir() en feed().
+    Cada chunk se valida completo con una sola operación sobre arrays (header y footer de
+    todos los frames a la vez); si todo coincide se entrega tal cual, sin copia.
+    Ante un frame inválido se busca, también vectorizado, el próximo offset donde
+    'frames_confirmacion' frames seguidos tienen header y footer válidos; los bytes
+    salteados se cuentan como descartados y cada realineación como una resincronización.
+    Si header/footer no se indican, se aprenden de los primeros BYTES_APRENDIZAJE bytes.
+    """
+
+    def __init__(self, header: Optional[int] = None, footer: Optional[int] = None,
+                 frames_confirmacion: int = 2):
+        if (header is None) != (footer is None):
+            raise ValueError("header y footer se configuran juntos (o ninguno, para aprenderlos)")
+        self.frames_confirmacion = max(1, frames_confirmacion)
+        self._configurar(header, footer)
+
+        self._resto = b""          # bytes pendientes del chunk anterior (< confirmación)
+        self._sincronizado = True  # False mientras se busca una alineación válida
+
+        self.frames_validos = 0
+        self.resincronizaciones = 0
+        self.bytes_descartados = 0
+
+    def _configurar(self, header: Optional[int], footer: Optional[int]):
+        self.header = header
+        self.footer = footer
+        if header is None:
+            return
+        self._esperado = np.uint64(header | (footer << 56))
+
+    @property
+    def aprendido(self) -> bool:
+        return self.header is not None
+
+    def reiniciar(self):
+        """Descarta lo pendiente (corte del flujo); header/footer aprendidos se conservan."""
+        self._resto = b""
+        self._sincronizado = True
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "header": self.header,
+            "footer": self.footer,
+            "frames_validos": self.frames_validos,
+            "resincronizaciones": self.resincronizaciones,
+            "bytes_descartados": self.bytes_descartados,
+        }
+
+    # -------------------------
+    # Aprendizaje de header / footer
+    # -------------------------
+    def _aprender(self, datos: np.ndarray) -> Optional[int]:
+        """
+        Busca la alineación (0..7) y el par (header, footer) más repetido en 'datos'.
+        Retorna la alineación si el par aparece en al menos COINCIDENCIA_MINIMA de los frames.
+        Si los bytes altos del TS también son constantes (timestamps chicos), las alineaciones
+        corridas hacia adelante también cumplen: se toma la primera de esa racha.
+        """
+        candidatos = {}
+        for alineacion in range(FRAME_SIZE):
+            filas = datos[alineacion:]
+            filas = filas[:len(filas) // FRAME_SIZE * FRAME_SIZE].reshape(-1, FRAME_SIZE)
+            if len(filas) < 2:
+                continue
+            pares = Counter(zip(filas[:, 0].tolist(), filas[:, -1].tolist()))
+            par, cantidad = pares.most_common(1)[0]
+            if cantidad / len(filas) >= COINCIDENCIA_MINIMA:
+                candidatos[alineacion] = (cantidad / len(filas), par)
+
+        inicios = [a for a in candidatos if (a - 1) % FRAME_SIZE not in candidatos]
+        if not inicios:
+            return None     # sin par dominante, o flujo constante (ambiguo)
+        alineacion = max(inicios, key=lambda a: candidatos[a][0])
+        fraccion, par = candidatos[alineacion]
+        self._configurar(*par)
+        print(f"[Sync] Header 0x{par[0]:02X} / footer 0x{par[1]:02X} aprendidos ({fraccion:.0%} de los frames)")
+        return alineacion
+
+    # -------------------------
+    # Validación y búsqueda (vectorizadas)
+    # -------------------------
+    def _validos(self, mv: memoryview, pos: int, n_frames: int) -> np.ndarray:
+        """Máscara de frames con header y footer correctos desde 'pos' (sin copia del bloque)."""
+        frames = np.frombuffer(mv, dtype=_DTYPE_NATIVO, count=n_frames, offset=pos)
+        return (frames & _MASCARA) == self._esperado
+
+    def _buscar(self, datos: np.ndarray, desde: int, hasta: int) -> Optional[int]:
+        """
+        Primer offset q en [desde, hasta) con 'frames_confirmacion' frames válidos seguidos.
+        Requiere que datos tenga bytes suficientes para confirmar cualquier q < hasta.
+        """
+        h, f = self.header, self.footer
+        pos = desde
+        while pos < hasta:
+            fin = min(hasta, pos + VENTANA_BUSQUEDA)
+            largo = fin - pos
+            ok = np.ones(largo, dtype=bool)
+            for k in range(self.frames_confirmacion):
+                base = pos + k * FRAME_SIZE
+                ok &= datos[base:base + largo] == h
+                ok &= datos[base + FRAME_SIZE - 1:base + FRAME_SIZE - 1 + largo] == f
+            encontrados = np.flatnonzero(ok)
+            if len(encontrados):
+                return pos + int(encontrados[0])
+            pos = fin
+        return None
+
+    def _realinear(self, datos: np.ndarray, pos: int, hasta: int) -> int:
+        """Busca desde 'pos' y cuenta lo descartado; retorna la nueva posición."""
+        q = self._buscar(datos, pos, hasta)
+        if q is None:
+            self.bytes_descartados += hasta - pos
+            return hasta
+        self.bytes_descartados += q - pos
+        self.resincronizaciones += 1
+        self._sincronizado = True
+        return q
+
+    # -------------------------
+    # Consumo de chunks
+    # -------------------------
+    def consumir(self, data) -> Iterator[memoryview]:
+        """
+        Entrega bloques contiguos de frames válidos (memoryview) listos para decodificar.
+        Mismo contrato que BufferAnillo.consumir: cada bloque debe procesarse antes de pedir el siguiente.
+        """
+        mv = memoryview(data).cast("B")
+        if not self.aprendido:
+            yield from self._consumir_aprendiendo(mv)
+            return
+
+        inicio = 0
+        if self._resto:
+            k = len(self._resto)
+            necesario = self.frames_confirmacion * FRAME_SIZE
+            if self._sincronizado and len(mv) >= FRAME_SIZE - k:
+                # Caso común: el frame partido entre chunks es válido, se completa y se sigue
+                frame = self._resto + bytes(mv[:FRAME_SIZE - k])
+                if frame[0] == self.header and frame[-1] == self.footer:
+                    self._resto = b""
+                    self.frames_validos += 1
+                    yield memoryview(frame)
+                    yield from self._consumir_bloque(mv, FRAME_SIZE - k)
+                    return
+
+            if len(mv) < necesario:
+                # Chunk chico: se junta con lo pendiente (copia de pocos bytes) y se procesa entero
+                junto, self._resto = self._resto + bytes(mv), b""
+                yield from self._consumir_bloque(memoryview(junto), 0)
+                return
+
+            # Los frames que empiezan en lo pendiente se resuelven sobre una copia corta:
+            # lo pendiente más los bytes justos del chunk para confirmarlos
+            cabeza, self._resto = self._resto + bytes(mv[:necesario]), b""
+            pos = yield from self._consumir_bloque(memoryview(cabeza), 0, limite=k)
+            inicio = pos - k
+        yield from self._consumir_bloque(mv, inicio)
+
+    def _consumir_aprendiendo(self, mv: memoryview) -> Iterator[memoryview]:
+        """Junta bytes hasta poder aprender header/footer; si no hay un par dominante se sigue sin validar."""
+        self._resto += bytes(mv)
+        if len(self._resto) < BYTES_APRENDIZAJE:
+            return
+
+        datos = np.frombuffer(self._resto, dtype=np.uint8)
+        alineacion = self._aprender(datos)
+        pendiente, self._resto = self._resto, b""
+        if alineacion is None:
+            # Flujo sin header/footer fijos: se entrega alineado como antes y se reintenta después
+            n = len(pendiente) // FRAME_SIZE * FRAME_SIZE
+            self._resto = pendiente[n:]
+            self.frames_validos += n // FRAME_SIZE
+            yield memoryview(pendiente)[:n]
+            return
+
+        self.bytes_descartados += alineacion
+        yield from self._consumir_bloque(memoryview(pendiente), alineacion)
+
+    def _consumir_bloque(self, mv: memoryview, pos: int, limite: Optional[int] = None):
+        """
+        Valida y entrega los frames de mv desde 'pos'. Sin 'limite', lo que no alcanza a decidirse
+        queda pendiente para el próximo chunk; con 'limite' solo se resuelven los frames que
+        empiezan antes de esa posición y se retorna dónde se terminó.
+        """
+        datos = None        # vista uint8 para la búsqueda, solo si hace falta
+        n = len(mv)
+        necesario = self.frames_confirmacion * FRAME_SIZE
+        tope = n if limite is None else limite
+
+        while pos < tope:
+            if not self._sincronizado:
+                hasta = min(n - necesario + 1, tope)
+                if pos >= hasta:
+                    break
+                if datos is None:
+                    datos = np.frombuffer(mv, dtype=np.uint8)
+                pos = self._realinear(datos, pos, hasta)
+                if not self._sincronizado:
+                    break
+
+            n_frames = min((n - pos) // FRAME_SIZE, -(-(tope - pos) // FRAME_SIZE))
+            if n_frames <= 0:
+                break
+            ok = self._validos(mv, pos, n_frames)
+            if np.count_nonzero(ok) == n_frames:
+                # Camino normal: todo el bloque es válido, se entrega sin copia
+                self.frames_validos += n_frames
+                yield mv[pos:pos + n_frames * FRAME_SIZE]
+                pos += n_frames * FRAME_SIZE
+                break
+
+            primero_malo = int(np.argmin(ok))
+            if primero_malo:
+                self.frames_validos += primero_malo
+                yield mv[pos:pos + primero_malo * FRAME_SIZE]
+                pos += primero_malo * FRAME_SIZE
+            # Se perdió la alineación: se busca desde el byte siguiente al inicio del frame inválido
+            self._sincronizado = False
+            self.bytes_descartados += 1
+            pos += 1
+
+        if limite is not None:
+            return pos
+        self._resto = bytes(mv[pos:])
@@ -11,6 +11,8 @@ class PanelEnsayo(ttk.LabelFrame):
      - Duración del ensayo (segundos)
      - Iniciar / finalizar ensayo
      - Procesar binario previo
+     - Reprocesar una carpeta de ensayo completa
+     - Ver un ensayo guardado en formato columnar (.tarc)
      - Limpiar datos
     """
 
@@ -21,7 +23,9 @@ class PanelEnsayo(ttk.LabelFrame):
         on_finalizar_callback=None,
         on_cargar_crudo_callback=None,
         on_limpiar_callback=None,
-        validar_inicio_callback=None
+        validar_inicio_callback=None,
+        on_reprocesar_carpeta_callback=None,
+        on_ver_columnar_callback=None
     ):
         super().__init__(parent, text="Ensayo", padding=5)
 
@@ -31,6 +35,8 @@ class PanelEnsayo(ttk.LabelFrame):
         self.on_cargar_crudo = on_cargar_crudo_callback
         self.on_limpiar = on_limpiar_callback
         self.validar_inicio = validar_inicio_callback
+        self.on_reprocesar_carpeta = on_reprocesar_carpeta_callback
+        self.on_ver_columnar = on_ver_columnar_callback
 
 
         # ---------------------------
@@ -51,6 +57,28 @@ class PanelEnsayo(ttk.LabelFrame):
         self.entry_duracion = ttk.Entry(self, textvariable=self.var_duracion, width=8)
         self.entry_duracion.grid(row=1, column=1, sticky="w", padx=5)
 
+        # ----------------------------------
+        #   GUARDAR COLUMNAS (.tarc)
+        # ----------------------------------
+        self.var_columnar = tk.BooleanVar(value=False)
+        self.check_columnar = ttk.Checkbutton(
+            self,
+            text="Guardar también columnas (.tarc)",
+            variable=self.var_columnar
+        )
+        self.check_columnar.grid(row=2, column=0, columnspan=2, sticky="w", pady=(5,0))
+
+        # ----------------------------------
+        #   CONTENEDOR ÚNICO POR ENSAYO
+        # ----------------------------------
+        self.var_contenedor = tk.BooleanVar(value=False)
+        self.check_contenedor = ttk.Checkbutton(
+            self,
+            text="Un único .bin indexado por ensayo",
+            variable=self.var_contenedor
+        )
+        self.check_contenedor.grid(row=3, column=0, columnspan=2, sticky="w")
+
         # ---------------------------
         #     BOTÓN: INICIAR
         # ---------------------------
@@ -59,7 +87,7 @@ class PanelEnsayo(ttk.LabelFrame):
             text="Iniciar ensayo",
             command=self._iniciar
         )
-        self.boton_iniciar.grid(row=2, column=0, columnspan=2, pady=5, sticky="ew")
+        self.boton_iniciar.grid(row=4, column=0, columnspan=2, pady=5, sticky="ew")
 
         # ---------------------------
         #     BOTÓN: FINALIZAR
@@ -69,7 +97,7 @@ class PanelEnsayo(ttk.LabelFrame):
             text="Finalizar ensayo",
             command=self._finalizar
         )
-        self.boton_finalizar.grid(row=3, column=0, columnspan=2, pady=5, sticky="ew")
+        self.boton_finalizar.grid(row=5, column=0, columnspan=2, pady=5, sticky="ew")
 
         # ---------------------------
         #   BOTÓN: CARGAR CRUDO
@@ -79,7 +107,27 @@ class PanelEnsayo(ttk.LabelFrame):
             text="Procesar binario previo",
             command=self._cargar_crudo
         )
-        self.boton_crudo.grid(row=4, column=0, columnspan=2, pady=5, sticky="ew")
+        self.boton_crudo.grid(row=6, column=0, columnspan=2, pady=5, sticky="ew")
+
+        # ---------------------------
+        #   BOTÓN: REPROCESAR CARPETA
+        # ---------------------------
+        self.boton_carpeta = ttk.Button(
+            self,
+            text="Reprocesar carpeta de ensayo",
+            command=self._reprocesar_carpeta
+        )
+        self.boton_carpeta.grid(row=7, column=0, columnspan=2, pady=5, sticky="ew")
+
+        # ---------------------------
+        #   BOTÓN: VER ENSAYO (.tarc)
+        # ---------------------------
+        self.boton_columnar = ttk.Button(
+            self,
+            text="Ver ensayo guardado (.tarc)",
+            command=self._ver_columnar
+        )
+        self.boton_columnar.grid(row=8, column=0, columnspan=2, pady=5, sticky="ew")
 
         # ---------------------------
         #     BOTÓN: LIMPIAR
@@ -89,16 +137,16 @@ class PanelEnsayo(ttk.LabelFrame):
             text="Limpiar datos",
             command=self._limpiar
         )
-        self.boton_limpiar.grid(row=5, column=0, columnspan=2, pady=5, sticky="ew")
+        self.boton_limpiar.grid(row=9, column=0, columnspan=2, pady=5, sticky="ew")
 
         # ----------------------------
         #       ETIQUETA DE ESTADO
         # ----------------------------
-        ttk.Label(self, text="Estado:").grid(row=6, column=0, sticky="w", padx=(20,0), pady=(8,0))
+        ttk.Label(self, text="Estado:").grid(row=10, column=0, sticky="w", padx=(20,0), pady=(8,0))
 
         self.var_estado = tk.StringVar(value="—")
         self.lbl_estado = ttk.Label(self, textvariable=self.var_estado)
-        self.lbl_estado.grid(row=6, column=1, sticky="w", padx=(0,20), pady=(8,0))
+        self.lbl_estado.grid(row=10, column=1, sticky="w", padx=(0,20), pady=(8,0))
 
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
@@ -153,6 +201,14 @@ class PanelEnsayo(ttk.LabelFrame):
             self.on_cargar_crudo()
         self.var_estado.set("Procesando binario previo...")
 
+    def _reprocesar_carpeta(self):
+        if self.on_reprocesar_carpeta:
+            self.on_reprocesar_carpeta()
+
+    def _ver_columnar(self):
+        if self.on_ver_columnar:
+            self.on_ver_columnar()
+
     def _limpiar(self):
         if self.on_limpiar:
             self.on_limpiar()
@@ -162,3 +218,5 @@ class PanelEnsayo(ttk.LabelFrame):
         """ Bloquea / desbloquea la edición de la duración del ensayo."""
         state = "disabled" if flag else "normal"
         self.entry_duracion.config(state=state)
+        self.check_columnar.config(state=state)
+        self.check_contenedor.config(state=state)
@@ -0,0 +1,70 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+def _tiempo(inst, nombre, campo="p50_ms"):
+    serie = inst["tiempos"].get(nombre)
+    return f"{serie[campo]:.2f} ms" if serie else "-"
+
+
+def _contador(inst, nombre):
+    return f"{inst['contadores'].get(nombre, 0):,}"
+
+
+def _indicador(inst, nombre, formato="{:,}"):
+    valor = inst["indicadores"].get(nombre)
+    if valor is None or isinstance(valor, str):
+        return "-"
+    return formato.format(valor)
+
+
+# Filas del panel: (etiqueta, función que arma el texto a partir de la instantánea)
+FILAS = (
+    ("Bytes recibidos", lambda i: _indicador(i, "serie.bytes")),
+    ("Lecturas del puerto", lambda i: _indicador(i, "serie.lecturas")),
+    ("Tasa serie", lambda i: _indicador(i, "serie.bytes_s", "{:,.0f} B/s")),
+    ("Frames decodificados", lambda i: _contador(i, "frames_decodificados")),
+    ("Overflows (CH=3)", lambda i: _contador(i, "frames_overflow")),
+    ("Eventos en memoria", lambda i: _indicador(i, "memoria.bytes", "{:,.0f} B")),
+    ("Volcados a disco", lambda i: _contador(i, "volcados")),
+    ("Resincronizaciones / bytes desc.", lambda i: f"{_indicador(i, 'sync.resincronizaciones')} / "
+                                                  f"{_indicador(i, 'sync.bytes_descartados')}"),
+    ("Coincidencias A/B", lambda i: _indicador(i, "coincidencias.pares")),
+    ("Cola / descartados", lambda i: f"{_indicador(i, 'cola.profundidad')} / {_indicador(i, 'cola.descartados')}"),
+    ("feed() p50 / p99", lambda i: f"{_tiempo(i, 'feed')} / {_tiempo(i, 'feed', 'p99_ms')}"),
+    ("Decodificación p50", lambda i: _tiempo(i, "decodificacion")),
+    ("Lock espera / retención máx", lambda i: f"{_tiempo(i, 'lock_espera.feed', 'max_ms')} / "
+                                             f"{_tiempo(i, 'lock_retencion.feed', 'max_ms')}"),
+    ("Autoguardado máx", lambda i: _tiempo(i, "guardado.escritura", "max_ms")),
+    ("Redibujo histograma A / B", lambda i: f"{_tiempo(i, 'histograma.redibujo_A')} / {_tiempo(i, 'histograma.redibujo_B')}"),
+)
+
+
+class PanelEstadisticas(ttk.LabelFrame):
+    """
+    Panel de solo lectura con las métricas del camino de adquisición.
+    Se refresca cada 'update_ms' y solo si está visible: sin nadie mirando,
+    no se calcula ninguna instantánea.
+    """
+
+    def __init__(self, parent, metricas, update_ms=1000):
+        super().__init__(parent, text="Estadísticas", padding=5)
+
+        self.metricas = metricas
+        self.update_ms = update_ms
+        self._vars = []
+
+        for fila, (etiqueta, _) in enumerate(FILAS):
+            ttk.Label(self, text=f"{etiqueta}:").grid(row=fila, column=0, sticky="w")
+            var = tk.StringVar(value="-")
+            ttk.Label(self, textvariable=var, width=24).grid(row=fila, column=1, sticky="w", padx=5)
+            self._vars.append(var)
+
+        self.after(self.update_ms, self._actualizar)
+
+    def _actualizar(self):
+        if self.winfo_ismapped():
+            inst = self.metricas.instantanea()
+            for var, (_, texto) in zip(self._vars, FILAS):
+                var.set(texto(inst))
+        self.after(self.update_ms, self._actualizar)
@@ -1,9 +1,10 @@
 import tkinter as tk
 from tkinter import ttk
-from core.procesar_datos import ProcesaDatosTAR
-
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from collections import deque
+import time
+from core.procesar_datos import CANAL_A, CANAL_B
+from core.histograma import AcumuladorHistograma
+from gui.figuras import crear_figura, marcador_carga
 
 
 # ============================================================
@@ -11,7 +12,7 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 # ============================================================
 class PanelHistogramaIndividual(ttk.LabelFrame):
 
-    def __init__(self, parent, procesador_datos, canal, update_ms=300):
+    def __init__(self, parent, procesador_datos, canal, update_ms=300, diferir=False):
         titulo = "Histograma Canal A" if canal == 0 else "Histograma Canal B"
         super().__init__(parent, text=titulo, padding=5)
 
@@ -21,6 +22,11 @@ class PanelHistogramaIndividual(ttk.LabelFrame):
         self.last_index = 0
         self.bloqueado = False
 
+        # Mismo mapeo que el CSV: Canal A → chan 2, Canal B → chan 1
+        self.chan_tar = CANAL_A if canal == 0 else CANAL_B
+        self.acumulador = AcumuladorHistograma(canales=(self.chan_tar,))
+        self._generacion = self.process.generacion
+
         # ==================================================
         # Configuración superior
         # ==================================================
@@ -50,38 +56,62 @@ class PanelHistogramaIndividual(ttk.LabelFrame):
         self.btn_borrar.grid(row=0, column=7, padx=5)
 
         # ==================================================
-        # Figura Matplotlib
+        # Figura Matplotlib (con diferir=True se arma después, ver construir_figura)
         # ==================================================
-        self.fig = Figure(figsize=(5, 4), dpi=50)
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_xlabel("Amplitud (mV)", fontsize=13)
-        self.ax.set_ylabel("Frecuencia", fontsize=13)
-        self.ax.tick_params(axis='both', labelsize=11)
-
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self)
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
-
-        # Timer de refresco
+        self.fig = self.ax = self.canvas = None
+        self._cargando = marcador_carga(self) if diferir else None
+
+        # Artistas reutilizados entre refrescos (se reconstruyen solo si cambia min/max/intervalo)
+        self._config = None         # (min, max, intervalo) con que se construyó el escalón
+        self._escalon = None        # StepPatch con las alturas del histograma
+        self._ymax = 0.0
+        self._fondo = None          # región de datos sin el escalón, para blitting
+        self.tiempos_frame_ms = deque(maxlen=100)
+        if not diferir:
+            self.construir_figura()
+
+        # Timer de refresco (los eventos se acumulan aunque la figura todavía no exista)
         self.after(self.update_ms, self._update_plot)
 
+    def construir_figura(self):
+        """Crea la figura (importa matplotlib) y muestra lo ya acumulado. Idempotente."""
+        if self.canvas is not None:
+            return
+        if self._cargando is not None:
+            self._cargando.destroy()
+            self._cargando = None
+        self.fig, self.canvas = crear_figura(self)
+        self.ax = self.fig.add_subplot(111)
+        self._limpiar_ejes()
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        if not self.bloqueado:
+            self._recalcular()
+
     # ==================================================
     # Métodos funcionales
     # ==================================================
     def aplicar(self):
         if not self.bloqueado:
-            self.last_index = 0
             self._recalcular()
 
     def limpiar(self):
-        self.last_index = 0
+        # Descarta lo acumulado y sigue desde los próximos eventos
+        self.acumulador.reiniciar()
+        self.last_index = self.process.total_registros()
+        if self.canvas is not None:
+            self._limpiar_ejes()
+            self.canvas.draw()
+
+    def _limpiar_ejes(self):
         self.ax.cla()
+        self._config = None
+        self._escalon = None
+        self._fondo = None
 
         self.ax.set_xlabel("Amplitud (mV)", fontsize=13)
         self.ax.set_ylabel("Frecuencia", fontsize=13)
         self.ax.tick_params(axis='both', labelsize=11)
 
-        self.canvas.draw()
-
 
     def _bloquear(self, flag: bool):
         self.bloqueado = flag
@@ -97,20 +127,30 @@ class PanelHistogramaIndividual(ttk.LabelFrame):
     # Actualización periódica
     # ==================================================
     def _update_plot(self):
-        nuevos = self.process.registros_nuevos_desde(self.last_index)
-        self.last_index += len(nuevos)
+        nuevos = self._acumular_nuevos()
 
         if nuevos and not self.bloqueado:
             self._recalcular()
 
         self.after(self.update_ms, self._update_plot)
 
+    def _acumular_nuevos(self) -> int:
+        """Suma al acumulador solo los registros llegados desde last_index."""
+        if self.process.generacion != self._generacion:
+            self._generacion = self.process.generacion
+            self.acumulador.reiniciar()
+            self.last_index = 0
+
+        nuevos = self.process.registros_nuevos_desde(self.last_index)
+        self.last_index = nuevos.fin
+        self.acumulador.acumular(nuevos.chan, nuevos.vp_counts)
+        return len(nuevos)
+
     # ==================================================
     # Cálculo del histograma
     # ==================================================
     def _recalcular(self):
-        registros = self.process.registros
-        if not registros:
+        if self.canvas is None or not self.acumulador.total(self.chan_tar):
             return
 
         try:
@@ -120,29 +160,65 @@ class PanelHistogramaIndividual(ttk.LabelFrame):
         except ValueError:
             return
 
-        if maxv - minv < bin_size:
+        if bin_size <= 0 or maxv - minv < bin_size:
             return
 
-        bins = list(range(minv, maxv + bin_size, bin_size))
-
-        # Filtrar solo el canal correspondiente
-        vals = [
-            r["vp"] for r in registros
-            if r.get("chan") == self.canal and "vp" in r and "error" not in r
-        ]
-
-        self.ax.cla()
-        titulo = "Histograma Canal A" if self.canal == 0 else "Histograma Canal B"
-        # No hay título interno
-        self.ax.set_xlabel("Amplitud (mV)", fontsize=13)
-        self.ax.set_ylabel("Frecuencia", fontsize=13)
-        self.ax.tick_params(axis='both', labelsize=11)
-
-
-        if vals:
-            self.ax.hist(vals, bins=bins, alpha=0.8)
-
-        self.canvas.draw()
+        t0 = time.perf_counter()
+        bordes, conteos = self.acumulador.histograma(self.chan_tar, minv, maxv, bin_size)
+        config = (minv, maxv, bin_size)
+        pico = float(conteos.max()) if len(conteos) else 0.0
+
+        if config != self._config:
+            # Cambió la ventana: se reconstruyen ejes y escalón (redibujado completo)
+            self._construir_artistas(config, bordes, conteos, pico)
+            self.canvas.draw()
+        else:
+            self._escalon.set_data(values=conteos)
+            if pico > self._ymax:
+                # Cambia la escala vertical: hace falta redibujar ejes y ticks
+                self._ymax = pico * 1.25
+                self.ax.set_ylim(0, self._ymax)
+                self.canvas.draw()
+            else:
+                self._blit()
+
+        dt = time.perf_counter() - t0
+        self.tiempos_frame_ms.append(dt * 1000.0)
+        if self.process.metricas:
+            self.process.metricas.tiempo("histograma.redibujo_" + ("A" if self.canal == 0 else "B"), dt)
+
+    def _construir_artistas(self, config, bordes, conteos, pico):
+        self._limpiar_ejes()
+        self._config = config
+        self._escalon = self.ax.stairs(conteos, bordes, fill=True, alpha=0.8, animated=True)
+        self._ymax = max(pico * 1.25, 1.0)
+        self.ax.set_xlim(bordes[0], bordes[-1])
+        self.ax.set_ylim(0, self._ymax)
+
+    def _blit(self):
+        """Redibuja solo la región de datos: fondo guardado + escalón actualizado."""
+        if self._fondo is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._fondo)
+        self.ax.draw_artist(self._escalon)
+        self.canvas.blit(self.ax.bbox)
+
+    def _on_draw(self, event):
+        # Tras cada redibujado completo se guarda el fondo y se pinta el escalón (animado)
+        self._fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        if self._escalon is not None:
+            self.ax.draw_artist(self._escalon)
+
+    def estadisticas_render(self):
+        """Tiempo por refresco del panel (ms): último, promedio y máximo de los últimos 100."""
+        if not self.tiempos_frame_ms:
+            return {"ultimo_ms": 0.0, "promedio_ms": 0.0, "max_ms": 0.0}
+        return {
+            "ultimo_ms": self.tiempos_frame_ms[-1],
+            "promedio_ms": sum(self.tiempos_frame_ms) / len(self.tiempos_frame_ms),
+            "max_ms": max(self.tiempos_frame_ms),
+        }
 
 
 # ============================================================
@@ -150,25 +226,26 @@ class PanelHistogramaIndividual(ttk.LabelFrame):
 # ============================================================
 class PanelHistograma(ttk.Frame):
 
-    def __init__(self, parent, procesador_datos, update_ms=300):
+    def __init__(self, parent, procesador_datos, update_ms=300, diferir=False):
         super().__init__(parent)
 
         self.hist_A = PanelHistogramaIndividual(
-            self, procesador_datos, canal=0, update_ms=update_ms
+            self, procesador_datos, canal=0, update_ms=update_ms, diferir=diferir
         )
         self.hist_A.pack(fill="both", expand=True, pady=5)
 
         self.hist_B = PanelHistogramaIndividual(
-            self, procesador_datos, canal=1, update_ms=update_ms
+            self, procesador_datos, canal=1, update_ms=update_ms, diferir=diferir
         )
         self.hist_B.pack(fill="both", expand=True, pady=5)
 
-    def refrescar_completo(self):
-        self.hist_A.last_index = 0
-        self.hist_B.last_index = 0
-        self.hist_A._recalcular()
-        self.hist_B._recalcular()
-    
+    def mostrar_acumulado(self, acumulador: AcumuladorHistograma):
+        """Muestra conteos ya acumulados fuera del panel (p. ej. un binario reprocesado)."""
+        for hist in (self.hist_A, self.hist_B):
+            hist.acumulador.conteos[hist.chan_tar][:] = acumulador.conteos[hist.chan_tar]
+            hist.last_index = hist.process.total_registros()
+            hist._recalcular()
+
     # Permite que MainWindow bloquee ambos al iniciar ensayo
     def bloquear(self, flag: bool):
         self.hist_A._bloquear(flag)
@@ -0,0 +1,94 @@
+import time
+import numpy as np
+from core.protocolo import ZMODADC1410_RESOLUTION
+from gui.figuras import PanelFigura
+
+
+# ============================================================
+#   HISTOGRAMA 2D: AMPLITUD A vs. AMPLITUD B (COINCIDENCIAS)
+# ============================================================
+class PanelHistograma2D(PanelFigura):
+    """
+    Densidad de pares coincidentes en el plano amplitud B (x) / amplitud A (y).
+    La grilla la acumula el motor de coincidencias con los pares nuevos; el panel solo la
+    copia y actualiza una única imagen (set_data), así que el redibujo depende del tamaño
+    de la grilla y no de la cantidad de pares.
+    """
+
+    def __init__(self, parent, procesador_datos, update_ms=1000, diferir=False):
+        super().__init__(parent, procesador_datos, "Amplitud A vs. B (coincidencias)", update_ms, diferir)
+        self._imagen = None
+        self._grilla = None         # última grilla copiada del procesador
+        self._total = -1            # total de pares de esa grilla, para no copiarla sin pares nuevos
+        self._descontar = None      # grilla al presionar Borrar (se resta a lo acumulado)
+
+    def _crear_ejes(self):
+        self.ax = self.fig.add_subplot(111)
+        self.ax.set_xlabel("Amplitud B (mV)", fontsize=13)
+        self.ax.set_ylabel("Amplitud A (mV)", fontsize=13)
+        self.ax.tick_params(axis='both', labelsize=11)
+
+    def limpiar(self):
+        self._leer_nuevos()
+        self._descontar = self._grilla
+        self._refrescar(forzar=True)
+
+    def reiniciar(self):
+        # clear() reinicia el motor: lo descontado ya no aplica y la grilla se vuelve a copiar
+        self._descontar = None
+        self._total = -1
+
+    def _leer_nuevos(self) -> bool:
+        """La grilla la acumula el motor de coincidencias: se copia (con su total) solo si hay pares nuevos."""
+        total, grilla = self.process.histograma_coincidencias(self._total)
+        if grilla is None:
+            return False
+        self._total, self._grilla = total, grilla
+        return True
+
+    def _dibujar(self, forzar=False):
+        motor = self.process.coincidencias
+        if motor is None:
+            self.var_info.set("Sin motor de coincidencias")
+            return
+        if self._grilla is None:
+            self._leer_nuevos()
+
+        t0 = time.perf_counter()
+        conteos = self._grilla
+        if self._descontar is not None:
+            conteos = conteos - self._descontar
+        total = int(conteos.sum())
+        pico = int(conteos.max())
+
+        # Escala logarítmica de color; los bins vacíos quedan sin pintar
+        datos = np.ma.masked_less_equal(conteos, 0)
+        if self._imagen is None:
+            from matplotlib.colors import LogNorm
+            self._imagen = self.ax.imshow(
+                datos, origin="lower", aspect="auto", interpolation="nearest", cmap="viridis",
+                extent=motor.histograma.extension_mv(), norm=LogNorm(vmin=1, vmax=max(pico, 2)),
+            )
+            self.fig.colorbar(self._imagen, ax=self.ax)
+        else:
+            self._imagen.set_data(datos)
+            self._imagen.norm.vmax = max(pico, 2)
+            self._imagen.changed()
+        self._encuadrar(conteos, motor.histograma)
+
+        self.var_info.set(f"Pares: {total:,}   Máx. por bin: {pico:,}")
+        self.canvas.draw_idle()
+
+        if self.process.metricas:
+            self.process.metricas.tiempo("histograma_2d.redibujo", time.perf_counter() - t0)
+
+    def _encuadrar(self, conteos, histograma):
+        """Limita los ejes a los bins ocupados (más un margen): el rango del ADC es mucho mayor que el de los pulsos."""
+        filas = np.flatnonzero(conteos.any(axis=1))
+        columnas = np.flatnonzero(conteos.any(axis=0))
+        if not len(filas):
+            return
+        ancho = histograma.niveles_por_bin * ZMODADC1410_RESOLUTION
+        margen = 2
+        self.ax.set_xlim(max(columnas[0] - margen, 0) * ancho, (columnas[-1] + 1 + margen) * ancho)
+        self.ax.set_ylim(max(filas[0] - margen, 0) * ancho, (filas[-1] + 1 + margen) * ancho)
@@ -0,0 +1,64 @@
+import time
+from core.procesar_datos import CANAL_A, CANAL_B
+from core.intervalos import HistogramaIntervalos, A_B
+from gui.figuras import PanelFigura
+
+# (clave del histograma, etiqueta, color) de cada distribución graficada
+CURVAS = (
+    (CANAL_A, "A → A", "tab:blue"),
+    (CANAL_B, "B → B", "tab:orange"),
+    (A_B, "A → B", "tab:green"),
+)
+
+
+# ============================================================
+#   HISTOGRAMA DE INTERVALOS DE TIEMPO (Δt)
+# ============================================================
+class PanelIntervalos(PanelFigura):
+    """
+    Distribución de Δt entre pulsos consecutivos de cada canal y del último A a cada B,
+    en bins logarítmicos. En cada refresco solo se procesan los eventos nuevos; el dibujo
+    tiene una cantidad fija de bins, así que su costo no depende del tamaño del ensayo.
+    """
+
+    def __init__(self, parent, procesador_datos, update_ms=1000, diferir=False):
+        super().__init__(parent, procesador_datos, "Intervalos entre pulsos (Δt)", update_ms, diferir)
+        self.intervalos = HistogramaIntervalos()
+
+    def _crear_ejes(self):
+        self.ax = self.fig.add_subplot(111)
+        self._rotular()
+
+    def _rotular(self):
+        self.ax.set_xscale("log")
+        self.ax.set_yscale("log")
+        self.ax.set_xlabel("Δt (ns)", fontsize=13)
+        self.ax.set_ylabel("Cuentas por bin", fontsize=13)
+        self.ax.tick_params(axis='both', labelsize=11)
+
+    def reiniciar(self):
+        self.intervalos.reiniciar()
+
+    def acumular(self, nuevos):
+        self.intervalos.acumular(nuevos.chan, nuevos.ts_abs_ns)
+
+    def _dibujar(self, forzar=False):
+        t0 = time.perf_counter()
+        self.ax.cla()
+        self._rotular()
+
+        bordes = self.intervalos.bordes_ns
+        textos = []
+        for clave, etiqueta, color in CURVAS:
+            conteos = self.intervalos.conteos[clave]
+            if conteos.any():
+                self.ax.stairs(conteos, bordes, color=color, label=etiqueta)
+            textos.append(f"{etiqueta}: {self.intervalos.total(clave):,}")
+
+        if self.ax.get_legend_handles_labels()[0]:
+            self.ax.legend(loc="upper right", fontsize=10)
+        self.var_info.set("   ".join(textos))
+        self.canvas.draw_idle()
+
+        if self.process.metricas:
+            self.process.metricas.tiempo("intervalos.redibujo", time.perf_counter() - t0)
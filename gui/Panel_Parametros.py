@@ -153,6 +153,15 @@ class PanelParametros(ttk.LabelFrame):
         # Bloquear entradas
         self.bloquear(True)
 
+    def mostrar_aplicados(self, params):
+        """Carga parámetros que ya tiene el TAR (p. ej. aplicados desde el demonio) sin reenviarlos."""
+        self.var_cha_min.set(str(params["umbral_cha_min"]))
+        self.var_cha_max.set(str(params["umbral_cha_max"]))
+        self.var_chb_min.set(str(params["umbral_chb_min"]))
+        self.var_chb_max.set(str(params["umbral_chb_max"]))
+        self.parametros_aplicados = True
+        self.bloquear(True)
+
 
     # ============================================================
     #                     BLOQUEAR / DESBLOQUEAR
@@ -1,6 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
-import serial.tools.list_ports
+import threading
+import time
+
+
+def listar_puertos():
+    """Dispositivos serie disponibles. pyserial.tools se importa acá: en Windows la enumeración es lenta."""
+    import serial.tools.list_ports
+    return [p.device for p in serial.tools.list_ports.comports()]
 
 
 class SerialPanel(ttk.LabelFrame):
@@ -12,7 +19,7 @@ class SerialPanel(ttk.LabelFrame):
     - mostrar el estado actual.
     """
 
-    def __init__(self, parent, on_connect_callback, on_disconnect_callback):
+    def __init__(self, parent, on_connect_callback, on_disconnect_callback, escaneo_asincrono=False):
         super().__init__(parent, text="Puertos", padding=5)
 
         self.on_connect = on_connect_callback
@@ -36,10 +43,10 @@ class SerialPanel(ttk.LabelFrame):
         ttk.Label(ports_frame, text="Puerto COM:").pack(side="left")
 
         self.port_var = tk.StringVar()
+        # Editable: permite escribir puertos que no se listan (p. ej. el emulador en /dev/pts/N)
         self.combo_ports = ttk.Combobox(
             ports_frame,
             textvariable=self.port_var,
-            state="readonly",
             width=20
         )
         self.combo_ports.pack(side="left", padx=5)
@@ -79,17 +86,58 @@ class SerialPanel(ttk.LabelFrame):
         self.status_var = tk.StringVar(value="Estado: Desconectado")
         ttk.Label(self, textvariable=self.status_var).pack(pady=5)
 
-        # cargar listado inicial
-        self.refresh_ports()
+        # cargar listado inicial (en segundo plano en el arranque diferido de la ventana)
+        self.segundos_escaneo = None
+        if not escaneo_asincrono:
+            self.refresh_ports()
 
     # =========================================================================
     # Actualización de puertos disponibles
     # =========================================================================
     def refresh_ports(self):
-        ports = serial.tools.list_ports.comports()
-        ports_list = [p.device for p in ports]
-
+        t0 = time.perf_counter()
+        self._mostrar_puertos(listar_puertos())
+        self.segundos_escaneo = time.perf_counter() - t0
+
+    def refresh_ports_async(self, al_terminar=None):
+        """
+        Lista los puertos en un hilo y los muestra al terminar, sin bloquear la ventana.
+        El hilo no toca widgets: deja el resultado y se consulta con after(). Si el usuario ya
+        eligió o escribió un puerto mientras tanto, no se reemplaza.
+        """
+        estado = {"puertos": None, "error": None}
+        t0 = time.perf_counter()
+        self.status_var.set("Estado: Buscando puertos…")
+
+        def trabajo():
+            try:
+                estado["puertos"] = listar_puertos()
+            except Exception as e:
+                estado["error"] = e
+            finally:
+                estado["fin"] = True
+
+        def revisar():
+            if not estado.get("fin"):
+                self.after(50, revisar)
+                return
+            self.segundos_escaneo = time.perf_counter() - t0
+            if self.status_var.get() == "Estado: Buscando puertos…":
+                self.status_var.set("Estado: Desconectado")
+            if estado["error"] is not None:
+                print(f"[GUI] Error listando puertos: {estado['error']}")
+            else:
+                self._mostrar_puertos(estado["puertos"], conservar_eleccion=True)
+            if al_terminar:
+                al_terminar(self.segundos_escaneo)
+
+        threading.Thread(target=trabajo, daemon=True).start()
+        self.after(50, revisar)
+
+    def _mostrar_puertos(self, ports_list, conservar_eleccion=False):
         self.combo_ports["values"] = ports_list
+        if conservar_eleccion and self.port_var.get():
+            return
         if ports_list:
             self.combo_ports.current(0)
         else:
@@ -108,12 +156,17 @@ class SerialPanel(ttk.LabelFrame):
         ok = self.on_connect(port)
 
         if ok:
-            self.status_var.set(f"Estado: Conectado a {port}")
-            self.btn_connect["state"] = "disabled"
-            self.btn_disconnect["state"] = "normal"
+            self.marcar_conectado(port)
         else:
             self.status_var.set("Estado: Error al conectar")
 
+    def marcar_conectado(self, port):
+        """Muestra el puerto como conectado (también si ya lo estaba, p. ej. en el demonio)."""
+        self.port_var.set(port)
+        self.status_var.set(f"Estado: Conectado a {port}")
+        self.btn_connect["state"] = "disabled"
+        self.btn_disconnect["state"] = "normal"
+
     def _disconnect(self):
         self.on_disconnect()
 
@@ -0,0 +1,69 @@
+import time
+from core.procesar_datos import CANAL_A, CANAL_B
+from core.serie_temporal import SerieTemporal
+from gui.figuras import PanelFigura
+
+# (chan TAR, etiqueta, color) de cada canal graficado
+CANALES = ((CANAL_A, "Canal A", "tab:blue"), (CANAL_B, "Canal B", "tab:orange"))
+
+
+# ============================================================
+#   TASA DE CONTEO Y AMPLITUD EN FUNCIÓN DEL TIEMPO
+# ============================================================
+class PanelSerieTemporal(PanelFigura):
+    """
+    Pulsos por segundo y envolvente de amplitud (mín / máx) por canal, en tiempo del TAR.
+    Los eventos nuevos se acumulan en una SerieTemporal en cada refresco (aunque el panel
+    no esté visible); el dibujo se hace solo si está visible y con a lo sumo un punto por
+    columna de píxeles, así que su costo no depende de la cantidad de eventos del ensayo.
+    """
+
+    def __init__(self, parent, procesador_datos, update_ms=1000, diferir=False):
+        super().__init__(parent, procesador_datos, "Tasa y amplitud en el tiempo", update_ms, diferir)
+        self.serie = SerieTemporal(canales=[ch for ch, _, _ in CANALES])
+
+    def _crear_ejes(self):
+        self.ax_tasa = self.fig.add_subplot(211)
+        self.ax_amp = self.fig.add_subplot(212, sharex=self.ax_tasa)
+        self._rotular()
+
+    def _rotular(self):
+        self.ax_tasa.set_ylabel("Pulsos / s", fontsize=13)
+        self.ax_amp.set_ylabel("Amplitud (mV)", fontsize=13)
+        self.ax_amp.set_xlabel("Tiempo del TAR (s)", fontsize=13)
+        for ax in (self.ax_tasa, self.ax_amp):
+            ax.tick_params(axis='both', labelsize=11)
+
+    def reiniciar(self):
+        self.serie.reiniciar()
+
+    def acumular(self, nuevos):
+        self.serie.acumular(nuevos.chan, nuevos.ts_abs_ns, nuevos.vp_counts)
+
+    def _dibujar(self, forzar=False):
+        t0 = time.perf_counter()
+        columnas = max(self.canvas.get_tk_widget().winfo_width(), 100)
+
+        self.ax_tasa.cla()
+        self.ax_amp.cla()
+        self._rotular()
+
+        for chan, etiqueta, color in CANALES:
+            # Envolvente mín / máx de cada grupo como escalones (uno por columna como máximo)
+            bordes, minimo, maximo = self.serie.tasa(chan, columnas)
+            if len(minimo):
+                self.ax_tasa.stairs(maximo, bordes, baseline=minimo, fill=True, color=color, alpha=0.3)
+                self.ax_tasa.stairs(maximo, bordes, color=color, label=etiqueta)
+
+            bordes, minimo, maximo = self.serie.amplitud(chan, columnas)
+            if len(minimo):
+                self.ax_amp.stairs(maximo, bordes, baseline=minimo, fill=True, color=color, alpha=0.4, label=etiqueta)
+
+        if self.serie.intervalos:
+            self.ax_tasa.legend(loc="upper right", fontsize=10)
+            duracion = self.serie.intervalos * self.serie.resolucion_s
+            self.var_info.set(f"Duración: {duracion:.1f} s")
+        self.canvas.draw_idle()
+
+        if self.process.metricas:
+            self.process.metricas.tiempo("serie_temporal.redibujo", time.perf_counter() - t0)
@@ -1,42 +1,53 @@
 import tkinter as tk
 from tkinter import ttk
 from gui.Panel_Serial import SerialPanel
-from core.recibir_datos import RecibirDatos
+from core.adquisicion import SesionAdquisicion, ENSAYOS_DIR
 from core.procesar_datos import ProcesaDatosTAR
+from core.histograma import AcumuladorHistograma
+from core.reprocesar_lote import reprocesar_ensayo
+from core.formato_columnar import abrir_tarc, comprobar_resolucion, EXTENSION as EXT_COLUMNAR
+from core.protocolo import CANAL_A, CANAL_B
 from gui.Panel_Ensayo import PanelEnsayo
 from gui.Panel_Parametros import PanelParametros
 from gui.Panel_Histograma import PanelHistograma
-
-from datetime import datetime
-import os, time
+from gui.Panel_Estadisticas import PanelEstadisticas
+from gui.Panel_SerieTemporal import PanelSerieTemporal
+from gui.Panel_Intervalos import PanelIntervalos
+from gui.Panel_Histograma2D import PanelHistograma2D
+from gui.figuras import precargar_matplotlib
+
+from typing import Optional
+import os, time, threading
 from pathlib import Path
 
-BASE_DATA_DIR = Path.home() / "Documents" / "TAR_GUI"
-ENSAYOS_DIR = BASE_DATA_DIR / "ensayos"
 
-ENSAYOS_DIR.mkdir(parents=True, exist_ok=True)
+def carpeta_ensayos() -> str:
+    """Carpeta inicial de los diálogos; ENSAYOS_DIR se crea recién con el primer ensayo."""
+    return str(ENSAYOS_DIR) if ENSAYOS_DIR.is_dir() else str(Path.home())
+
 
 class MainWindow(tk.Tk):
-    def __init__(self):
+    def __init__(self, arranque_diferido: bool = True, t_inicio: Optional[float] = None, adquisicion=None):
+        """
+        Con arranque_diferido la ventana se muestra sin figuras ni listado de puertos: después
+        del primer cuadro se listan los puertos en un hilo y se construyen las figuras de a una
+        (importando matplotlib recién ahí). 't_inicio' es el perf_counter() del inicio del
+        programa, para separar el tiempo de imports en el informe de arranque.
+        'adquisicion' es la SesionAdquisicion a usar o un ClienteDemonio ya abierto (la
+        adquisición corre en core.demonio); por defecto se crea una sesión en este proceso.
+        """
+        t_ventana = time.perf_counter()
         super().__init__()
+        self._arranque = {"t_ventana": t_ventana, "t_inicio": t_inicio, "pendientes": 0}
 
         self.title("TAR GUI")
         self.state('zoomed')
 
-        # Procesador TAR con auto-guardado (carpetas se reasignan al iniciar un ensayo)
-        self.process = ProcesaDatosTAR(
-            carpeta_bin=None,
-            carpeta_csv=None,
-            auto_periodo_seg=None,
-            auto_prefix="tar"
-        )
-
-
-        # Serial handler (Manejo de los datos serie)
-        self.serial_handler = RecibirDatos(
-            on_data_callback=self.on_serial_data,
-            on_error_callback=self.on_serial_error
-        )
+        # Puerto serie, decodificación y autoguardado (aquí o en el demonio)
+        self.adquisicion = adquisicion if adquisicion is not None else SesionAdquisicion(on_error=self.on_serial_error)
+        self.metricas = self.adquisicion.metricas
+        self.process = self.adquisicion.process
+        self._reprocesador = None   # con demonio: procesador local para reprocesar archivos
 
         #  Organizacion UI
         container = ttk.Frame(self)
@@ -60,12 +71,13 @@ class MainWindow(tk.Tk):
         left_inner.pack(expand=True)
 
         # Panel de conexión serie
-        serial_panel = SerialPanel(
+        self.serial_panel = SerialPanel(
             left_inner,
             on_connect_callback=self.connect_serial,
-            on_disconnect_callback=self.disconnect_serial
+            on_disconnect_callback=self.disconnect_serial,
+            escaneo_asincrono=arranque_diferido
         )
-        serial_panel.pack()
+        self.serial_panel.pack()
 
         # Panel parámetros TAR
         self.param_panel = PanelParametros(
@@ -81,14 +93,20 @@ class MainWindow(tk.Tk):
             on_finalizar_callback=self.finalizar_ensayo,
             on_cargar_crudo_callback=self.cargar_crudo_viejo,
             on_limpiar_callback=self.limpiar_datos,
-            validar_inicio_callback=self._validar_inicio_ensayo
+            validar_inicio_callback=self._validar_inicio_ensayo,
+            on_reprocesar_carpeta_callback=self.reprocesar_carpeta,
+            on_ver_columnar_callback=self.ver_ensayo_columnar
         )
         self.ensayo_panel.pack(pady=5)
 
+        # Panel de estadísticas (solo lectura)
+        self.stats_panel = PanelEstadisticas(left_inner, self.metricas)
+        self.stats_panel.pack(pady=5, fill="x")
+
 
         # Panel Ensayo para las validaciones cruzadas
         self.ensayo_panel.check_parametros = lambda: self.param_panel.parametros_aplicados
-        self.ensayo_panel.check_puerto = lambda: self.serial_handler.is_connected()
+        self.ensayo_panel.check_puerto = lambda: self.adquisicion.conectado()
 
 
         # --------------------------------------------
@@ -102,78 +120,176 @@ class MainWindow(tk.Tk):
             font=("Arial", 13, "bold")
         ).pack(pady=5, padx=10, anchor="center")
 
+        # Pestañas de gráficas: cada panel lee los eventos nuevos por su cuenta
+        self.graficas = ttk.Notebook(right_panel)
+        self.graficas.pack(fill="both", expand=True)
+
         # Panel manejo de histogramas
         self.hist_panel = PanelHistograma(
-            right_panel,
+            self.graficas,
             procesador_datos=self.process,
-            update_ms=300
+            update_ms=300,
+            diferir=arranque_diferido
         )
-        self.hist_panel.pack(fill="both", expand=True)
+        self.graficas.add(self.hist_panel, text="Histogramas")
+
+        # Distribución de intervalos entre pulsos (por canal y A → B)
+        self.intervalos_panel = PanelIntervalos(self.graficas, self.process, update_ms=1000, diferir=arranque_diferido)
+        self.graficas.add(self.intervalos_panel, text="Intervalos Δt")
+
+        # Amplitud A contra B de los pares coincidentes
+        self.hist2d_panel = PanelHistograma2D(self.graficas, self.process, update_ms=1000, diferir=arranque_diferido)
+        self.graficas.add(self.hist2d_panel, text="Coincidencias A/B")
+
+        # Tasa de conteo y amplitud en el tiempo
+        self.serie_panel = PanelSerieTemporal(self.graficas, self.process, update_ms=1000, diferir=arranque_diferido)
+        self.graficas.add(self.serie_panel, text="Serie temporal")
 
         # Variables internas
         self.ensayo_activo = False
-        self._last_ind = 0
+        self.ensayo_dir = None
+        self._reproceso = None      # estado del reprocesado en segundo plano
+
+        # Con demonio: se muestra lo que ya adquirió y se sigue recibiendo desde ahí
+        if self.adquisicion.remota:
+            self._adjuntar_demonio()
+
+        self._arranque["t_widgets"] = time.perf_counter()
+        if arranque_diferido:
+            # after(0) corre recién cuando mainloop procesó los eventos pendientes (primer cuadro)
+            self.after(0, self._tras_primer_cuadro)
+        else:
+            self.after(0, self._primer_cuadro_completo)
+
+    # ==============================================
+    # Arranque diferido e informe de tiempos
+    # ==============================================
+    def _primer_cuadro_completo(self):
+        self.update_idletasks()
+        self._informar_arranque(time.perf_counter())
+
+    def _tras_primer_cuadro(self):
+        self.update_idletasks()
+        t_cuadro = time.perf_counter()
+        self._arranque["t_cuadro"] = t_cuadro
+
+        # Puertos y módulos de matplotlib en hilos; las figuras (widgets Tk, solo en este hilo) se
+        # arman de a una por vuelta del mainloop. Primero los histogramas, que son la pestaña
+        # visible; las demás pestañas se arman antes si se muestran.
+        self._matplotlib_listo = precargar_matplotlib(self._arranque.setdefault("matplotlib", {}))
+        pasos = [
+            self.hist_panel.hist_A.construir_figura,
+            self.hist_panel.hist_B.construir_figura,
+            self.intervalos_panel.construir_figura,
+            self.hist2d_panel.construir_figura,
+            self.serie_panel.construir_figura,
+        ]
+        self._arranque["pendientes"] = 2
+        self.serial_panel.refresh_ports_async(al_terminar=self._puertos_listos)
+        self.after(1, self._construir_figuras, pasos, 0.0)
+
+    def _construir_figuras(self, pasos, acumulado):
+        if not self._matplotlib_listo.is_set():
+            self.after(20, self._construir_figuras, pasos, acumulado)
+            return
+        t0 = time.perf_counter()
+        pasos[0]()
+        acumulado += time.perf_counter() - t0
+        if len(pasos) > 1:
+            self.after(1, self._construir_figuras, pasos[1:], acumulado)
+            return
+        self._arranque["figuras_s"] = acumulado
+        self._paso_arranque_listo()
+
+    def _puertos_listos(self, _segundos):
+        self._paso_arranque_listo()
+
+    def _paso_arranque_listo(self):
+        self._arranque["pendientes"] -= 1
+        if self._arranque["pendientes"] == 0:
+            self._informar_arranque(self._arranque["t_cuadro"])
+
+    def _informar_arranque(self, t_cuadro):
+        """Imprime y registra en las métricas: imports, construcción de widgets, primer cuadro y lo diferido."""
+        a = self._arranque
+        partes = []
+        if a["t_inicio"] is not None:
+            partes.append(("imports", a["t_ventana"] - a["t_inicio"]))
+        partes.append(("widgets", a["t_widgets"] - a["t_ventana"]))
+        partes.append(("primer_cuadro", t_cuadro - a["t_widgets"]))
+        if a["t_inicio"] is not None:
+            partes.append(("ventana_visible", t_cuadro - a["t_inicio"]))
+        if "segundos" in a.get("matplotlib", {}):
+            partes.append(("import_matplotlib", a["matplotlib"]["segundos"]))
+        if "figuras_s" in a:
+            partes.append(("figuras_diferidas", a["figuras_s"]))
+        if self.serial_panel.segundos_escaneo is not None:
+            partes.append(("puertos", self.serial_panel.segundos_escaneo))
+        if "figuras_s" in a and a["t_inicio"] is not None:
+            partes.append(("listo", time.perf_counter() - a["t_inicio"]))
+
+        for nombre, segundos in partes:
+            self.metricas.tiempo("arranque." + nombre, segundos)
+        print("[Arranque] " + ", ".join(f"{nombre}: {segundos * 1000:.0f} ms" for nombre, segundos in partes))
 
 
     # ==============================================
     # Conectar / desconectar puerto serie
     # ==============================================
     def connect_serial(self, port):
-        print(f"[GUI] Intentando conectar a {port}")
-        ok = self.serial_handler.open(port)
-        if ok:
-            print(f"[GUI] Conectado correctamente a {port}")
-        else:
-            print("[GUI] Error al conectar")
-        return ok
+        return self.adquisicion.conectar(port)
 
     def disconnect_serial(self):
-        print("[GUI] Desconectando...")
-        self.serial_handler.close()
+        self.adquisicion.desconectar()
+
+
+    # ==============================================
+    # Demonio de adquisición
+    # ==============================================
+    def _adjuntar_demonio(self):
+        """Refleja en la interfaz el estado del demonio (puerto, umbrales, ensayo en curso) y se suscribe."""
+        adq = self.adquisicion
+        if adq.resumen_inicial is not None:
+            self.hist_panel.mostrar_acumulado(adq.resumen_inicial)
+        adq.suscribir()
+
+        if adq.puerto and adq.conectado():
+            self.serial_panel.marcar_conectado(adq.puerto)
+        if adq.umbrales:
+            self.param_panel.mostrar_aplicados(adq.umbrales)
+        if adq.ensayo_activo:
+            print(f"[GUI] Ensayo en curso en el demonio: {adq.ensayo_dir}")
+            self.ensayo_dir = adq.ensayo_dir
+            self._mostrar_ensayo_en_curso()
 
 
     # ==============================================
     # Manejo del ensayo
     # ==============================================
     def iniciar_ensayo(self, duracion_seg):
-        # Crear carpeta del ensayo
-        fecha = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        base = ENSAYOS_DIR / f"ensayo_{fecha}"
-        ruta_csv = base / "csv"
-        ruta_bin = base / "bin"
-
-        # ProcesaDatosTAR guardará automáticamente ahí
-        self.process.set_output_folders(
-            carpeta_csv=str(ruta_csv),
-            carpeta_bin=str(ruta_bin)
+        # Carpeta, autoguardado, limpieza y START quedan a cargo de la sesión (o del demonio)
+        base = self.adquisicion.iniciar_ensayo(
+            duracion_seg,
+            columnar=self.ensayo_panel.var_columnar.get(),
+            contenedor=self.ensayo_panel.var_contenedor.get(),
         )
+        if base is None:
+            self.ensayo_panel.var_estado.set("No se pudo iniciar el ensayo")
+            return
+        self.ensayo_dir = base
+        self._mostrar_ensayo_en_curso()
 
-        # Configurar auto-guardado cada 15 segundos
-        self.process.auto_periodo_seg = 15
-        self.process._ultimo_guardado_ts = time.time()
-        self.process._start_auto_loop()
-
-        # Variables internas
-        self.ensayo_duracion = duracion_seg
-        self.ensayo_restante = duracion_seg
+    def _mostrar_ensayo_en_curso(self):
         self.ensayo_activo = True
-        self._last_ind = 0
-
-        # Limpiar buffers previos
-        self.process.clear()
 
         # Actualizar UI
-        self.ensayo_panel.var_estado.set(f"Corriendo ({self.ensayo_restante}s)")
+        self.ensayo_panel.var_estado.set(f"Corriendo ({self.adquisicion.restante_seg():.0f}s)")
         self.ensayo_panel.boton_iniciar.config(state="disabled")
         self.ensayo_panel.boton_finalizar.config(state="normal")
         self.hist_panel.bloquear(True)
         self.param_panel.bloquear(True)
         self.ensayo_panel.bloquear_duracion(True)
 
-        # Ordenar inicio al hardware
-        if self.serial_handler:
-            self.serial_handler.iniciar_captura()
-
         # Inicia ticker de UI
         self.after(1000, self._tick_ensayo)
 
@@ -182,31 +298,24 @@ class MainWindow(tk.Tk):
         if not self.ensayo_activo:
             return
 
-        self.ensayo_restante -= 1
-
-        if self.ensayo_restante <= 0:
+        # El demonio también finaliza el ensayo por su cuenta al cumplirse la duración
+        restante = self.adquisicion.restante_seg()
+        if restante <= 0 or not self.adquisicion.ensayo_activo:
             self.finalizar_ensayo()
             return
 
-        self.ensayo_panel.var_estado.set(
-            f"Corriendo ({self.ensayo_restante}s restantes)"
-        )
+        if getattr(self.adquisicion, "perdido", False):
+            self.ensayo_panel.var_estado.set("Sin conexión con el demonio")
+        else:
+            self.ensayo_panel.var_estado.set(f"Corriendo ({restante:.0f}s restantes)")
         self.after(1000, self._tick_ensayo)
 
 
     def finalizar_ensayo(self):
         self.ensayo_activo = False
 
-        # Ordenar STOP al hardware
-        if self.serial_handler:
-            self.serial_handler.detener_captura()
-        
-        # Detener autoguardado para evitar condiciones de carrera
-        self.process.stop_auto()
-
-        # Guardado final (ProcesaDatosTAR guarda archivos dentro del ensayo actual)
-        print("[GUI] Guardando dump final...")
-        self.process.dump_and_reset()
+        # STOP, guardado final y métricas del ensayo
+        self.adquisicion.finalizar_ensayo()
 
         # Restaurar UI
         self.ensayo_panel.boton_iniciar.config(state="normal")
@@ -220,17 +329,6 @@ class MainWindow(tk.Tk):
     # ==============================================
     # Callbacks del SerialHandler
     # ==============================================
-    def on_serial_data(self, data: bytes):
-        # Enviar datos al parser
-        self.process.feed(data)
-
-        # Actualización rápida de gráficos
-        total = self.process.total_registros()
-        if total - self._last_ind >= 50:
-            nuevos = self.process.registros_nuevos_desde(self._last_ind)
-            self._last_ind = total
-            
-
     def on_serial_error(self, msg: str):
         print(f"[ERROR] {msg}")
 
@@ -243,48 +341,161 @@ class MainWindow(tk.Tk):
 
         filename = filedialog.askopenfilename(
             title="Seleccionar archivo binario TAR",
-            initialdir=str(ENSAYOS_DIR),
+            initialdir=carpeta_ensayos(),
             filetypes=[("Binarios TAR", "*.bin")]
         )
 
         if not filename:
             return
 
+        if self._reproceso is not None:
+            print("[GUI] Ya hay un reprocesado en curso")
+            return
+
+        # Sin ensayo previo en la sesión, los CSV van a la carpeta csv del ensayo del archivo
+        procesador = self._procesador_reproceso()
+        if not procesador.carpeta_csv:
+            procesador.carpeta_csv = str(Path(filename).parent.parent / "csv")
+            os.makedirs(procesador.carpeta_csv, exist_ok=True)
+
         print("[GUI] Reprocesando crudo:", filename)
-        self.process.load_raw_and_reprocesar(filename)
+        acumulador = AcumuladorHistograma()
+        self._reproceso = {"leidos": 0, "total": 1, "fin": False, "acumulador": acumulador}
+
+        def progreso(leidos, total):
+            self._reproceso["leidos"] = leidos
+            self._reproceso["total"] = max(total, 1)
+
+        def trabajo():
+            try:
+                procesador.reprocesar_streaming(
+                    filename,
+                    progreso=progreso,
+                    on_lote=lambda lote: acumulador.acumular(lote["chan"], lote["vp_counts"]),
+                )
+            finally:
+                self._reproceso["fin"] = True
+
+        # Se procesa en otro hilo para no congelar la interfaz
+        threading.Thread(target=trabajo, daemon=True).start()
+        self.after(200, self._tick_reproceso)
+
+    def _tick_reproceso(self):
+        estado = self._reproceso
+        porcentaje = 100 * estado["leidos"] // estado["total"]
+
+        if not estado["fin"]:
+            self.ensayo_panel.var_estado.set(f"Reprocesando binario ({porcentaje}%)")
+            self.after(200, self._tick_reproceso)
+            return
 
+        self._reproceso = None
+        self.ensayo_panel.var_estado.set("Binario reprocesado")
         try:
-            self.hist_panel.refrescar_completo()
+            self.hist_panel.mostrar_acumulado(estado["acumulador"])
+        except Exception:
+            pass
+
+    def reprocesar_carpeta(self):
+        from tkinter import filedialog
+
+        carpeta = filedialog.askdirectory(
+            title="Seleccionar carpeta de ensayo",
+            initialdir=carpeta_ensayos()
+        )
+
+        if not carpeta:
+            return
+
+        if self._reproceso is not None:
+            print("[GUI] Ya hay un reprocesado en curso")
+            return
+
+        print("[GUI] Reprocesando carpeta:", carpeta)
+        self._reproceso = {"fin": False, "resultado": None}
+
+        def trabajo():
+            try:
+                self._reproceso["resultado"] = reprocesar_ensayo(carpeta)
+            except Exception as e:
+                print(f"[GUI] Error reprocesando carpeta: {e}")
+            finally:
+                self._reproceso["fin"] = True
+
+        threading.Thread(target=trabajo, daemon=True).start()
+        self.ensayo_panel.var_estado.set("Reprocesando carpeta...")
+        self.after(500, self._tick_reproceso_carpeta)
+
+    def _tick_reproceso_carpeta(self):
+        if not self._reproceso["fin"]:
+            self.after(500, self._tick_reproceso_carpeta)
+            return
+
+        resultado = self._reproceso["resultado"]
+        self._reproceso = None
+        if resultado:
+            self.ensayo_panel.var_estado.set(
+                f"{resultado['archivos']} archivos ({resultado['mb_s']:.1f} MB/s)"
+            )
+        else:
+            self.ensayo_panel.var_estado.set("Error al reprocesar carpeta")
+
+    def ver_ensayo_columnar(self):
+        from tkinter import filedialog
+
+        rutas = filedialog.askopenfilenames(
+            title="Seleccionar archivos columnares del ensayo",
+            initialdir=carpeta_ensayos(),
+            filetypes=[("Columnas TAR", f"*{EXT_COLUMNAR}")]
+        )
+
+        if not rutas:
+            return
+
+        # Las columnas se abren con mmap: no se re-decodifica ni se cargan en RAM de una vez
+        acumulador = AcumuladorHistograma()
+        eventos = 0
+        for ruta in sorted(rutas):
+            try:
+                encabezado, vista = abrir_tarc(ruta)
+                comprobar_resolucion(encabezado, ruta)
+            except (OSError, ValueError) as e:
+                print(f"[GUI] No se pudo abrir {ruta}: {e}")
+                continue
+            # Los canales son los que registró el archivo, no los de esta versión del programa
+            canales = (encabezado["canal_a"], encabezado["canal_b"])
+            parcial = AcumuladorHistograma(canales)
+            parcial.acumular(vista.chan, vista.vp_counts)
+            for canal_archivo, canal in zip(canales, (CANAL_A, CANAL_B)):
+                acumulador.conteos[canal] += parcial.conteos[canal_archivo]
+            eventos += encabezado["eventos"]
+
+        print(f"[GUI] Ensayo columnar: {len(rutas)} archivos, {eventos} eventos")
+        self.ensayo_panel.var_estado.set(f"Ensayo cargado ({eventos} eventos)")
+        try:
+            self.hist_panel.mostrar_acumulado(acumulador)
         except Exception:
             pass
 
     def limpiar_datos(self):
-        self.process.clear()
-        print("[GUI] Datos limpiados.")
+        self.adquisicion.limpiar()
+
+    def _procesador_reproceso(self):
+        """El procesador de la ventana; con demonio, uno local solo para reprocesar archivos a CSV."""
+        if not self.adquisicion.remota:
+            return self.process
+        if self._reprocesador is None:
+            self._reprocesador = ProcesaDatosTAR(carpeta_bin=None, carpeta_csv=None)
+        return self._reprocesador
 
 
     # ==============================================
     # Aplicar parámetros al TAR
     # ==============================================
     def _aplicar_parametros(self, params):
-        A_min = params["umbral_cha_min"]
-        A_max = params["umbral_cha_max"]
-        B_min = params["umbral_chb_min"]
-        B_max = params["umbral_chb_max"]
-
-        print(f"[MainWindow] Aplicando parámetros: {params}")
-
-        if not self.serial_handler:
-            print("[MainWindow] SerialHandler no inicializado")
-            return
-
-        # Envío ASCII simple al firmware
-        self.serial_handler.send(f"UMBRAL CHA_MIN {A_min}\n".encode())
-        self.serial_handler.send(f"UMBRAL CHA_MAX {A_max}\n".encode())
-        self.serial_handler.send(f"UMBRAL CHB_MIN {B_min}\n".encode())
-        self.serial_handler.send(f"UMBRAL CHB_MAX {B_max}\n".encode())
+        # Envío ASCII simple al firmware (desde esta sesión o desde el demonio)
+        self.adquisicion.aplicar_umbrales(params)
 
-        print("[MainWindow] Parámetros enviados correctamente al TAR.")
         try:
             self.param_panel.bloquear(True)
         except Exception:
@@ -303,7 +514,7 @@ class MainWindow(tk.Tk):
         """
 
         # 1. Puerto serie conectado
-        if not self.serial_handler or not self.serial_handler.is_connected():
+        if not self.adquisicion.conectado():
             return False, "No hay ningún puerto COM conectado."
 
         # 2. Parámetros aplicados
@@ -0,0 +1,152 @@
+import tkinter as tk
+from tkinter import ttk
+import abc
+import threading
+import time
+
+
+# ============================================================
+#   FIGURAS MATPLOTLIB DE CONSTRUCCIÓN DIFERIDA
+# ============================================================
+def crear_figura(master, figsize=(5, 4), dpi=50):
+    """
+    Figura + canvas TkAgg empaquetado en 'master'. matplotlib se importa recién acá:
+    la ventana puede mostrarse antes de cargarlo (ver MainWindow, arranque diferido).
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasTkAgg(fig, master=master)
+    canvas.get_tk_widget().pack(fill="both", expand=True)
+    return fig, canvas
+
+
+def precargar_matplotlib(resultado: dict) -> threading.Event:
+    """
+    Importa matplotlib y el backend TkAgg en un hilo (solo módulos, ningún widget), para que
+    la primera crear_figura no congele la ventana. Deja en resultado["segundos"] lo que tardó.
+    """
+    listo = threading.Event()
+
+    def trabajo():
+        t0 = time.perf_counter()
+        try:
+            import matplotlib.figure                  # noqa: F401
+            import matplotlib.backends.backend_tkagg  # noqa: F401
+        except Exception as e:
+            print(f"[GUI] Error precargando matplotlib: {e}")
+        resultado["segundos"] = time.perf_counter() - t0
+        listo.set()
+
+    threading.Thread(target=trabajo, daemon=True).start()
+    return listo
+
+
+def marcador_carga(master) -> ttk.Label:
+    """Texto que ocupa el lugar de la figura hasta construirla."""
+    etiqueta = ttk.Label(master, text="Cargando gráfica…", anchor="center")
+    etiqueta.pack(fill="both", expand=True)
+    return etiqueta
+
+
+# ============================================================
+#   PANEL CON FIGURA ALIMENTADO POR LOS EVENTOS NUEVOS
+# ============================================================
+class PanelFigura(ttk.LabelFrame, metaclass=abc.ABCMeta):
+    """
+    Base de los paneles con una figura que se refresca periódicamente desde el procesador:
+    botón Borrar y línea de información, figura diferida (construir_figura), refresco
+    periódico y redibujo al volver a mostrarse. Por defecto cada refresco pasa los eventos
+    nuevos a acumular() aunque el panel no esté visible; el dibujo se hace solo si lo está.
+    Cada panel define _crear_ejes, reiniciar y _dibujar; acumular solo los que se alimentan
+    de los eventos (los que leen sus datos de otro lado redefinen _leer_nuevos).
+    """
+
+    def __init__(self, parent, procesador_datos, titulo, update_ms=1000, diferir=False):
+        super().__init__(parent, text=titulo, padding=5)
+
+        self.process = procesador_datos
+        self.update_ms = update_ms
+        self.last_index = 0
+        self._generacion = self.process.generacion
+
+        cfg = ttk.Frame(self)
+        cfg.pack(fill="x", pady=5)
+        ttk.Button(cfg, text="Borrar", command=self.limpiar).pack(side="right", padx=5)
+        self.var_info = tk.StringVar(value="-")
+        ttk.Label(cfg, textvariable=self.var_info).pack(side="left", padx=5)
+
+        # Con diferir=True la figura se arma después (construir_figura) o al mostrarse el panel
+        self.fig = self.canvas = None
+        self._cargando = marcador_carga(self) if diferir else None
+        if not diferir:
+            self.construir_figura()
+
+        # Al volver a mostrarse (p. ej. cambio de pestaña) se dibuja lo acumulado mientras estaba oculto
+        self.bind("<Map>", lambda e: self._refrescar(forzar=True))
+        self.after(self.update_ms, self._actualizar)
+
+    def construir_figura(self):
+        """Crea la figura (importa matplotlib). Idempotente."""
+        if self.canvas is not None:
+            return
+        if self._cargando is not None:
+            self._cargando.destroy()
+            self._cargando = None
+        self.fig, self.canvas = crear_figura(self)
+        self._crear_ejes()
+
+    def limpiar(self):
+        self.reiniciar()
+        self.last_index = self.process.total_registros()
+        self._refrescar(forzar=True)
+
+    # ==================================================
+    # Actualización periódica
+    # ==================================================
+    def _actualizar(self):
+        if self.process.generacion != self._generacion:
+            # clear() descartó los datos del procesador
+            self._generacion = self.process.generacion
+            self.reiniciar()
+            self.last_index = 0
+
+        if self._leer_nuevos() and self.winfo_ismapped():
+            self._refrescar()
+
+        self.after(self.update_ms, self._actualizar)
+
+    def _leer_nuevos(self) -> bool:
+        """Pasa a acumular() los eventos nuevos del procesador; retorna si hubo alguno."""
+        nuevos = self.process.registros_nuevos_desde(self.last_index)
+        self.last_index = nuevos.fin
+        if not len(nuevos):
+            return False
+        self.acumular(nuevos)
+        return True
+
+    def _refrescar(self, forzar=False):
+        """Dibuja, armando antes la figura si hace falta (una figura recién armada se dibuja siempre)."""
+        if self.canvas is None:
+            self.construir_figura()
+            forzar = True
+        self._dibujar(forzar)
+
+    # ==================================================
+    # Propio de cada panel
+    # ==================================================
+    @abc.abstractmethod
+    def _crear_ejes(self):
+        """Agrega los ejes a self.fig recién creada."""
+
+    @abc.abstractmethod
+    def reiniciar(self):
+        """Descarta lo acumulado por el panel."""
+
+    def acumular(self, nuevos):
+        """Suma los eventos nuevos (VistaEventos) a lo acumulado por el panel; por defecto no hace nada."""
+
+    @abc.abstractmethod
+    def _dibujar(self, forzar: bool):
+        """Redibuja lo acumulado; con forzar=False puede omitirlo si no cambió nada."""
@@ -0,0 +1,290 @@
+"""
+Suite de benchmarks de throughput del procesamiento TAR.
+
+Uso:
+    python -m herramientas.benchmark --frames 2000000 --salida bench.json
+    python -m herramientas.benchmark --baseline bench_base.json --tolerancia 0.15
+
+Mide frames/s, MB/s, pico de RSS y percentiles de latencia por etapa, guarda el resultado
+en JSON y marca regresiones contra un baseline guardado (código de salida 1).
+"""
+from typing import Callable, Dict, List, Optional, Tuple
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from core.protocolo import FRAME_SIZE, ZMODADC1410_RESOLUTION, CANAL_A
+from core.procesar_datos import ProcesaDatosTAR, decodificar_lote
+from core.exportar_csv import escribir_csv
+from core.histograma import AcumuladorHistograma
+from core.sincronizacion import SincronizadorTAR
+from core.coincidencias import MotorCoincidencias
+from herramientas.generador_tar import GeneradorTAR
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+# ====================================================================
+#                           MEDICIONES
+# ====================================================================
+def rss_pico_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso (MB), si la plataforma lo informa."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB, macOS bytes
+    return pico / (1 << 20) if sys.platform == "darwin" else pico / 1024
+
+
+def resumen_etapa(latencias_s: List[float], frames: int, total_s: float) -> Dict:
+    lat_ms = np.asarray(latencias_s) * 1000.0
+    return {
+        "frames": frames,
+        "segundos": total_s,
+        "frames_s": frames / total_s if total_s > 0 else 0.0,
+        "mb_s": frames * FRAME_SIZE / 1e6 / total_s if total_s > 0 else 0.0,
+        "p50_ms": float(np.percentile(lat_ms, 50)) if len(lat_ms) else 0.0,
+        "p95_ms": float(np.percentile(lat_ms, 95)) if len(lat_ms) else 0.0,
+        "p99_ms": float(np.percentile(lat_ms, 99)) if len(lat_ms) else 0.0,
+        "max_ms": float(lat_ms.max()) if len(lat_ms) else 0.0,
+        "rss_pico_mb": rss_pico_mb(),
+    }
+
+
+def cronometrar(funcion: Callable[[], object]) -> float:
+    t0 = time.perf_counter()
+    funcion()
+    return time.perf_counter() - t0
+
+
+@contextlib.contextmanager
+def silencio():
+    """Oculta los print() del procesador durante la medición."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ====================================================================
+#                             ETAPAS
+# ====================================================================
+def bench_feed(chunks: List[bytes], frames: int, carpeta: str,
+               sincronizador: Optional[SincronizadorTAR] = None,
+               coincidencias: Optional[MotorCoincidencias] = None) -> Tuple[Dict, ProcesaDatosTAR]:
+    proc = ProcesaDatosTAR(carpeta_bin=os.path.join(carpeta, "bin"), carpeta_csv=os.path.join(carpeta, "csv"),
+                           sincronizador=sincronizador, coincidencias=coincidencias)
+    latencias = []
+    t0 = time.perf_counter()
+    for chunk in chunks:
+        latencias.append(cronometrar(lambda: proc.feed(chunk)))
+    resultado = resumen_etapa(latencias, frames, time.perf_counter() - t0)
+    resultado["copias"] = proc.estadisticas_copia()
+    return resultado, proc
+
+
+def bench_dump(proc: ProcesaDatosTAR, frames: int) -> Tuple[Dict, str]:
+    rutas = {}
+
+    def guardar():
+        with silencio():
+            rutas["bin"], _ = proc.dump_and_reset(prefix="bench")
+
+    total = cronometrar(guardar)
+    return resumen_etapa([total], frames, total), rutas["bin"]
+
+
+def bench_reproceso(ruta_bin: str, frames: int, carpeta: str) -> Dict:
+    proc = ProcesaDatosTAR(carpeta_bin=os.path.join(carpeta, "rbin"), carpeta_csv=os.path.join(carpeta, "rcsv"))
+
+    def reprocesar():
+        with silencio():
+            proc.load_raw_and_reprocesar(ruta_bin, output_prefix="bench")
+
+    total = cronometrar(reprocesar)
+    return resumen_etapa([total], frames, total)
+
+
+def bench_reproceso_streaming(ruta_bin: str, frames: int, carpeta: str) -> Dict:
+    proc = ProcesaDatosTAR(carpeta_bin=None, carpeta_csv=os.path.join(carpeta, "scsv"))
+
+    def reprocesar():
+        with silencio():
+            proc.reprocesar_streaming(ruta_bin, output_prefix="bench")
+
+    total = cronometrar(reprocesar)
+    return resumen_etapa([total], frames, total)
+
+
+def bench_histograma(chunks: List[bytes], frames: int) -> Dict:
+    """Acumulación incremental por chunk + re-agrupado a bins de mV (un 'tick' del panel)."""
+    proc = ProcesaDatosTAR(carpeta_bin=None, carpeta_csv=None)
+    acumulador = AcumuladorHistograma()
+    ultimo = 0
+    latencias = []
+    t_total = 0.0
+    for chunk in chunks:
+        proc.feed(chunk)
+        t0 = time.perf_counter()
+        nuevos = proc.registros_nuevos_desde(ultimo)
+        ultimo = nuevos.fin
+        acumulador.acumular(nuevos.chan, nuevos.vp_counts)
+        for canal in acumulador.conteos:
+            acumulador.histograma(canal, 0, 10000, 50)
+        dt = time.perf_counter() - t0
+        latencias.append(dt)
+        t_total += dt
+    return resumen_etapa(latencias, frames, t_total)
+
+
+def _csv_por_filas(ruta: str, ts_abs_ns: np.ndarray, vp_counts: np.ndarray) -> int:
+    """Escritor de referencia: csv.writer fila por fila, como se exportaba antes."""
+    with open(ruta, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Index", "Timestamp (ns)", "Value (mV)"])
+        w.writerows(zip(range(len(ts_abs_ns)), ts_abs_ns.tolist(), (vp_counts * ZMODADC1410_RESOLUTION).tolist()))
+    return len(ts_abs_ns)
+
+
+def bench_csv(chunks: List[bytes], carpeta: str) -> Dict[str, Dict]:
+    """Exportación de un canal con csv.writer frente al escritor por bloques (deben dar los mismos bytes)."""
+    lote, _ = decodificar_lote(b"".join(chunks))
+    sel = lote["chan"] == CANAL_A
+    ts, vp = lote["ts_abs_ns"][sel], lote["vp_counts"][sel]
+    frames = len(ts)
+
+    rutas, etapas = {}, {}
+    for nombre, escritor in (("csv_writer", _csv_por_filas), ("csv_bloques", escribir_csv)):
+        rutas[nombre] = os.path.join(carpeta, f"{nombre}.csv")
+        total = cronometrar(lambda: escritor(rutas[nombre], ts, vp))
+        etapas[nombre] = resumen_etapa([total], frames, total)
+
+    with open(rutas["csv_writer"], "rb") as a, open(rutas["csv_bloques"], "rb") as b:
+        if a.read() != b.read():
+            raise RuntimeError("El CSV por bloques no coincide byte a byte con el de csv.writer")
+    return etapas
+
+
+# ====================================================================
+#                       COMPARACIÓN CON BASELINE
+# ====================================================================
+def comparar(resultado: Dict, baseline: Dict, tolerancia: float) -> List[str]:
+    """Lista de regresiones: etapas cuyo frames/s cayó más que 'tolerancia' respecto del baseline."""
+    regresiones = []
+    for etapa, actual in resultado["etapas"].items():
+        base = baseline.get("etapas", {}).get(etapa)
+        if not base or not base.get("frames_s"):
+            continue
+        relacion = actual["frames_s"] / base["frames_s"]
+        if relacion < 1.0 - tolerancia:
+            regresiones.append(
+                f"{etapa}: {actual['frames_s']:.0f} frames/s vs {base['frames_s']:.0f} "
+                f"({(relacion - 1) * 100:+.1f}%)"
+            )
+    return regresiones
+
+
+# ====================================================================
+#                               MAIN
+# ====================================================================
+def ejecutar(args) -> Dict:
+    generador = GeneradorTAR(
+        semilla=args.semilla,
+        proporcion_a=args.proporcion_a,
+        amplitud=args.amplitud,
+        frames_por_overflow=args.frames_por_overflow,
+    )
+    chunks = list(generador.chunks(args.frames, args.chunk, args.chunk_max))
+
+    etapas = {}
+    with tempfile.TemporaryDirectory() as carpeta:
+        etapas["feed"], proc = bench_feed(chunks, args.frames, carpeta)
+        # Validación de header/footer sobre un flujo limpio: debe costar poco frente a feed
+        with silencio():
+            etapas["feed_sincronizado"], _ = bench_feed(chunks, args.frames, carpeta, SincronizadorTAR())
+            # Coincidencias A/B en línea: tienen que seguir el ritmo de la decodificación
+            etapas["feed_coincidencias"], _ = bench_feed(chunks, args.frames, carpeta,
+                                                        coincidencias=MotorCoincidencias(1000))
+        etapas["dump_and_reset"], ruta_bin = bench_dump(proc, args.frames)
+        del proc
+        etapas["load_raw_and_reprocesar"] = bench_reproceso(ruta_bin, args.frames, carpeta)
+        etapas["reprocesar_streaming"] = bench_reproceso_streaming(ruta_bin, args.frames, carpeta)
+        etapas.update(bench_csv(chunks, carpeta))
+    etapas["histograma"] = bench_histograma(chunks, args.frames)
+
+    return {
+        "fecha": time.strftime("%Y-%m-%d_%H-%M-%S"),
+        "plataforma": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sistema": platform.platform(),
+            "cpu": platform.processor() or platform.machine(),
+        },
+        "config": vars(args),
+        "etapas": etapas,
+    }
+
+
+def imprimir(resultado: Dict):
+    print(f"{'etapa':<26}{'frames/s':>14}{'MB/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}")
+    for etapa, r in resultado["etapas"].items():
+        rss = "-" if r["rss_pico_mb"] is None else f"{r['rss_pico_mb']:.0f}"
+        print(f"{etapa:<26}{r['frames_s']:>14,.0f}{r['mb_s']:>10.1f}{r['p50_ms']:>10.3f}{r['p99_ms']:>10.3f}{rss:>10}")
+    etapas = resultado["etapas"]
+    if "csv_writer" in etapas and etapas["csv_writer"]["segundos"] > 0:
+        print(f"CSV por bloques: {etapas['csv_writer']['segundos'] / etapas['csv_bloques']['segundos']:.1f}x "
+              f"más rápido que csv.writer (salida idéntica)")
+    copias = resultado["etapas"]["feed"].get("copias")
+    if copias:
+        print(f"Bytes copiados por frame: {copias['bytes_por_frame']:.3f} "
+              f"(buffer anterior: {copias['bytes_por_frame_previo']:.3f})")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de throughput del procesamiento TAR")
+    parser.add_argument("--frames", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=4096, help="tamaño de chunk serie (bytes)")
+    parser.add_argument("--chunk-max", type=int, default=None, help="si se indica, chunks aleatorios en [chunk, chunk-max]")
+    parser.add_argument("--proporcion-a", type=float, default=0.5)
+    parser.add_argument("--amplitud", choices=["normal", "uniforme"], default="normal")
+    parser.add_argument("--frames-por-overflow", type=int, default=10000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default=None, help="archivo JSON con el resultado")
+    parser.add_argument("--baseline", default=None, help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.15, help="caída relativa tolerada de frames/s")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args)
+    imprimir(resultado)
+
+    regresiones = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regresiones = comparar(resultado, baseline, args.tolerancia)
+        resultado["regresiones"] = regresiones
+        for r in regresiones:
+            print(f"[REGRESIÓN] {r}")
+        if not regresiones:
+            print("Sin regresiones respecto del baseline.")
+
+    if args.salida:
+        with open(args.salida, "w") as f:
+            json.dump(resultado, f, indent=2)
+        print(f"Resultado guardado en: {args.salida}")
+
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
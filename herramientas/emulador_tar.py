@@ -0,0 +1,427 @@
+"""
+Emulador del firmware TAR sobre una pseudo-terminal (solo POSIX).
+
+Uso:
+    python -m herramientas.emulador_tar --tasa 20000 --baudios 921600
+        Crea el puerto, imprime su ruta (p. ej. /dev/pts/5) y queda atendiendo comandos;
+        la GUI se conecta escribiendo esa ruta en el combo de puertos.
+
+    python -m herramientas.emulador_tar --medir --tasa 50000 --baudios 0 --segundos 5
+    python -m herramientas.emulador_tar --barrido 10000,50000,200000,1000000 --baudios 0
+        Miden en el mismo proceso la latencia serie → decodificación → histograma y
+        buscan la tasa a partir de la cual el pipeline empieza a perder datos.
+
+El timestamp de cada frame es el instante de envío (cuentas de 10 ns desde START, con un
+CH=3 en cada vuelta de la base de tiempo), de modo que el receptor obtiene la latencia
+como reloj actual del emulador menos 'ts_abs_ns' del evento decodificado.
+"""
+from typing import Dict, List, Optional
+import argparse
+import errno
+import os
+import select
+import sys
+import threading
+import time
+
+import numpy as np
+
+from core.protocolo import T_PERIOD, ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B, FRAME_SIZE
+from herramientas.generador_tar import GeneradorTAR, armar_frames
+
+try:
+    import tty
+except ImportError:     # Windows
+    tty = None
+
+# Bytes que el "UART" del emulador puede tener pendientes antes de descartar frames
+FIFO_TX = 64 * 1024
+
+
+# ====================================================================
+#                       EMULADOR DEL FIRMWARE
+# ====================================================================
+class EmuladorTAR:
+    """
+    Firmware TAR simulado detrás de una pseudo-terminal. Entiende:
+     - START / STOP: inicia o detiene la transmisión de frames
+     - UMBRAL CHA_MIN|CHA_MAX|CHB_MIN|CHB_MAX <mV>: ventana de amplitudes por canal
+       (los pulsos fuera de la ventana no se transmiten)
+    Transmite 'tasa' eventos por segundo limitado por 'baudios' (10 bits por byte;
+    0 = sin límite). Si el lado receptor no lee, los frames que no entran en la FIFO de
+    transmisión se descartan y se cuentan, como haría el firmware.
+    """
+
+    def __init__(
+        self,
+        tasa: float = 10000.0,
+        baudios: int = 115200,
+        generador: Optional[GeneradorTAR] = None,
+        periodo_ms: float = 1.0,
+    ):
+        if tty is None:
+            raise RuntimeError("El emulador TAR requiere pseudo-terminales (POSIX)")
+
+        self.tasa = tasa
+        self.baudios = baudios
+        self.generador = generador or GeneradorTAR()
+        self.periodo_ms = periodo_ms
+
+        # Ventanas de umbral por canal (mV)
+        self.umbrales = {"CHA_MIN": 0.0, "CHA_MAX": float("inf"),
+                         "CHB_MIN": 0.0, "CHB_MAX": float("inf")}
+        self.comandos: List[str] = []
+
+        # Estadísticas
+        self.enviados = 0               # pulsos entregados a la pty
+        self.filtrados = 0              # pulsos fuera de umbral
+        self.descartados_fifo = 0       # pulsos perdidos por FIFO llena
+        self.overflows = 0              # frames CH=3 emitidos
+        self.bytes_enviados = 0
+
+        self.puerto: Optional[str] = None
+        self._master: Optional[int] = None
+        self._slave: Optional[int] = None
+        self._pendiente = b""
+
+        self._transmitiendo = threading.Event()
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._hilo_comandos: Optional[threading.Thread] = None
+        self._hilo_envio: Optional[threading.Thread] = None
+
+        # Base de tiempo de los frames
+        self._t0_ns = 0
+        self._vuelta = 0
+        self._t_ultimo_ns = 0
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    def iniciar(self) -> str:
+        """Crea la pseudo-terminal y arranca los hilos; retorna la ruta del puerto."""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.puerto = os.ttyname(self._slave)
+
+        self._stop_event.clear()
+        self._hilo_comandos = threading.Thread(target=self._loop_comandos, daemon=True)
+        self._hilo_envio = threading.Thread(target=self._loop_envio, daemon=True)
+        self._hilo_comandos.start()
+        self._hilo_envio.start()
+        print(f"[Emulador] Puerto TAR disponible en {self.puerto}")
+        return self.puerto
+
+    def detener(self):
+        self._stop_event.set()
+        self._transmitiendo.set()       # despierta al hilo de envío
+        for hilo in (self._hilo_comandos, self._hilo_envio):
+            if hilo:
+                hilo.join(timeout=1.0)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def ahora_ns(self) -> int:
+        """Reloj del emulador en ns desde START (misma escala que 'ts_abs_ns' decodificado)."""
+        return time.perf_counter_ns() - self._t0_ns
+
+    # -------------------------
+    # Comandos (lado GUI → TAR)
+    # -------------------------
+    def _loop_comandos(self):
+        linea = b""
+        while not self._stop_event.is_set():
+            listos, _, _ = select.select([self._master], [], [], 0.1)
+            if not listos:
+                continue
+            try:
+                data = os.read(self._master, 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EIO):
+                    continue
+                raise
+            linea += data
+            while b"\n" in linea:
+                comando, linea = linea.split(b"\n", 1)
+                self.procesar_comando(comando.decode(errors="replace").strip())
+
+    def procesar_comando(self, comando: str):
+        if not comando:
+            return
+        self.comandos.append(comando)
+        partes = comando.split()
+        print(f"[Emulador] Comando: {comando}")
+
+        if partes[0] == "START":
+            with self._lock:
+                self._t0_ns = time.perf_counter_ns()
+                self._t_ultimo_ns = 0
+                self._vuelta = 0
+            self._transmitiendo.set()
+        elif partes[0] == "STOP":
+            self._transmitiendo.clear()
+        elif partes[0] == "UMBRAL" and len(partes) == 3 and partes[1] in self.umbrales:
+            try:
+                self.umbrales[partes[1]] = float(partes[2])
+            except ValueError:
+                print(f"[Emulador] Valor de umbral inválido: {partes[2]}")
+        else:
+            print(f"[Emulador] Comando desconocido: {comando}")
+
+    # -------------------------
+    # Transmisión (TAR → GUI)
+    # -------------------------
+    def _loop_envio(self):
+        periodo = self.periodo_ms / 1000.0
+        enviados_tick = 0.0     # fracción de evento acumulada entre ticks
+        while not self._stop_event.is_set():
+            if not self._transmitiendo.is_set():
+                if self._pendiente:
+                    # Tras STOP se termina de vaciar la FIFO de transmisión
+                    time.sleep(periodo)
+                    self._transmitir(b"", periodo)
+                    continue
+                self._transmitiendo.wait()
+                enviados_tick = 0.0
+                continue
+
+            time.sleep(periodo)
+            with self._lock:
+                ahora = self.ahora_ns()
+                dt = (ahora - self._t_ultimo_ns) / 1e9
+                enviados_tick += dt * self.tasa
+                n = int(enviados_tick)
+                enviados_tick -= n
+                datos = self._armar_tick(n, self._t_ultimo_ns, ahora)
+                self._t_ultimo_ns = ahora
+            self._transmitir(datos, dt)
+
+    def _armar_tick(self, n: int, desde_ns: int, hasta_ns: int) -> bytes:
+        """n pulsos con instantes repartidos en (desde_ns, hasta_ns], más los CH=3 de cada vuelta."""
+        if n == 0:
+            return b""
+        g = self.generador
+        instantes = np.linspace(desde_ns, hasta_ns, n + 1)[1:].astype(np.int64)
+        crudos = instantes // 10
+        chan = np.where(g.rng.random(n) < g.proporcion_a, CANAL_A, CANAL_B).astype(np.uint64)
+        vp = g._amplitudes(n)
+
+        # Ventana de umbrales por canal
+        mv = vp * ZMODADC1410_RESOLUTION
+        a = chan == CANAL_A
+        dentro = np.where(
+            a,
+            (mv >= self.umbrales["CHA_MIN"]) & (mv <= self.umbrales["CHA_MAX"]),
+            (mv >= self.umbrales["CHB_MIN"]) & (mv <= self.umbrales["CHB_MAX"]),
+        )
+        self.filtrados += int(n - np.count_nonzero(dentro))
+        crudos, chan, vp = crudos[dentro], chan[dentro], vp[dentro]
+        if len(crudos) == 0:
+            return b""
+
+        # Insertar un CH=3 antes del primer pulso de cada nueva vuelta de la base de tiempo
+        vueltas = crudos // T_PERIOD
+        partes = []
+        inicio = 0
+        for i in np.flatnonzero(np.diff(np.concatenate(([self._vuelta], vueltas))) > 0):
+            partes.append(armar_frames(crudos[inicio:i] % T_PERIOD, chan[inicio:i], vp[inicio:i], g.header, g.footer))
+            partes.append(armar_frames([0], [3], [0], g.header, g.footer))
+            self.overflows += 1
+            inicio = i
+        partes.append(armar_frames(crudos[inicio:] % T_PERIOD, chan[inicio:], vp[inicio:], g.header, g.footer))
+        self._vuelta = int(vueltas[-1])
+        return b"".join(partes)
+
+    def _transmitir(self, datos: bytes, dt: float):
+        """Escribe en la pty respetando baudios y FIFO; lo que no entra se descarta por frames."""
+        pendiente = self._pendiente
+        if datos:
+            lugar = max(0, FIFO_TX - len(pendiente))
+            lugar -= lugar % FRAME_SIZE
+            if len(datos) > lugar:
+                self.descartados_fifo += (len(datos) - lugar) // FRAME_SIZE
+                datos = datos[:lugar]
+            pendiente += datos
+
+        if self.baudios:
+            permitido = max(FRAME_SIZE, int(self.baudios / 10 * dt))
+            bloque = pendiente[:permitido]
+        else:
+            bloque = pendiente
+
+        escritos = 0
+        if bloque:
+            try:
+                escritos = os.write(self._master, bloque)
+            except OSError as e:
+                if e.errno != errno.EAGAIN:
+                    raise
+        self._pendiente = pendiente[escritos:]
+        self.bytes_enviados += escritos
+        self.enviados = self.bytes_enviados // FRAME_SIZE - self.overflows
+
+    def estadisticas(self) -> Dict:
+        return {
+            "tasa": self.tasa,
+            "baudios": self.baudios,
+            "frames_enviados": self.enviados,
+            "filtrados_umbral": self.filtrados,
+            "descartados_fifo": self.descartados_fifo,
+            "bytes_pendientes": len(self._pendiente),
+        }
+
+
+# ====================================================================
+#               MEDICIÓN DE LATENCIA EXTREMO A EXTREMO
+# ====================================================================
+def medir_latencia(
+    tasa: float,
+    segundos: float = 5.0,
+    baudios: int = 0,
+    periodo_hist_ms: float = 50.0,
+    semilla: int = 0,
+) -> Dict:
+    """
+    Levanta emulador + RecibirDatos + PipelineDecodificacion + ProcesaDatosTAR en el mismo
+    proceso y, en cada tick de histograma, mide la edad de los eventos nuevos. Retorna
+    percentiles de latencia, tasa lograda y pérdidas en cada etapa.
+    """
+    from core.recibir_datos import RecibirDatos
+    from core.procesar_datos import ProcesaDatosTAR
+    from core.pipeline import PipelineDecodificacion
+    from core.histograma import AcumuladorHistograma
+
+    emulador = EmuladorTAR(tasa=tasa, baudios=baudios, generador=GeneradorTAR(semilla=semilla))
+    emulador.iniciar()
+
+    proc = ProcesaDatosTAR(carpeta_bin=None, carpeta_csv=None)
+    pipeline = PipelineDecodificacion(proc)
+    pipeline.iniciar()
+    errores = []
+    receptor = RecibirDatos(on_data_callback=pipeline.encolar, on_error_callback=errores.append)
+    if not receptor.open(emulador.puerto):
+        emulador.detener()
+        raise RuntimeError(f"No se pudo abrir {emulador.puerto}: {errores}")
+
+    acumulador = AcumuladorHistograma()
+    latencias: List[np.ndarray] = []
+    ultimo = 0
+
+    def tick():
+        nonlocal ultimo
+        nuevos = proc.registros_nuevos_desde(ultimo)
+        ahora = emulador.ahora_ns()
+        ultimo = nuevos.fin
+        acumulador.acumular(nuevos.chan, nuevos.vp_counts)
+        pulsos = (nuevos.chan == CANAL_A) | (nuevos.chan == CANAL_B)
+        if np.any(pulsos):
+            latencias.append((ahora - nuevos.ts_abs_ns[pulsos]) / 1e6)
+
+    receptor.send(b"START\n")
+    limite = time.perf_counter() + segundos
+    while time.perf_counter() < limite:
+        time.sleep(periodo_hist_ms / 1000.0)
+        tick()
+    receptor.send(b"STOP\n")
+
+    # Drenar lo que quedó en vuelo
+    time.sleep(0.2)
+    tick()
+    receptor.close()
+    pipeline.detener()
+    emulador.detener()
+
+    lat = np.concatenate(latencias) if latencias else np.zeros(0)
+    recibidos = sum(acumulador.total(c) for c in acumulador.conteos)
+    emitidos = emulador.enviados
+    stats_pipeline = pipeline.estadisticas()
+    return {
+        "tasa": tasa,
+        "baudios": baudios,
+        "segundos": segundos,
+        "emitidos": emitidos,
+        "recibidos": int(recibidos),
+        "perdidos": int(emitidos - recibidos),
+        "tasa_lograda": recibidos / segundos,
+        "descartados_fifo": emulador.descartados_fifo,
+        "descartados_pipeline": stats_pipeline["descartados"],
+        "maximo_profundidad": stats_pipeline["maximo_profundidad"],
+        "lat_p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "lat_p99_ms": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "lat_max_ms": float(lat.max()) if len(lat) else 0.0,
+    }
+
+
+def barrido(tasas: List[float], **kwargs) -> List[Dict]:
+    """
+    Mide cada tasa y marca en cuáles el sistema pierde datos ('satura') y en cuáles el propio
+    emulador no llegó a generar la tasa pedida ('limite_emulador', la medición no es concluyente).
+    """
+    resultados = []
+    for tasa in tasas:
+        r = medir_latencia(tasa, **kwargs)
+        r["satura"] = bool(r["perdidos"] > 0 or r["descartados_fifo"] > 0 or r["descartados_pipeline"] > 0)
+        r["limite_emulador"] = r["emitidos"] < 0.95 * tasa * r["segundos"]
+        resultados.append(r)
+    return resultados
+
+
+def imprimir(resultados: List[Dict]):
+    print(f"{'tasa ev/s':>12}{'lograda':>12}{'perdidos':>10}{'desc. FIFO':>12}{'desc. pipe':>12}{'prof. máx':>10}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{'máx ms':>9}")
+    for r in resultados:
+        print(f"{r['tasa']:>12,.0f}{r['tasa_lograda']:>12,.0f}{r['perdidos']:>10}{r['descartados_fifo']:>12}"
+              f"{r['descartados_pipeline']:>12}"
+              f"{r['maximo_profundidad']:>10}{r['lat_p50_ms']:>9.1f}{r['lat_p99_ms']:>9.1f}{r['lat_max_ms']:>9.1f}")
+    saturadas = [r["tasa"] for r in resultados if r.get("satura")]
+    limitadas = [r["tasa"] for r in resultados if r.get("limite_emulador")]
+    if saturadas:
+        print(f"El sistema empieza a perder datos a partir de {saturadas[0]:,.0f} eventos/s")
+    elif len(resultados) > 1:
+        print("Sin pérdidas en todo el barrido.")
+    if limitadas:
+        print(f"El emulador no sostuvo la tasa pedida desde {limitadas[0]:,.0f} eventos/s "
+              f"(revisar --baudios o la CPU disponible)")
+
+
+# ====================================================================
+#                               MAIN
+# ====================================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Emulador del firmware TAR sobre una pseudo-terminal")
+    parser.add_argument("--tasa", type=float, default=10000.0, help="eventos por segundo")
+    parser.add_argument("--baudios", type=int, default=115200, help="0 = sin límite")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--medir", action="store_true", help="medir latencia en el mismo proceso")
+    parser.add_argument("--barrido", default=None, help="lista de tasas separadas por coma")
+    parser.add_argument("--segundos", type=float, default=5.0, help="duración de cada medición")
+    parser.add_argument("--periodo-hist-ms", type=float, default=50.0, help="período del tick de histograma")
+    args = parser.parse_args(argv)
+
+    if args.medir or args.barrido:
+        tasas = [float(t) for t in args.barrido.split(",")] if args.barrido else [args.tasa]
+        resultados = barrido(
+            tasas, segundos=args.segundos, baudios=args.baudios,
+            periodo_hist_ms=args.periodo_hist_ms, semilla=args.semilla,
+        )
+        imprimir(resultados)
+        return 0
+
+    emulador = EmuladorTAR(tasa=args.tasa, baudios=args.baudios, generador=GeneradorTAR(semilla=args.semilla))
+    emulador.iniciar()
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[Emulador] {emulador.estadisticas()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulador.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from core.protocolo import (
+    T_PERIOD, MSK_VP, OFF_TS, OFF_CH, OFF_VP,
+    ZMODADC1410_RESOLUTION, CANAL_A, CANAL_B,
+)
+
+VP_MAX = MSK_VP >> OFF_VP
+
+
+def armar_frames(ts: np.ndarray, chan: np.ndarray, vp_counts: np.ndarray,
+                 header: int = 0xA5, footer: int = 0x5A) -> bytes:
+    """Empaqueta columnas (ts crudo, canal, cuentas) como frames TAR de 8 bytes big-endian."""
+    pulsos = (
+        (np.uint64(header) << np.uint64(56))
+        | (np.asarray(ts).astype(np.uint64) << np.uint64(OFF_TS))
+        | (np.asarray(chan).astype(np.uint64) << np.uint64(OFF_CH))
+        | (np.asarray(vp_counts).astype(np.uint64) << np.uint64(OFF_VP))
+        | np.uint64(footer)
+    )
+    return pulsos.astype(">u8").tobytes()
+
+
+# ====================================================================
+#               GENERADOR SINTÉTICO DE FRAMES TAR
+# ====================================================================
+class GeneradorTAR:
+    """
+    Genera frames TAR válidos de 8 bytes (big-endian) en forma determinística (semilla fija).
+    Configurable:
+     - proporcion_a: fracción de pulsos en el Canal A (el resto va al Canal B)
+     - amplitud: "normal" (media_mv, sigma_mv) o "uniforme" (entre min_mv y max_mv)
+     - frames_por_overflow: cada cuántos frames se inserta un CH=3 (0 = nunca)
+     - intervalo_medio_ns: separación media (exponencial) entre pulsos
+     - header / footer: bytes fijos en los extremos del frame
+    """
+
+    def __init__(
+        self,
+        semilla: int = 0,
+        proporcion_a: float = 0.5,
+        amplitud: str = "normal",
+        media_mv: float = 1500.0,
+        sigma_mv: float = 400.0,
+        min_mv: float = 0.0,
+        max_mv: float = VP_MAX * ZMODADC1410_RESOLUTION,
+        frames_por_overflow: int = 10000,
+        intervalo_medio_ns: float = 10000.0,
+        header: int = 0xA5,
+        footer: int = 0x5A,
+    ):
+        self.rng = np.random.default_rng(semilla)
+        self.proporcion_a = proporcion_a
+        self.amplitud = amplitud
+        self.media_mv = media_mv
+        self.sigma_mv = sigma_mv
+        self.min_mv = min_mv
+        self.max_mv = max_mv
+        self.frames_por_overflow = frames_por_overflow
+        self.intervalo_medio_ns = intervalo_medio_ns
+        self.header = header
+        self.footer = footer
+
+        # Estado entre llamadas: ts crudo actual y frames desde el último CH=3
+        self._ts = 0
+        self._desde_overflow = 0
+
+    def _amplitudes(self, n: int) -> np.ndarray:
+        if self.amplitud == "uniforme":
+            mv = self.rng.uniform(self.min_mv, self.max_mv, n)
+        else:
+            mv = self.rng.normal(self.media_mv, self.sigma_mv, n)
+        return np.clip(np.rint(mv / ZMODADC1410_RESOLUTION), 0, VP_MAX).astype(np.uint64)
+
+    def generar(self, n: int) -> Tuple[bytes, Dict[str, np.ndarray]]:
+        """Genera n frames; retorna (bytes, columnas esperadas: chan, vp_counts, ts)."""
+        chan = np.where(self.rng.random(n) < self.proporcion_a, CANAL_A, CANAL_B).astype(np.uint64)
+
+        # Posiciones de los CH=3 (continúan la cuenta de llamadas anteriores)
+        if self.frames_por_overflow > 0:
+            posiciones = np.arange(n) + self._desde_overflow + 1
+            overflow = posiciones % self.frames_por_overflow == 0
+            if n:
+                ultimos = np.flatnonzero(overflow)
+                self._desde_overflow = (n - 1 - ultimos[-1]) if len(ultimos) else self._desde_overflow + n
+        else:
+            overflow = np.zeros(n, dtype=bool)
+        chan[overflow] = 3
+
+        # Timestamps crudos crecientes (10 ns por cuenta); un CH=3 reinicia la base de tiempo
+        pasos = np.rint(self.rng.exponential(self.intervalo_medio_ns / 10.0, n)).astype(np.int64)
+        ts = np.empty(n, dtype=np.int64)
+        base = self._ts
+        inicio = 0
+        for fin in list(np.flatnonzero(overflow)) + [n]:
+            tramo = base + np.cumsum(pasos[inicio:fin])
+            ts[inicio:fin] = tramo
+            if fin < n:
+                ts[fin] = 0
+                base = 0
+            else:
+                base = int(tramo[-1]) if len(tramo) else base
+            inicio = fin + 1
+        ts %= T_PERIOD
+        self._ts = base % T_PERIOD
+
+        vp = self._amplitudes(n)
+        vp[overflow] = 0
+
+        datos = armar_frames(ts, chan, vp, self.header, self.footer)
+        esperado = {"chan": chan.astype(np.uint8), "vp_counts": vp.astype(np.uint16), "ts": ts}
+        return datos, esperado
+
+    def chunks(
+        self,
+        n_frames: int,
+        tam_chunk: int = 4096,
+        tam_chunk_max: Optional[int] = None,
+        frames_por_tanda: int = 65536,
+    ) -> Iterator[bytes]:
+        """
+        Entrega n_frames como chunks de bytes, como llegarían del puerto serie.
+        Con tam_chunk_max el tamaño de cada chunk es aleatorio en [tam_chunk, tam_chunk_max].
+        """
+        pendiente = b""
+        restantes = n_frames
+        while restantes > 0:
+            k = min(frames_por_tanda, restantes)
+            restantes -= k
+            datos, _ = self.generar(k)
+            datos = pendiente + datos
+            pos = 0
+            while True:
+                tam = tam_chunk if tam_chunk_max is None else int(self.rng.integers(tam_chunk, tam_chunk_max + 1))
+                if len(datos) - pos < tam and restantes > 0:
+                    break
+                if pos >= len(datos):
+                    break
+                yield datos[pos:pos + tam]
+                pos += tam
+            pendiente = datos[pos:]
+        if pendiente:
+            yield pendiente
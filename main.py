@@ -1,5 +1,27 @@
+import time
+T_INICIO = time.perf_counter()     # antes de los imports: lo mide el informe de arranque
+
+import argparse
+import socket
+import sys
 from gui.Ventana_gui import MainWindow
 
 if __name__ == "__main__":
-    app = MainWindow()
-    app.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="TAR GUI")
+    parser.add_argument("--arranque-completo", action="store_true",
+                        help="construir figuras y listar puertos antes de mostrar la ventana")
+    parser.add_argument("--demonio", nargs="?", const="", default=None, metavar="SOCKET",
+                        help="adquirir a través de core.demonio (se arranca si no está corriendo)")
+    args = parser.parse_args()
+
+    adquisicion = None
+    if args.demonio is not None and not hasattr(socket, "AF_UNIX"):
+        print("[GUI] Este sistema no tiene sockets Unix: se adquiere en la ventana")
+    elif args.demonio is not None:
+        from core.cliente_demonio import ClienteDemonio
+        adquisicion = ClienteDemonio(args.demonio or None)
+        if not adquisicion.abrir(lanzar=True):
+            sys.exit(1)
+
+    app = MainWindow(arranque_diferido=not args.arranque_completo, t_inicio=T_INICIO, adquisicion=adquisicion)
+    app.mainloop()